@@ -7,10 +7,13 @@ Output: individual MP3 files for CapCut timeline.
 
 import os
 import sys
-import requests
+import shutil
 from pathlib import Path
 
 BASE_DIR = Path(__file__).parent.parent.parent
+sys.path.insert(0, str(BASE_DIR / "agent-skills"))
+from tts_cache import TTS_CACHE, TTSError
+
 env_file = BASE_DIR / ".env"
 if env_file.exists():
     for line in env_file.read_text().splitlines():
@@ -24,6 +27,14 @@ VOICE_ID = os.environ.get("LEE_VOICE_ID", "6HrHqiq7ijVOY0eVOKhz")
 OUTPUT_DIR = Path(__file__).parent / "audio-clips"
 OUTPUT_DIR.mkdir(exist_ok=True)
 
+MODEL_ID = "eleven_turbo_v2_5"
+VOICE_SETTINGS = {
+    "stability": 0.55,
+    "similarity_boost": 0.80,
+    "style": 0.35,
+    "use_speaker_boost": True,
+}
+
 CLIPS = [
     ("01-intro", "What's up everybody, it's Lee Kearney — Do Deals With Lee."),
     ("02-setup", "We've been working on something big behind the scenes. A brand refresh that matches where we're headed in twenty twenty-six."),
@@ -42,34 +53,18 @@ def generate_clip(name, text):
     print(f"  Generating: {name}...")
     print(f"    Text: {text[:60]}...")
 
-    url = f"https://api.elevenlabs.io/v1/text-to-speech/{VOICE_ID}"
-    headers = {
-        "xi-api-key": API_KEY,
-        "Content-Type": "application/json",
-        "Accept": "audio/mpeg",
-    }
-    body = {
-        "text": text,
-        "model_id": "eleven_turbo_v2_5",
-        "voice_settings": {
-            "stability": 0.55,
-            "similarity_boost": 0.80,
-            "style": 0.35,
-            "use_speaker_boost": True,
-        },
-    }
-
-    r = requests.post(url, headers=headers, json=body, timeout=30)
-    if r.status_code == 200:
-        out_path = OUTPUT_DIR / f"{name}.mp3"
-        out_path.write_bytes(r.content)
-        size_kb = len(r.content) / 1024
-        print(f"    Saved: {out_path.name} ({size_kb:.0f} KB)")
-        return True
-    else:
-        print(f"    ERROR {r.status_code}: {r.text[:200]}")
+    try:
+        speech = TTS_CACHE.synthesize(text, VOICE_ID, MODEL_ID, VOICE_SETTINGS, api_key=API_KEY)
+    except TTSError as e:
+        print(f"    ERROR {e}")
         return False
 
+    out_path = OUTPUT_DIR / f"{name}.mp3"
+    shutil.copyfile(speech.path, out_path)
+    size_kb = out_path.stat().st_size / 1024
+    print(f"    Saved: {out_path.name} ({size_kb:.0f} KB){' — unchanged line, from cache' if speech.cached else ''}")
+    return True
+
 
 def main():
     if not API_KEY:
@@ -0,0 +1,154 @@
+"""
+Async HTTP — Shared Non-Blocking Client
+=========================================
+One pooled httpx.AsyncClient per host (GHL, Groq, Telegram...), kept alive
+for the life of the process. Bot handlers await these instead of calling
+requests.get/post inside the event loop, so a slow upstream call only
+holds up the update that made it.
+
+HTTP/2 is used automatically when the h2 package is installed:
+    pip install "httpx[http2]"
+
+Load test (local stub server, no API keys needed):
+    python async_http.py loadtest [updates] [delay_seconds]
+"""
+
+import sys
+import json
+import time
+import asyncio
+import threading
+from urllib.parse import urlsplit
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import httpx
+
+try:
+    import h2  # noqa: F401 — only needed to enable HTTP/2
+    HTTP2 = True
+except ImportError:
+    HTTP2 = False
+
+DEFAULT_TIMEOUT = 15
+POOL_LIMITS = httpx.Limits(max_connections=20, max_keepalive_connections=10, keepalive_expiry=60)
+
+# origin ("https://host:port") → (event loop, client)
+_clients = {}
+
+
+# ============================================================
+# CLIENT POOL
+# ============================================================
+def get_client(url):
+    """Return the pooled client for this URL's host, creating it on first use."""
+    parts = urlsplit(url)
+    origin = f"{parts.scheme}://{parts.netloc}"
+    loop = asyncio.get_running_loop()
+    entry = _clients.get(origin)
+    # Clients are bound to the loop that created them
+    if entry is None or entry[0] is not loop or entry[1].is_closed:
+        client = httpx.AsyncClient(http2=HTTP2, limits=POOL_LIMITS, timeout=DEFAULT_TIMEOUT)
+        _clients[origin] = (loop, client)
+        return client
+    return entry[1]
+
+
+async def request(method, url, timeout=DEFAULT_TIMEOUT, **kwargs):
+    """Send a request through the host's pooled client. Raises httpx errors like requests would."""
+    return await get_client(url).request(method, url, timeout=timeout, **kwargs)
+
+
+async def get(url, **kwargs):
+    return await request("GET", url, **kwargs)
+
+
+async def post(url, **kwargs):
+    return await request("POST", url, **kwargs)
+
+
+async def close_all():
+    """Close every pooled client (call on shutdown)."""
+    for _, client in list(_clients.values()):
+        if not client.is_closed:
+            await client.aclose()
+    _clients.clear()
+
+
+def pool_stats():
+    """Hosts with an open pool and whether HTTP/2 is enabled."""
+    return {
+        "http2": HTTP2,
+        "hosts": [origin for origin, (_, c) in _clients.items() if not c.is_closed],
+    }
+
+
+# ============================================================
+# LOAD TEST — stub server vs. N concurrent "updates"
+# ============================================================
+class _SlowStub(BaseHTTPRequestHandler):
+    delay = 1.0
+
+    def do_GET(self):
+        time.sleep(self.delay)
+        body = json.dumps({"workflows": [], "ok": True}).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+class _StubServer(ThreadingHTTPServer):
+    request_queue_size = 256  # default backlog of 5 drops bursts of connects
+
+
+def _start_stub(delay):
+    _SlowStub.delay = delay
+    server = _StubServer(("127.0.0.1", 0), _SlowStub)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+async def _fake_update(url):
+    """One bot update: a single upstream call, like cmd_workflows."""
+    r = await get(url)
+    return r.json()
+
+
+async def load_test(updates=20, delay=1.0):
+    server = _start_stub(delay)
+    url = f"http://127.0.0.1:{server.server_port}/workflows/"
+    try:
+        start = time.time()
+        await _fake_update(url)
+        single = time.time() - start
+
+        start = time.time()
+        results = await asyncio.gather(*[_fake_update(url) for _ in range(updates)])
+        concurrent = time.time() - start
+    finally:
+        await close_all()
+        server.shutdown()
+
+    ok = sum(1 for r in results if r.get("ok"))
+    print(f"\n{'='*60}")
+    print(f"  ASYNC HTTP LOAD TEST — {updates} updates, {delay:.1f}s upstream")
+    print(f"{'='*60}")
+    print(f"  1 update:            {single:.2f}s")
+    print(f"  {updates} concurrent:       {concurrent:.2f}s  ({ok}/{updates} ok)")
+    print(f"  Blocking would take: ~{single * updates:.2f}s")
+    print(f"  Ratio vs 1 update:   {concurrent / single:.2f}x")
+    print(f"{'='*60}\n")
+    return {"single": single, "concurrent": concurrent, "updates": updates, "ok": ok}
+
+
+if __name__ == "__main__":
+    if len(sys.argv) < 2 or sys.argv[1] != "loadtest":
+        print("Usage: python async_http.py loadtest [updates] [delay_seconds]")
+        sys.exit(0)
+    n = int(sys.argv[2]) if len(sys.argv) > 2 else 20
+    d = float(sys.argv[3]) if len(sys.argv) > 3 else 1.0
+    asyncio.run(load_test(n, d))
@@ -0,0 +1,195 @@
+"""
+Browser Pool — One warm headless Chromium shared by the Telegram bot
+=====================================================================
+/browse and /scrape used to spawn a fresh Python process per request, import
+Playwright, launch Chromium and sleep 3 s. The pool keeps a single browser
+running inside the bot's event loop and hands out ready pages:
+
+    browser     launched on first use, relaunched automatically if it crashes
+    pages       up to `size` at once (one context each); extra requests queue
+    reuse       a finished page is blanked, its cookies cleared, and parked
+                for the next request; pages are retired after MAX_USES
+    resources   each request picks a request_router profile: screenshots
+                load "no-media", text scrapes "text-only"; static assets are
+                shared through the on-disk asset store
+    deadline    every request has one time budget covering the wait for a
+                page, navigation and capture; a page that misses it is
+                closed rather than reused
+
+Usage:
+    from browser_pool import BROWSER_POOL
+    png = await BROWSER_POOL.screenshot("https://example.com")
+    text = await BROWSER_POOL.text("https://example.com")
+    async with BROWSER_POOL.page(deadline=30, resources="full") as page: ...
+    await BROWSER_POOL.close()   # on shutdown
+
+Requires: pip install playwright && playwright install chromium
+"""
+
+import os
+import time
+import asyncio
+import logging
+from contextlib import asynccontextmanager
+
+from browser_resilience import STEALTH_ARGS, STEALTH_IGNORE_ARGS, STEALTH_JS
+from request_router import RequestRouter, PROFILES
+
+logger = logging.getLogger(__name__)
+
+POOL_SIZE = int(os.environ.get("BROWSER_POOL_SIZE", "3"))
+DEFAULT_DEADLINE = 45  # seconds per request, queueing included
+MAX_USES = 50          # recycle a context after this many requests
+SETTLE_MS = 3000       # cap on waiting for network idle after load
+VIEWPORT = {"width": 1280, "height": 720}
+
+
+class BrowserPool:
+    def __init__(self, size=POOL_SIZE, headless=True):
+        self.size = size
+        self.headless = headless
+        self._pw = None
+        self._browser = None
+        self._idle = []  # [(context, page, uses)]
+        self._slots = asyncio.Semaphore(size)
+        self._launch_lock = asyncio.Lock()
+        self.routers = {name: RequestRouter(name) for name in PROFILES}
+        self.counters = {"launches": 0, "crashes": 0, "pages_created": 0, "pages_reused": 0,
+                         "pages_discarded": 0, "requests": 0, "timeouts": 0}
+
+    # ── browser lifecycle ──
+    async def _ensure_browser(self):
+        async with self._launch_lock:
+            if self._browser and self._browser.is_connected():
+                return self._browser
+            if self._browser is not None:
+                self.counters["crashes"] += 1
+                logger.warning("🌐 Browser lost — relaunching")
+            self._idle.clear()  # pages of a dead browser are useless
+            if self._pw is None:
+                from playwright.async_api import async_playwright
+                self._pw = await async_playwright().start()
+            started = time.time()
+            self._browser = await self._pw.chromium.launch(
+                headless=self.headless, args=STEALTH_ARGS, ignore_default_args=STEALTH_IGNORE_ARGS)
+            self.counters["launches"] += 1
+            logger.info(f"🌐 Chromium warm in {time.time() - started:.1f}s (pool of {self.size})")
+            return self._browser
+
+    async def _new_page(self):
+        browser = await self._ensure_browser()
+        context = await browser.new_context(viewport=VIEWPORT)
+        await context.add_init_script(STEALTH_JS)
+        page = await context.new_page()
+        page.on("dialog", lambda dialog: asyncio.ensure_future(dialog.dismiss()))
+        self.counters["pages_created"] += 1
+        return context, page, 0
+
+    async def _checkout(self):
+        while self._idle:
+            context, page, uses = self._idle.pop()
+            if not page.is_closed() and self._browser and self._browser.is_connected():
+                self.counters["pages_reused"] += 1
+                return context, page, uses
+        return await self._new_page()
+
+    async def _checkin(self, context, page, uses, healthy):
+        if healthy and uses < MAX_USES and not page.is_closed():
+            try:
+                await page.goto("about:blank", timeout=5000)
+                await context.clear_cookies()
+                self._idle.append((context, page, uses))
+                return
+            except Exception:
+                pass
+        self.counters["pages_discarded"] += 1
+        try:
+            await context.close()
+        except Exception:
+            pass
+
+    # ── requests ──
+    @asynccontextmanager
+    async def page(self, deadline=DEFAULT_DEADLINE, resources="full"):
+        """A ready page for the duration of the block. Raises asyncio.TimeoutError if none frees up in time."""
+        self.counters["requests"] += 1
+        router = self.routers[resources]
+        await asyncio.wait_for(self._slots.acquire(), timeout=deadline)
+        healthy = False
+        checked_out = None
+        try:
+            checked_out = await self._checkout()
+            context, page, uses = checked_out
+            await router.attach(page)
+            yield page
+            healthy = True
+        finally:
+            if checked_out:
+                context, page, uses = checked_out
+                try:
+                    await router.detach(page)
+                except Exception:
+                    healthy = False
+                await self._checkin(context, page, uses + 1, healthy)
+            self._slots.release()
+
+    async def run(self, fn, deadline=DEFAULT_DEADLINE, resources="full"):
+        """await fn(page) on a pooled page, all within `deadline` seconds."""
+        async def job():
+            async with self.page(deadline, resources) as page:
+                return await fn(page)
+        try:
+            return await asyncio.wait_for(job(), timeout=deadline)
+        except asyncio.TimeoutError:
+            self.counters["timeouts"] += 1
+            raise
+
+    @staticmethod
+    async def load(page, url, timeout_ms):
+        """Navigate, then give late XHRs until network idle (capped by SETTLE_MS)."""
+        await page.goto(url, wait_until="load", timeout=timeout_ms)
+        try:
+            await page.wait_for_load_state("networkidle", timeout=SETTLE_MS)
+        except Exception:
+            pass  # pages that poll forever never go idle — take what's rendered
+
+    async def screenshot(self, url, full_page=False, deadline=DEFAULT_DEADLINE):
+        """PNG bytes of `url`."""
+        async def shoot(page):
+            await self.load(page, url, int(deadline * 1000))
+            return await page.screenshot(full_page=full_page)
+        return await self.run(shoot, deadline, "no-media")
+
+    async def text(self, url, deadline=DEFAULT_DEADLINE):
+        """Visible body text of `url`."""
+        async def scrape(page):
+            await self.load(page, url, int(deadline * 1000))
+            return await page.inner_text("body")
+        return await self.run(scrape, deadline, "text-only")
+
+    def stats(self):
+        routed = [r.stats() for r in self.routers.values()]
+        return dict(self.counters, idle=len(self._idle), size=self.size,
+                    warm=bool(self._browser and self._browser.is_connected()),
+                    blocked=sum(r["blocked_type"] + r["blocked_tracker"] for r in routed),
+                    from_store=sum(r["store_fresh"] + r["store_revalidated"] for r in routed))
+
+    async def close(self):
+        for context, _, _ in self._idle:
+            try:
+                await context.close()
+            except Exception:
+                pass
+        self._idle.clear()
+        if self._browser:
+            try:
+                await self._browser.close()
+            except Exception:
+                pass
+            self._browser = None
+        if self._pw:
+            await self._pw.stop()
+            self._pw = None
+
+
+BROWSER_POOL = BrowserPool()
@@ -11,21 +11,36 @@ USAGE:
     async with ResilientBrowser(profile="lilly-agent") as browser:
         page = await browser.goto("https://app.gohighlevel.com")
         # Cookies auto-dismissed, session persisted, stealth enabled
+        text = await browser.get_text("https://example.com/docs")   # text-only load
+
+BENCHMARK:
+    python browser_resilience.py bench [rounds]   # overlay detection on browser-fixtures/*.html
 
 WHAT IT DOES:
     1. COOKIE/POPUP KILLER — Auto-clicks Accept/Dismiss on any cookie banner
+       (one in-page scan finds every candidate; per-domain cache of what worked)
     2. STEALTH MODE — Anti-detection flags so sites don't know it's automated
     3. PERSISTENT SESSIONS — Cookies/logins survive between runs
     4. MODAL DESTROYER — Kills overlays, modals, backdrop divs
     5. SMART RETRY — Retries on failures with exponential backoff
     6. HUMAN HANDOFF — Pauses and asks user when it genuinely can't proceed
+    7. RESOURCE PROFILES — resources="text-only" / "no-media" skip images,
+       media, fonts and trackers; static assets come from a local store
+       (request_router.py)
 """
 
+import re
+import sys
 import asyncio
 import time
 import json
 from pathlib import Path
 from datetime import datetime
+from urllib.parse import urlparse
+
+from state_store import JsonStore
+from page_ready import watch, settle, after_click
+from request_router import RequestRouter
 
 AGENT_DIR = Path(__file__).parent
 LOG_DIR = AGENT_DIR / "logs"
@@ -33,6 +48,11 @@ PROFILE_BASE = AGENT_DIR / "browser-profiles"
 LOG_DIR.mkdir(parents=True, exist_ok=True)
 PROFILE_BASE.mkdir(parents=True, exist_ok=True)
 
+# Any site can be opened here, and busy ones never go quiet: wait at most
+# as long as the fixed sleeps these settles replaced
+NAV_SETTLE_MS = 1500
+CLICK_SETTLE_MS = 500
+
 # Comet browser (Perplexity) — our default
 COMET_EXE = r"C:\Users\danga\AppData\Local\Perplexity\Comet\Application\comet.exe"
 CHROME_EXE = r"C:\Program Files\Google\Chrome\Application\chrome.exe"
@@ -144,22 +164,138 @@ MODAL_DISMISS_SELECTORS = [
 ]
 
 
-async def kill_cookie_popups(page, timeout=2000):
-    """Try to click cookie accept buttons. Returns True if something was clicked."""
+def _split_selector(selector):
+    """'button:has-text("OK")' → ('button', 'ok'). Plain CSS passes through with no text."""
+    m = re.match(r'^(.*?):has-text\("(.+?)"\)(.*)$', selector)
+    if not m:
+        return selector, None
+    return m.group(1) + m.group(3), m.group(2).lower()
+
+
+def _candidate_list(kind, selectors):
+    out = []
+    for sel in selectors:
+        css, text = _split_selector(sel)
+        out.append({"selector": sel, "css": css, "text": text, "kind": kind})
+    return out
+
+
+_COOKIE_CANDIDATES = _candidate_list("cookie", COOKIE_ACCEPT_SELECTORS)
+_MODAL_CANDIDATES = _candidate_list("modal", MODAL_DISMISS_SELECTORS)
+
+# domain → {"cookie": selector, "modal": selector} that worked last time
+OVERLAY_CACHE = JsonStore(AGENT_DIR / "overlay-selectors.json", default={}, indent=1)
+
+# One pass over the page: every visible candidate, in priority order, tagged
+# with data-overlay-hit so Playwright can click it without re-querying.
+# :has-text() is matched on whole words, so "OK" no longer hits "Book now".
+OVERLAY_SCAN_JS = r"""({candidates, banners}) => {
+    const visible = el => {
+        const r = el.getBoundingClientRect();
+        if (r.width < 1 || r.height < 1) return false;
+        const s = getComputedStyle(el);
+        return s.visibility !== 'hidden' && s.display !== 'none' && parseFloat(s.opacity || '1') > 0;
+    };
+    const words = t => new RegExp('(^|\\W)' + t.replace(/[.*+?^${}()|[\]\\]/g, '\\$&') + '($|\\W)', 'i');
+    document.querySelectorAll('[data-overlay-hit]').forEach(el => el.removeAttribute('data-overlay-hit'));
+    const hits = [], used = new Set();
+    candidates.forEach((c, rank) => {
+        let els;
+        try { els = document.querySelectorAll(c.css); } catch (e) { return; }
+        const pattern = c.text ? words(c.text) : null;
+        for (const el of els) {
+            if (used.has(el) || !visible(el)) continue;
+            if (pattern && !pattern.test(el.innerText || el.textContent || '')) continue;
+            used.add(el);
+            el.setAttribute('data-overlay-hit', String(hits.length));
+            hits.push({id: hits.length, selector: c.selector, kind: c.kind, rank});
+            break;
+        }
+    });
+    let bannerCount = 0;
+    for (const sel of banners) {
+        try { bannerCount += document.querySelectorAll(sel).length; } catch (e) {}
+    }
+    let fixedCookie = 0;
+    document.querySelectorAll('[style*="position: fixed"], [style*="position:fixed"]').forEach(el => {
+        const r = el.getBoundingClientRect();
+        const text = (el.innerText || '').toLowerCase();
+        if (r.width > window.innerWidth * 0.5 && r.height > 100 &&
+            ['cookie', 'consent', 'privacy', 'gdpr'].some(w => text.includes(w))) fixedCookie++;
+    });
+    const dialogs = Array.from(document.querySelectorAll('[role="dialog"], .modal.show')).filter(visible).length;
+    const backdrops = document.querySelectorAll('.modal-backdrop, .overlay, .modal-overlay, [class*="backdrop"]').length;
+    const locked = [document.body, document.documentElement].some(el => el && getComputedStyle(el).overflow === 'hidden');
+    return {hits, banners: bannerCount, fixed_cookie: fixedCookie, dialogs, backdrops, scroll_locked: locked};
+}"""
+
+_EMPTY_SCAN = {"hits": [], "banners": 0, "fixed_cookie": 0, "dialogs": 0, "backdrops": 0, "scroll_locked": False}
+
+
+def _domain(page):
+    try:
+        return urlparse(page.url).hostname or ""
+    except Exception:
+        return ""
+
+
+def _ranked_candidates(domain):
+    """Cookie then modal candidates, with whatever worked on this domain last time moved to the front."""
+    learned = OVERLAY_CACHE.read().get(domain, {}) if domain else {}
+    ordered = []
+    for kind, candidates in (("cookie", _COOKIE_CANDIDATES), ("modal", _MODAL_CANDIDATES)):
+        best = learned.get(kind)
+        ordered += sorted(candidates, key=lambda c: c["selector"] != best)
+    return ordered
+
+
+def _remember(domain, kind, selector):
+    if domain and OVERLAY_CACHE.read().get(domain, {}).get(kind) != selector:
+        OVERLAY_CACHE.update(lambda d: d.setdefault(domain, {}).update({kind: selector}))
+
+
+async def scan_overlays(page):
+    """One evaluate() → ranked hits plus banner/dialog/scroll-lock counts for the current page."""
+    domain = _domain(page)
+    try:
+        scan = await page.evaluate(OVERLAY_SCAN_JS, {"candidates": _ranked_candidates(domain),
+                                                     "banners": COOKIE_BANNER_SELECTORS})
+    except Exception:
+        scan = dict(_EMPTY_SCAN)
+    scan["domain"] = domain
+    return scan
+
+
+async def _click_hit(page, hit, timeout):
+    """Click a scanned hit. False (at once) if it's no longer visible — an earlier
+    click in the same pass may have closed its overlay."""
+    el = page.locator(f'[data-overlay-hit="{hit["id"]}"]')
+    if not await el.is_visible():
+        return False
+    await el.click(timeout=timeout)
+    try:
+        await el.wait_for(state="hidden", timeout=1000)
+    except Exception:
+        pass
+    return True
+
+
+async def kill_cookie_popups(page, timeout=2000, scan=None):
+    """Click the best visible cookie accept button. Returns True if something was clicked or removed."""
+    scan = scan or await scan_overlays(page)
     clicked = False
-    for selector in COOKIE_ACCEPT_SELECTORS:
+    for hit in (h for h in scan["hits"] if h["kind"] == "cookie"):
         try:
-            el = page.locator(selector).first
-            if await el.is_visible(timeout=timeout):
-                await el.click(timeout=timeout)
-                _log("COOKIE", f"Clicked: {selector}")
-                clicked = True
-                await page.wait_for_timeout(500)
-                break
+            if not await _click_hit(page, hit, timeout):
+                continue
+            _log("COOKIE", f"Clicked: {hit['selector']}")
+            _remember(scan["domain"], "cookie", hit["selector"])
+            clicked = True
+            break
         except Exception:
             continue
 
-    if not clicked:
+    if not clicked and (scan["banners"] or scan["fixed_cookie"]):
         # Fallback: remove cookie banners via JS
         try:
             removed = await page.evaluate("""() => {
@@ -196,24 +332,26 @@ async def kill_cookie_popups(page, timeout=2000):
     return clicked
 
 
-async def dismiss_modals(page, timeout=1500):
+async def dismiss_modals(page, timeout=1500, scan=None):
     """Dismiss generic modals, overlays, and popups."""
+    scan = scan or await scan_overlays(page)
     dismissed = False
-    for selector in MODAL_DISMISS_SELECTORS:
+    for hit in (h for h in scan["hits"] if h["kind"] == "modal"):
         try:
-            el = page.locator(selector).first
-            if await el.is_visible(timeout=timeout):
-                await el.click(timeout=timeout)
-                _log("MODAL", f"Dismissed: {selector}")
-                dismissed = True
-                await page.wait_for_timeout(300)
+            if not await _click_hit(page, hit, timeout):
+                continue
+            _log("MODAL", f"Dismissed: {hit['selector']}")
+            _remember(scan["domain"], "modal", hit["selector"])
+            dismissed = True
         except Exception:
             continue
 
+    if not (dismissed or scan["dialogs"] or scan["backdrops"] or scan["scroll_locked"]):
+        return False  # clean page — nothing to escape or strip
+
     # Also try Escape key
     try:
         await page.keyboard.press("Escape")
-        await page.wait_for_timeout(300)
     except Exception:
         pass
 
@@ -241,10 +379,13 @@ async def dismiss_modals(page, timeout=1500):
 
 
 async def clear_all_overlays(page):
-    """Nuclear cleanup — kill ALL overlays, banners, modals."""
-    await kill_cookie_popups(page)
-    await dismiss_modals(page)
-    await page.wait_for_timeout(500)
+    """Kill cookie banners and modals found by a single page scan. Returns True if anything was cleared."""
+    scan = await scan_overlays(page)
+    if not scan["hits"] and not any(scan[k] for k in ("banners", "fixed_cookie", "dialogs", "backdrops", "scroll_locked")):
+        return False
+    cleared = await kill_cookie_popups(page, scan=scan)
+    cleared = await dismiss_modals(page, scan=scan) or cleared
+    return cleared
 
 
 # ============================================================
@@ -310,13 +451,15 @@ class ResilientBrowser:
     - Stealth mode (anti-bot detection)
     - Smart retry with backoff
     - Human handoff when stuck
+    - Resource profiles: "full", "no-media" or "text-only" (see request_router.py)
     """
 
-    def __init__(self, profile="resilient-agent", headless=False, use_comet=True):
+    def __init__(self, profile="resilient-agent", headless=False, use_comet=True, resources="full"):
         self.profile = profile
         self.profile_path = str(PROFILE_BASE / profile)
         self.headless = headless
         self.use_comet = use_comet
+        self.router = RequestRouter(resources)
         self._pw = None
         self.context = None
         self.page = None
@@ -353,6 +496,7 @@ class ResilientBrowser:
 
         # Inject stealth JS on every new page
         await self.context.add_init_script(STEALTH_JS)
+        await self.router.attach(self.context)
 
         # Get or create page
         if self.context.pages:
@@ -362,8 +506,9 @@ class ResilientBrowser:
 
         # Set up auto-popup handler
         self.page.on("dialog", self._handle_dialog)
+        watch(self.page)
 
-        _log("BROWSER", f"Started | Profile: {self.profile} | Stealth: ON | Comet: {bool(exe)}")
+        _log("BROWSER", f"Started | Profile: {self.profile} | Stealth: ON | Comet: {bool(exe)} | Resources: {self.router.profile}")
         return self
 
     async def _handle_dialog(self, dialog):
@@ -371,18 +516,24 @@ class ResilientBrowser:
         _log("DIALOG", f"Auto-accepting: {dialog.type} — {dialog.message[:80]}")
         await dialog.accept()
 
-    async def goto(self, url, wait="domcontentloaded", auto_clean=True):
-        """Navigate with auto cookie/popup cleanup."""
+    async def goto(self, url, wait="domcontentloaded", auto_clean=True, deadline=None, resources=None):
+        """Navigate with auto cookie/popup cleanup. `deadline` (page_ready.Deadline) bounds the settle;
+        `resources` picks a resource profile for this navigation only."""
         _log("NAV", url)
+        default = self.router.profile
+        self.router.profile = resources or default
         try:
-            await self.page.goto(url, wait_until=wait, timeout=30000)
-        except Exception as e:
-            _log("NAV_WARN", f"Timeout/error on {url}: {str(e)[:100]}")
+            try:
+                await self.page.goto(url, wait_until=wait, timeout=deadline.ms(30000) if deadline else 30000)
+            except Exception as e:
+                _log("NAV_WARN", f"Timeout/error on {url}: {str(e)[:100]}")
 
-        await self.page.wait_for_timeout(1500)
+            await settle(self.page, deadline, cap_ms=NAV_SETTLE_MS)
 
-        if auto_clean:
-            await clear_all_overlays(self.page)
+            if auto_clean:
+                await clear_all_overlays(self.page)
+        finally:
+            self.router.profile = default
 
         return self.page
 
@@ -411,7 +562,7 @@ class ResilientBrowser:
         await clear_all_overlays(self.page)
         try:
             await self.page.click(selector, timeout=timeout)
-            await self.page.wait_for_timeout(500)
+            await after_click(self.page, cap_ms=CLICK_SETTLE_MS)
             return True
         except Exception as e:
             _log("CLICK_FAIL", f"{selector}: {str(e)[:100]}")
@@ -437,8 +588,10 @@ class ResilientBrowser:
             _log("SCREENSHOT", f"Failed: {name}")
         return path
 
-    async def get_text(self):
-        """Get page body text."""
+    async def get_text(self, url=None):
+        """Get page body text — of `url` if given, loaded without images, media or fonts."""
+        if url:
+            await self.goto(url, resources="text-only")
         try:
             return await self.page.inner_text("body")
         except Exception:
@@ -542,7 +695,7 @@ class ResilientBrowser:
 # ============================================================
 async def quick_browse(url, profile="quick"):
     """One-liner to open a URL with full resilience."""
-    async with ResilientBrowser(profile=profile) as b:
+    async with ResilientBrowser(profile=profile, resources="text-only") as b:
         await b.goto(url)
         text = await b.get_text()
         return text
@@ -550,13 +703,77 @@ async def quick_browse(url, profile="quick"):
 
 async def quick_screenshot(url, output_path, profile="quick"):
     """One-liner to screenshot a URL with cookie popups auto-dismissed."""
-    async with ResilientBrowser(profile=profile) as b:
+    async with ResilientBrowser(profile=profile, resources="no-media") as b:
         await b.goto(url)
         await b.screenshot(output_path)
 
 
 # ============================================================
-# 5. TEST — verify everything works
+# 5. OVERLAY BENCHMARK — single-pass scan vs per-selector probing
+# ============================================================
+FIXTURE_DIR = AGENT_DIR / "browser-fixtures"
+
+
+async def _legacy_probe(page):
+    """The old detection: one is_visible() round-trip per selector."""
+    found = []
+    for selector in COOKIE_ACCEPT_SELECTORS + MODAL_DISMISS_SELECTORS:
+        try:
+            if await page.locator(selector).first.is_visible():
+                found.append(selector)
+        except Exception:
+            continue
+    return found
+
+
+async def bench_overlays(rounds=5):
+    """Time overlay detection on the local HTML fixtures and check the right buttons are found.
+
+    Each fixture marks the element that should be clicked with data-expect="cookie|modal".
+    """
+    from statistics import median
+    from playwright.async_api import async_playwright
+
+    print(f"\n  {'Fixture':<24} {'per-selector':>13} {'single pass':>12} {'speedup':>8} {'dismiss':>9}  found")
+    print(f"  {'-' * 80}")
+    async with async_playwright() as pw:
+        browser = await pw.chromium.launch(headless=True)
+        page = await browser.new_page()
+        for fixture in sorted(FIXTURE_DIR.glob("*.html")):
+            await page.goto(fixture.as_uri())
+            legacy, single = [], []
+            for _ in range(rounds):
+                started = time.perf_counter()
+                await _legacy_probe(page)
+                legacy.append((time.perf_counter() - started) * 1000)
+                started = time.perf_counter()
+                scan = await scan_overlays(page)
+                single.append((time.perf_counter() - started) * 1000)
+
+            expected = sorted(await page.evaluate(
+                "() => Array.from(document.querySelectorAll('[data-expect]')).map(e => e.dataset.expect)"))
+            found = []
+            for kind in ("cookie", "modal"):
+                top = next((h for h in scan["hits"] if h["kind"] == kind), None)
+                if top:
+                    found.append(await page.evaluate(
+                        "id => document.querySelector(`[data-overlay-hit=\"${id}\"]`).dataset.expect || 'WRONG'",
+                        top["id"]))
+            ok = "✓" if sorted(found) == expected else f"✗ expected {expected}, got {found}"
+            # Clearing the page, with every hit of the scan (stale ones must be skipped, not waited on)
+            started = time.perf_counter()
+            await kill_cookie_popups(page, scan=scan)
+            await dismiss_modals(page, scan=scan)
+            dismiss = (time.perf_counter() - started) * 1000
+            old, new = median(legacy), median(single)
+            print(f"  {fixture.name:<24} {old:>10.1f} ms {new:>9.1f} ms {old / max(new, 0.01):>7.0f}x "
+                  f"{dismiss:>6.0f} ms  {ok}")
+        await browser.close()
+    print()
+
+
+# ============================================================
+# 6. TEST — verify everything works
 # ============================================================
 async def test_resilience():
     """Test the resilience module against common sites."""
@@ -585,4 +802,7 @@ async def test_resilience():
 
 
 if __name__ == "__main__":
-    asyncio.run(test_resilience())
+    if len(sys.argv) > 1 and sys.argv[1] == "bench":
+        asyncio.run(bench_overlays(int(sys.argv[2]) if len(sys.argv) > 2 else 5))
+    else:
+        asyncio.run(test_resilience())
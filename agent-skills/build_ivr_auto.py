@@ -22,6 +22,8 @@ load_dotenv(Path(__file__).parent.parent / ".env")
 # Add parent for imports
 sys.path.insert(0, str(Path(__file__).parent))
 from exposure_agent import AgentLogger
+from page_ready import Deadline, StepTimer, watch, settle, after_click, dom_quiet, selector_ready
+from request_router import RequestRouter
 
 # Paths
 AGENT_DIR = Path(__file__).parent
@@ -40,6 +42,7 @@ GHL_LOGIN_URL = "https://app.gohighlevel.com/"
 GHL_EMAIL = os.getenv("GHL_EMAIL", "")
 GHL_PASSWORD = os.getenv("GHL_PASSWORD", "")
 PHONE_NUMBER = "(813) 675-0916"
+RUN_DEADLINE = 300  # seconds for the whole run; waits past it stop waiting
 
 # IVR Content
 GREETING_TEXT = "Thank you for calling Do Deals with Lee. Tampa Bay's trusted real estate investment partner."
@@ -98,19 +101,15 @@ logger = AgentLogger()
 # ============================================================
 # HELPER: Wait for GHL page to fully load
 # ============================================================
-async def wait_for_ghl_load(page, timeout=20000):
+async def wait_for_ghl_load(page, timeout=20000, deadline=None):
     """Wait for GHL's React app to finish loading."""
-    try:
-        await page.wait_for_load_state("networkidle", timeout=timeout)
-    except Exception:
-        pass
-    await page.wait_for_timeout(3000)
-    
+    await settle(page, deadline, cap_ms=timeout)
+
     # GHL often shows a modal overlay on load — close it
     await dismiss_ghl_modals(page)
-    
+
     # Wait for actual content to render after modal is gone
-    await page.wait_for_timeout(3000)
+    await dom_quiet(page, deadline, cap_ms=5000)
 
 
 async def dismiss_ghl_modals(page):
@@ -152,7 +151,7 @@ async def dismiss_ghl_modals(page):
     # Also try pressing Escape
     try:
         await page.keyboard.press("Escape")
-        await page.wait_for_timeout(500)
+        await dom_quiet(page, quiet_ms=200, cap_ms=1500)
     except Exception:
         pass
 
@@ -245,14 +244,14 @@ async def check_ghl_login(page):
 # ============================================================
 # STEP 1: Ensure logged in
 # ============================================================
-async def ensure_login(page, target_url=None):
+async def ensure_login(page, target_url=None, deadline=None):
     """Navigate to GHL and ensure we're logged in. Auto-login with credentials."""
     if target_url is None:
         target_url = GHL_PHONE_SETTINGS_URL
     
     logger.log("LOGIN_CHECK", "Checking GHL login status...")
     await page.goto(target_url, wait_until="domcontentloaded", timeout=30000)
-    await wait_for_ghl_load(page)
+    await wait_for_ghl_load(page, deadline=deadline)
     await take_screenshot(page, "login-check")
 
     if await check_ghl_login(page):
@@ -262,18 +261,16 @@ async def ensure_login(page, target_url=None):
     # Not logged in — auto-login
     logger.log("LOGIN_NEEDED", "Not logged in. Auto-logging in...")
     await page.goto(GHL_LOGIN_URL, wait_until="domcontentloaded", timeout=30000)
-    await page.wait_for_timeout(3000)
+    await selector_ready(page, 'input[type="email"], input[name="email"]', deadline)
     
     try:
         # Fill email
         email_input = page.locator('input[type="email"], input[name="email"], input[placeholder*="email" i]').first
         await email_input.fill(GHL_EMAIL)
-        await page.wait_for_timeout(500)
         
         # Fill password
         pass_input = page.locator('input[type="password"], input[name="password"]').first
         await pass_input.fill(GHL_PASSWORD)
-        await page.wait_for_timeout(500)
         
         # Click sign in button
         login_btn = page.locator('button[type="submit"], button:has-text("Sign"), button:has-text("Log")').first
@@ -281,8 +278,11 @@ async def ensure_login(page, target_url=None):
         logger.log("LOGIN", "Submitted login form")
         
         # Wait for redirect
-        await page.wait_for_timeout(5000)
-        await wait_for_ghl_load(page)
+        try:
+            await page.wait_for_url(lambda url: "/location/" in url, timeout=deadline.ms(20000) if deadline else 20000)
+        except Exception:
+            pass  # 2FA or a slow redirect — checked below
+        await wait_for_ghl_load(page, deadline=deadline)
         await take_screenshot(page, "after-auto-login")
         await dump_page_info(page)
     except Exception as e:
@@ -295,13 +295,13 @@ async def ensure_login(page, target_url=None):
     # Navigate to target
     if await check_ghl_login(page):
         await page.goto(target_url, wait_until="domcontentloaded", timeout=30000)
-        await wait_for_ghl_load(page)
+        await wait_for_ghl_load(page, deadline=deadline)
         logger.log("LOGIN_OK", "Successfully logged into GHL")
         return True
     
     # One more try
     await page.goto(target_url, wait_until="domcontentloaded", timeout=30000)
-    await wait_for_ghl_load(page)
+    await wait_for_ghl_load(page, deadline=deadline)
     
     if await check_ghl_login(page):
         logger.log("LOGIN_OK", "Successfully logged into GHL (after redirect)")
@@ -328,7 +328,6 @@ async def find_or_create_workflow(page):
             try:
                 link = page.locator(f"text={name}").first
                 await link.click()
-                await page.wait_for_timeout(3000)
                 await wait_for_ghl_load(page)
                 logger.log("WORKFLOW_OPENED", f"Opened workflow: {name}")
                 return True
@@ -354,7 +353,7 @@ async def find_or_create_workflow(page):
                 await el.click()
                 create_clicked = True
                 logger.log("CLICK", f"Clicked create button via: {selector}")
-                await page.wait_for_timeout(2000)
+                await settle(page)
                 break
         except Exception:
             continue
@@ -401,7 +400,7 @@ async def find_or_create_workflow(page):
                 await el.click()
                 template_clicked = True
                 logger.log("CLICK", f"Clicked template option via: {selector}")
-                await page.wait_for_timeout(2000)
+                await settle(page)
                 break
         except Exception:
             continue
@@ -417,7 +416,7 @@ async def find_or_create_workflow(page):
         search_box = page.locator('input[placeholder*="Search"], input[type="search"], input[placeholder*="search"]').first
         if await search_box.is_visible(timeout=3000):
             await search_box.fill("IVR")
-            await page.wait_for_timeout(2000)
+            await settle(page)  # search is debounced, then fetched
             await take_screenshot(page, "ivr-search")
     except Exception:
         logger.log("INFO", "No search box found")
@@ -426,7 +425,7 @@ async def find_or_create_workflow(page):
     try:
         ivr_template = page.locator('text=IVR').first
         await ivr_template.click()
-        await page.wait_for_timeout(1000)
+        await after_click(page)
         
         # Click Use/Select button
         for btn_text in ["Use", "Select", "Apply", "Continue"]:
@@ -438,7 +437,6 @@ async def find_or_create_workflow(page):
             except Exception:
                 continue
         
-        await page.wait_for_timeout(3000)
         await wait_for_ghl_load(page)
         await take_screenshot(page, "workflow-created")
         logger.log("WORKFLOW_CREATED", "IVR template loaded")
@@ -462,13 +460,13 @@ async def configure_trigger(page):
         if not await trigger.is_visible():
             trigger = page.locator('text=Start IVR, text=Inbound Call').first
         await trigger.click()
-        await page.wait_for_timeout(1500)
+        await after_click(page)
     except Exception:
         # Try clicking the first node in the workflow
         try:
             first_node = page.locator('[class*="node"], [class*="step"]').first
             await first_node.click()
-            await page.wait_for_timeout(1500)
+            await after_click(page)
         except Exception as e:
             logger.log("ERROR", f"Could not find trigger node: {e}")
             return False
@@ -478,19 +476,19 @@ async def configure_trigger(page):
         # Try to find a dropdown or select element for phone number
         phone_select = page.locator('select, [class*="select"], [class*="dropdown"]').first
         await phone_select.click()
-        await page.wait_for_timeout(500)
+        await after_click(page)
         
         # Select the phone number
         phone_option = page.locator(f'text={PHONE_NUMBER}, [title*="675-0916"], option:has-text("675-0916")').first
         await phone_option.click()
-        await page.wait_for_timeout(500)
+        await after_click(page)
     except Exception:
         logger.log("WARN", "Could not auto-select phone number. Will try alternative approach.")
         # Try typing in a search field
         try:
             search = page.locator('input[placeholder*="phone"], input[placeholder*="number"], input[placeholder*="Search"]').first
             await search.fill("675-0916")
-            await page.wait_for_timeout(1000)
+            await after_click(page)
             option = page.locator(f'text=675-0916').first
             await option.click()
         except Exception as e:
@@ -501,7 +499,7 @@ async def configure_trigger(page):
     try:
         save_btn = page.locator('button:has-text("Save")').first
         await save_btn.click()
-        await page.wait_for_timeout(1000)
+        await after_click(page)
         logger.log("CONFIG_TRIGGER", "Trigger saved with phone number")
         return True
     except Exception:
@@ -518,7 +516,7 @@ async def configure_say_play(page, node_text, new_message):
         if not await node.is_visible():
             node = page.locator(f':text("{node_text}")').first
         await node.click()
-        await page.wait_for_timeout(1500)
+        await after_click(page)
     except Exception:
         logger.log("WARN", f"Could not find node with text: {node_text}")
         return False
@@ -528,7 +526,7 @@ async def configure_say_play(page, node_text, new_message):
         textarea = page.locator('textarea, input[type="text"]').first
         await textarea.fill("")
         await textarea.fill(new_message)
-        await page.wait_for_timeout(500)
+        await after_click(page)
     except Exception as e:
         logger.log("ERROR", f"Could not fill message: {e}")
         return False
@@ -537,7 +535,7 @@ async def configure_say_play(page, node_text, new_message):
     try:
         save_btn = page.locator('button:has-text("Save")').first
         await save_btn.click()
-        await page.wait_for_timeout(1000)
+        await after_click(page)
         logger.log("CONFIG_SAY", "Say/Play node saved")
         return True
     except Exception:
@@ -553,7 +551,7 @@ async def configure_gather_input(page, node_text, menu_message, num_loops=2):
         if not await node.is_visible():
             node = page.locator(f':text("{node_text}")').first
         await node.click()
-        await page.wait_for_timeout(1500)
+        await after_click(page)
     except Exception:
         logger.log("WARN", f"Could not find gather input node: {node_text}")
         return False
@@ -563,7 +561,7 @@ async def configure_gather_input(page, node_text, menu_message, num_loops=2):
         textarea = page.locator('textarea, input[type="text"]').first
         await textarea.fill("")
         await textarea.fill(menu_message)
-        await page.wait_for_timeout(500)
+        await after_click(page)
     except Exception as e:
         logger.log("ERROR", f"Could not fill gather input message: {e}")
         return False
@@ -579,7 +577,7 @@ async def configure_gather_input(page, node_text, menu_message, num_loops=2):
     try:
         save_btn = page.locator('button:has-text("Save")').first
         await save_btn.click()
-        await page.wait_for_timeout(1000)
+        await after_click(page)
         logger.log("CONFIG_GATHER", "Gather Input node saved")
         return True
     except Exception:
@@ -630,11 +628,16 @@ async def main():
     browser = await pw.chromium.connect_over_cdp(f"http://127.0.0.1:{DEBUG_PORT}")
     context = browser.contexts[0]
     page = await context.new_page()
+    watch(page)
+    router = await RequestRouter("no-media").attach(page)  # this tab only
     logger.log("START", "Connected to Chrome via CDP (new tab)")
+    deadline = Deadline(RUN_DEADLINE)
+    timer = StepTimer("ghl-phone-explore")
 
     try:
         # Step 1: Ensure logged in — target the phone settings page
-        logged_in = await ensure_login(page, GHL_PHONE_SETTINGS_URL)
+        async with timer.step("login"):
+            logged_in = await ensure_login(page, GHL_PHONE_SETTINGS_URL, deadline)
         if not logged_in:
             print("\n  Could not log into GHL. Exiting.")
             return
@@ -650,8 +653,9 @@ async def main():
 
         for name, url in pages_to_check:
             logger.log("EXPLORE", f"Checking: {name}")
-            await page.goto(url, wait_until="domcontentloaded", timeout=30000)
-            await wait_for_ghl_load(page)
+            async with timer.step(f"load {name}"):
+                await page.goto(url, wait_until="domcontentloaded", timeout=30000)
+                await wait_for_ghl_load(page, deadline=deadline)
             
             el_count = await page.evaluate("document.querySelectorAll('*').length")
             try:
@@ -678,6 +682,10 @@ async def main():
                 if links_text:
                     logger.log("LINKS", str([l.strip() for l in links_text if l.strip()][:15]))
 
+        print("\n" + timer.save())
+        s = router.stats()
+        logger.log("ROUTER", f"Blocked {s['blocked_type'] + s['blocked_tracker']} requests, "
+                             f"{s['store_fresh'] + s['store_revalidated']} assets from local store")
         print("\n" + "=" * 60)
         print("  Exploration complete. Check logs for results.")
         print("  Browser stays open for manual inspection.")
@@ -16,6 +16,9 @@ from pathlib import Path
 from dotenv import load_dotenv
 from playwright.async_api import async_playwright
 
+from page_ready import (Deadline, StepTimer, watch, settle, after_click, dom_quiet,
+                        network_idle, selector_ready, frame_ready)
+
 load_dotenv(Path(__file__).parent.parent / ".env")
 
 AGENT_DIR = Path(__file__).parent
@@ -35,6 +38,11 @@ PHONE_NUMBER = "(813) 675-0916"
 CHROME_EXE = r"C:\Program Files\Google\Chrome\Application\chrome.exe"
 DEBUG_PORT = 9222
 
+WORKFLOW_FRAMES = ("client-app-automation", "leadconnectorhq")
+RUN_DEADLINE = 300          # seconds for the whole build
+AI_BUILD_CAP_MS = 90000     # generation normally finishes well inside this
+AI_BUILD_QUIET_MS = 3000    # builder canvas unchanged this long = generated
+
 # Simplified IVR prompt — GHL AI can't handle complex nested menus
 IVR_PROMPT = """Create an inbound call IVR workflow:
 
@@ -84,19 +92,15 @@ async def dismiss_modals(page):
         pass
     try:
         await page.keyboard.press("Escape")
-        await page.wait_for_timeout(300)
+        await dom_quiet(page, quiet_ms=200, cap_ms=1500)
     except Exception:
         pass
 
 
-async def wait_load(page, timeout=15000):
-    try:
-        await page.wait_for_load_state("networkidle", timeout=timeout)
-    except Exception:
-        pass
-    await page.wait_for_timeout(2000)
+async def wait_load(page, timeout=15000, deadline=None):
+    await settle(page, deadline, cap_ms=timeout)
     await dismiss_modals(page)
-    await page.wait_for_timeout(1000)
+    await dom_quiet(page, deadline, cap_ms=5000)
 
 
 async def page_renders(page):
@@ -110,11 +114,11 @@ async def page_renders(page):
     return el > 150 and tl > 50, el, tl, txt
 
 
-async def auto_login(page):
+async def auto_login(page, deadline=None):
     """Auto-login to GHL."""
     log("LOGIN", f"Logging in as {LILLY_EMAIL}...")
     await page.goto(GHL_LOGIN_URL, wait_until="domcontentloaded", timeout=30000)
-    await page.wait_for_timeout(3000)
+    await settle(page, deadline)  # a live session redirects straight to /location/
 
     if "/location/" in page.url and "login" not in page.url:
         log("LOGIN", "Already logged in")
@@ -123,17 +127,18 @@ async def auto_login(page):
     try:
         email_input = page.locator('input[type="email"], input[name="email"], input[placeholder*="email" i]').first
         await email_input.fill(LILLY_EMAIL, timeout=5000)
-        await page.wait_for_timeout(500)
 
         pass_input = page.locator('input[type="password"], input[name="password"]').first
         await pass_input.fill(LILLY_PASS, timeout=5000)
-        await page.wait_for_timeout(500)
 
         login_btn = page.locator('button[type="submit"], button:has-text("Sign"), button:has-text("Log")').first
         await login_btn.click(timeout=5000)
         log("LOGIN", "Submitted login form")
 
-        await page.wait_for_timeout(8000)
+        try:
+            await page.wait_for_url(lambda url: "/location/" in url, timeout=deadline.ms(20000) if deadline else 20000)
+        except Exception:
+            pass
         if "/location/" in page.url:
             log("LOGIN", "Logged in successfully")
             return True
@@ -146,21 +151,21 @@ async def auto_login(page):
         return False
 
 
-async def navigate_to_workflows(page):
+async def navigate_to_workflows(page, deadline=None):
     """Navigate to workflows page using sidebar (the method that works)."""
     log("NAV", "Navigating to Workflows via sidebar...")
 
     # First go to dashboard (always renders)
     await page.goto(GHL_DASHBOARD_V2, wait_until="domcontentloaded", timeout=20000)
-    await wait_load(page)
+    await wait_load(page, deadline=deadline)
 
     renders, el, tl, txt = await page_renders(page)
     if not renders:
         log("NAV", "Dashboard didn't render, trying login...")
-        if not await auto_login(page):
+        if not await auto_login(page, deadline):
             return False
         await page.goto(GHL_DASHBOARD_V2, wait_until="domcontentloaded", timeout=20000)
-        await wait_load(page)
+        await wait_load(page, deadline=deadline)
 
     # Click Automation in sidebar
     try:
@@ -168,12 +173,12 @@ async def navigate_to_workflows(page):
         await auto_link.wait_for(state="visible", timeout=5000)
         await auto_link.click()
         log("NAV", "Clicked Automation sidebar link")
-        await wait_load(page)
+        await wait_load(page, deadline=deadline)
     except Exception as e:
         log("NAV", f"Could not click Automation: {e}")
         # Fallback: try v2 URL directly
         await page.goto(GHL_WORKFLOWS_V2, wait_until="domcontentloaded", timeout=20000)
-        await wait_load(page)
+        await wait_load(page, deadline=deadline)
 
     renders, el, tl, txt = await page_renders(page)
     if renders:
@@ -201,7 +206,7 @@ async def dismiss_all_popups(page):
                 log("POPUP", f"Found 'Got it' in frame {i} ({frame.url[:60]})")
                 await got_it.first.click(timeout=3000)
                 log("POPUP", "Clicked 'Got it'!")
-                await page.wait_for_timeout(1000)
+                await after_click(page)
                 return
         except Exception:
             pass
@@ -218,7 +223,7 @@ async def dismiss_all_popups(page):
     # From screenshot: "Got it" button is at approximately (763, 328) in viewport
     log("POPUP", "Trying coordinate click on 'Got it' button area...")
     await page.mouse.click(763, 328)
-    await page.wait_for_timeout(1000)
+    await after_click(page)
     
     # Check if popup is gone by looking for "Build using AI" button
     try:
@@ -232,28 +237,24 @@ async def dismiss_all_popups(page):
     # Try clicking the X button at (779, 216)
     log("POPUP", "Trying X button coordinate click...")
     await page.mouse.click(779, 216)
-    await page.wait_for_timeout(1000)
+    await after_click(page)
     
     await dismiss_modals(page)
 
 
-def get_workflow_frame(page):
-    """Get the iframe that contains the workflow UI."""
-    for frame in page.frames:
-        if "client-app-automation" in frame.url or "leadconnectorhq" in frame.url:
-            return frame
-    return None
+async def get_workflow_frame(page, deadline=None):
+    """Wait for the iframe that contains the workflow UI (and for its buttons to render)."""
+    return await frame_ready(page, WORKFLOW_FRAMES, "button", deadline)
 
 
-async def use_ai_builder(page):
+async def use_ai_builder(page, deadline=None):
     """Click 'Build using AI' and submit the IVR prompt."""
     log("AI_BUILD", "Dismissing popups first...")
     await dismiss_all_popups(page)
-    await page.wait_for_timeout(1000)
     await ss(page, "before-ai-build")
 
     # The workflow UI is inside an iframe — find it
-    wf = get_workflow_frame(page)
+    wf = await get_workflow_frame(page, deadline)
     if not wf:
         log("AI_BUILD", "Could not find workflow iframe!")
         log("FRAMES", str([f.url[:80] for f in page.frames]))
@@ -273,7 +274,7 @@ async def use_ai_builder(page):
         if count > 0:
             await ai_btn.first.click(timeout=5000)
             log("AI_BUILD", "Clicked 'Build using AI'")
-            await page.wait_for_timeout(3000)
+            await selector_ready(wf, 'textarea, div[contenteditable="true"], input[type="text"]', deadline)
             await ss(page, "ai-builder-opened")
         else:
             log("AI_BUILD", "No 'Build using AI' button found in iframe")
@@ -286,7 +287,7 @@ async def use_ai_builder(page):
     log("AI_BUILD", "Looking for prompt input...")
     
     # Re-check frames — AI builder might open in a new frame
-    await page.wait_for_timeout(2000)
+    await after_click(page)
     prompt_input = None
     search_targets = [wf, page]  # Search iframe first, then main page
     
@@ -334,7 +335,7 @@ async def use_ai_builder(page):
     log("AI_BUILD", "Typing IVR prompt...")
     await prompt_input.click()
     await prompt_input.fill(IVR_PROMPT)
-    await page.wait_for_timeout(1000)
+    await dom_quiet(wf, deadline, quiet_ms=200, cap_ms=2000)  # submit enables once the prompt is in
     await ss(page, "prompt-filled")
 
     # Find and click the submit arrow button inside the iframe
@@ -400,7 +401,7 @@ async def use_ai_builder(page):
             """)
             log("AI_BUILD", f"JS click result: {result}")
             build_clicked = True
-            await page.wait_for_timeout(3000)
+            await after_click(page)
             await ss(page, "after-submit-click")
         else:
             # Fallback: try clicking all small SVG buttons via JS
@@ -424,19 +425,23 @@ async def use_ai_builder(page):
             log("AI_BUILD", f"Clicked buttons: {result}")
             if result:
                 build_clicked = True
-            await page.wait_for_timeout(3000)
+            await after_click(page)
             await ss(page, "after-fallback-click")
 
         if not build_clicked:
             log("AI_BUILD", "Could not find submit button")
             return False
 
-        # Wait for AI to generate the workflow
-        log("AI_BUILD", "Waiting for AI to generate workflow (up to 60s)...")
-        for i in range(12):
-            await page.wait_for_timeout(5000)
-            await ss(page, f"ai-generating-{i}")
-            log("AI_BUILD", f"  Generating... ({(i+1)*5}s)")
+        # Wait for AI to generate the workflow: the generation request has
+        # returned and the builder canvas has stopped changing
+        log("AI_BUILD", f"Waiting for AI to generate workflow (up to {AI_BUILD_CAP_MS // 1000}s)...")
+        started = time.time()
+        idle, drawn = await asyncio.gather(
+            network_idle(page, deadline, quiet_ms=AI_BUILD_QUIET_MS, cap_ms=AI_BUILD_CAP_MS,
+                         long_poll_ms=AI_BUILD_CAP_MS),
+            dom_quiet(wf, deadline, quiet_ms=AI_BUILD_QUIET_MS, cap_ms=AI_BUILD_CAP_MS))
+        log("AI_BUILD", f"  Generation settled after {time.time() - started:.1f}s"
+                        f"{'' if idle and drawn else ' (timed out — check the screenshot)'}")
 
         await ss(page, "ai-build-result")
         log("AI_BUILD", "AI Builder finished")
@@ -483,16 +488,24 @@ async def main():
     browser = await pw.chromium.connect_over_cdp(f"http://127.0.0.1:{DEBUG_PORT}")
     context = browser.contexts[0]
     page = await context.new_page()
+    watch(page)
     log("START", "Connected to Chrome via CDP")
+    deadline = Deadline(RUN_DEADLINE)
+    timer = StepTimer("ivr-ai-build")
 
     try:
         # Step 1: Navigate to Workflows
-        if not await navigate_to_workflows(page):
+        async with timer.step("open workflows"):
+            opened = await navigate_to_workflows(page, deadline)
+        if not opened:
+            print("\n" + timer.save())
             print("\n  Could not access Workflows page. Exiting.")
             return
 
         # Step 2: Use AI Builder to create IVR workflow
-        success = await use_ai_builder(page)
+        async with timer.step("ai builder"):
+            success = await use_ai_builder(page, deadline)
+        print("\n" + timer.save())
 
         if success:
             print("\n" + "=" * 60)
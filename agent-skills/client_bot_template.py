@@ -14,6 +14,7 @@ USAGE:
 import os
 import sys
 import json
+import asyncio
 import logging
 import requests
 from pathlib import Path
@@ -26,6 +27,9 @@ from telegram.ext import (
 )
 from telegram.constants import ParseMode, ChatAction
 
+from response_cache import ResponseCache
+from llm_quota import QUOTA, estimate_tokens
+
 BASE_DIR = Path(__file__).parent.parent
 AGENT_DIR = Path(__file__).parent
 CONFIG_DIR = BASE_DIR / "client-configs"
@@ -78,8 +82,9 @@ class ClientConfig:
         # Notifications
         self.notifications = self.data.get("notifications", {})
 
-        # AI fallback
+        # AI fallback + FAQ answer cache ("cache": {"threshold", "ttl", "max_entries"})
         self.ai_fallback = self.data.get("ai_fallback", {})
+        self.answer_cache = ResponseCache(**self.ai_fallback.get("cache", {}))
 
         # Voice
         self.voice = self.data.get("voice", {})
@@ -146,12 +151,15 @@ def notify_owner(config, text):
 # AI RESPONSE (Groq free tier)
 # ============================================================
 def ai_answer(config, question):
-    """Get AI response using Groq (free)."""
+    """Get AI response using Groq (free). Blocks (quota wait + HTTP) — call it via asyncio.to_thread."""
     groq_key = os.environ.get("GROQ_API_KEY", "")
     if not groq_key or not config.ai_fallback.get("enabled"):
         return None
 
     system = config.ai_fallback.get("system_prompt", f"You are a helpful assistant for {config.name}.")
+    cached = config.answer_cache.get(config.bot_username, system, question)
+    if cached is not None:
+        return cached
 
     # Include FAQs as context
     faq_context = ""
@@ -160,23 +168,35 @@ def ai_answer(config, question):
             f"Q: {f['q']}\nA: {f['a']}" for f in config.faqs
         )
 
+    messages = [
+        {"role": "system", "content": system + faq_context},
+        {"role": "user", "content": question},
+    ]
+    est = estimate_tokens(messages, max_tokens=500)
+    if not QUOTA.acquire("groq", tokens=est, priority="interactive", timeout=5):
+        logger.warning("Groq free-tier quota exhausted")
+        return None
+
     try:
         r = requests.post(
             "https://api.groq.com/openai/v1/chat/completions",
             headers={"Authorization": f"Bearer {groq_key}", "Content-Type": "application/json"},
             json={
                 "model": "llama-3.1-70b-versatile",
-                "messages": [
-                    {"role": "system", "content": system + faq_context},
-                    {"role": "user", "content": question},
-                ],
+                "messages": messages,
                 "max_tokens": 500,
                 "temperature": 0.7,
             },
             timeout=15,
         )
+        if r.status_code == 429:
+            QUOTA.backoff("groq", float(r.headers.get("Retry-After") or 30))
         if r.ok:
-            return r.json()["choices"][0]["message"]["content"].strip()
+            data = r.json()
+            QUOTA.settle("groq", est, data.get("usage", {}).get("total_tokens"))
+            answer = data["choices"][0]["message"]["content"].strip()
+            config.answer_cache.put(config.bot_username, system, question, answer)
+            return answer
     except Exception as e:
         logger.error(f"AI error: {e}")
     return None
@@ -323,7 +343,7 @@ def create_bot(config: ClientConfig):
 
         # AI fallback
         await update.effective_chat.send_action(ChatAction.TYPING)
-        answer = ai_answer(config, text)
+        answer = await asyncio.to_thread(ai_answer, config, text)
         if answer:
             keyboard = [[InlineKeyboardButton("🏠 Menu", callback_data="start")]]
             await safe_reply(update, answer, reply_markup=InlineKeyboardMarkup(keyboard))
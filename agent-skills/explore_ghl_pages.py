@@ -8,6 +8,8 @@ import time
 from pathlib import Path
 from playwright.async_api import async_playwright
 
+from request_router import RequestRouter
+
 AGENT_DIR = Path(__file__).parent
 LOG_DIR = AGENT_DIR / "logs"
 LOG_DIR.mkdir(parents=True, exist_ok=True)
@@ -129,6 +131,9 @@ async def main():
     browser = await pw.chromium.connect_over_cdp("http://127.0.0.1:9222")
     context = browser.contexts[0]
     page = await context.new_page()
+    # Text, element counts and screenshots only — no video, audio or trackers.
+    # Routed on this tab, not the context, so the rest of the user's Chrome is untouched.
+    router = await RequestRouter("no-media").attach(page)
 
     print("=" * 60)
     print("  GHL Page Explorer")
@@ -139,6 +144,10 @@ async def main():
 
     print("\n" + "=" * 60)
     print("  Done. Browser stays open.")
+    s = router.stats()
+    print(f"  Requests blocked: {s['blocked_type'] + s['blocked_tracker']}, "
+          f"assets from local store: {s['store_fresh'] + s['store_revalidated']} "
+          f"({s['bytes_from_store'] / 1024:.0f} KB not downloaded)")
     print("=" * 60)
 
     await browser.close()
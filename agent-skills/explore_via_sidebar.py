@@ -14,6 +14,8 @@ import socket
 from pathlib import Path
 from playwright.async_api import async_playwright
 
+from request_router import RequestRouter
+
 LOG_DIR = Path(__file__).parent / "logs"
 LOG_DIR.mkdir(parents=True, exist_ok=True)
 
@@ -112,6 +114,7 @@ async def main():
     browser = await pw.chromium.connect_over_cdp(f"http://127.0.0.1:{DEBUG_PORT}")
     context = browser.contexts[0]
     page = await context.new_page()
+    router = await RequestRouter("no-media").attach(page)  # this tab only
 
     print("=" * 60)
     print("  GHL Sidebar Navigation Explorer")
@@ -181,6 +184,10 @@ async def main():
 
     print("\n" + "=" * 60)
     print("  Exploration complete.")
+    s = router.stats()
+    print(f"  Requests blocked: {s['blocked_type'] + s['blocked_tracker']}, "
+          f"assets from local store: {s['store_fresh'] + s['store_revalidated']} "
+          f"({s['bytes_from_store'] / 1024:.0f} KB not downloaded)")
     print("=" * 60)
 
     await browser.close()
@@ -12,7 +12,6 @@ Uses Playwright with persistent browser contexts so logins survive between runs.
 All agents share brain.json as the single source of truth.
 """
 
-import json
 import os
 import sys
 import time
@@ -21,6 +20,14 @@ from datetime import datetime
 from pathlib import Path
 from dotenv import load_dotenv, set_key
 
+from state_store import JsonStore, EnvFile
+from page_ready import watch, settle, after_click
+
+# Caps for settling on third-party consoles (never quiet for long): no more
+# than the fixed sleeps they replaced
+NAV_SETTLE_MS = 1000
+CLICK_SETTLE_MS = 500
+
 # ============================================================
 # PATHS
 # ============================================================
@@ -43,35 +50,55 @@ load_dotenv(ENV_FILE)
 # SHARED BRAIN — read/write the central config
 # ============================================================
 class Brain:
-    """Single source of truth for all agent state."""
+    """Single source of truth for all agent state.
+
+    Several agents share brain.json, so every write is a locked, atomic
+    read-modify-write of just the keys being changed (see state_store.py),
+    and reads are cached until the file changes on disk.
+    """
 
     def __init__(self, path=BRAIN_FILE):
         self.path = Path(path)
-        self.data = self._load()
+        self.store = JsonStore(self.path, default={"services": {}, "browser_profiles": {}, "_meta": {}})
+
+    @property
+    def data(self):
+        return self.store.read()
 
-    def _load(self):
-        if self.path.exists():
-            with open(self.path, "r") as f:
-                return json.load(f)
-        return {"services": {}, "browser_profiles": {}, "_meta": {}}
+    @staticmethod
+    def _stamp(data):
+        meta = data.setdefault("_meta", {})
+        meta["updated"] = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+        meta["updated_by"] = "exposure_agent"
+
+    def update(self, fn):
+        """Apply fn(data) to the latest brain.json under lock and save it."""
+        def apply(data):
+            fn(data)
+            self._stamp(data)
+        return self.store.update(apply)
 
     def save(self):
-        self.data["_meta"]["updated"] = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-        self.data["_meta"]["updated_by"] = "exposure_agent"
-        with open(self.path, "w") as f:
-            json.dump(self.data, f, indent=4)
+        """Write the whole in-memory document (prefer update() for concurrent safety)."""
+        data = self.data
+        self._stamp(data)
+        self.store.replace(data)
 
     def get_service(self, name):
         return self.data.get("services", {}).get(name, None)
 
     def set_service_status(self, name, status):
-        if name in self.data.get("services", {}):
-            self.data["services"][name]["status"] = status
-            self.save()
+        def apply(data):
+            if name in data.get("services", {}):
+                data["services"][name]["status"] = status
+        self.update(apply)
+
+    def compare_and_set_status(self, name, expected, status):
+        """Change a service's status only if it is still `expected` (e.g. claim a signup). Returns True if changed."""
+        return self.store.compare_and_swap(f"services.{name}.status", expected, status)
 
     def add_service(self, name, config):
-        self.data.setdefault("services", {})[name] = config
-        self.save()
+        self.update(lambda data: data.setdefault("services", {}).__setitem__(name, config))
 
     def get_services_needing_signup(self):
         return {
@@ -104,43 +131,36 @@ class AgentLogger:
 class EnvManager:
     def __init__(self, env_path=ENV_FILE):
         self.env_path = str(env_path)
+        self.env = EnvFile(env_path)
+        self._loaded_sig = None
+
+    def _refresh(self):
+        """Re-export .env into os.environ only when the file changed (another agent may have added a key)."""
+        values = self.env.read()
+        if self.env.signature != self._loaded_sig:
+            os.environ.update(values)
+            self._loaded_sig = self.env.signature
 
     def get(self, key):
-        load_dotenv(self.env_path, override=True)
+        self._refresh()
         return os.getenv(key)
 
     def set(self, key, value):
         # Write directly to avoid python-dotenv wrapping values in quotes
-        lines = []
-        found = False
-        with open(self.env_path, "r") as f:
-            for line in f:
-                if line.strip().startswith(f"{key}="):
-                    lines.append(f"{key}={value}\n")
-                    found = True
-                else:
-                    lines.append(line)
-        if not found:
-            lines.append(f"{key}={value}\n")
-        with open(self.env_path, "w") as f:
-            f.writelines(lines)
+        self.env.set(key, value)
         os.environ[key] = value
 
     def has(self, key):
-        load_dotenv(self.env_path, override=True)
+        self._refresh()
         val = os.getenv(key)
         return val is not None and val != "" and not val.startswith("paste-your")
 
     def list_keys(self):
-        load_dotenv(self.env_path, override=True)
-        keys = {}
-        with open(self.env_path, "r") as f:
-            for line in f:
-                line = line.strip()
-                if line and not line.startswith("#") and "=" in line:
-                    k, v = line.split("=", 1)
-                    keys[k.strip()] = "SET" if v.strip() and not v.strip().startswith("paste-your") else "MISSING"
-        return keys
+        self._refresh()
+        return {
+            k: "SET" if v and not v.startswith("paste-your") else "MISSING"
+            for k, v in self.env.read().items()
+        }
 
 
 # ============================================================
@@ -179,13 +199,14 @@ class BrowserAgent:
             self.page = self.context.pages[0]
         else:
             self.page = await self.context.new_page()
+        watch(self.page)
         self.logger.log("BROWSER_START", f"Profile: {self.profile_name}, Headless: {self.headless}")
         return self
 
     async def goto(self, url, wait_until="domcontentloaded"):
         self.logger.log("NAVIGATE", url)
         await self.page.goto(url, wait_until=wait_until, timeout=30000)
-        await self.page.wait_for_timeout(1000)
+        await settle(self.page, cap_ms=NAV_SETTLE_MS)
         return self.page
 
     async def screenshot(self, name="screenshot"):
@@ -200,7 +221,7 @@ class BrowserAgent:
     async def click(self, selector, timeout=5000):
         self.logger.log("CLICK", selector)
         await self.page.click(selector, timeout=timeout)
-        await self.page.wait_for_timeout(500)
+        await after_click(self.page, cap_ms=CLICK_SETTLE_MS)
 
     async def fill(self, selector, value, timeout=5000):
         self.logger.log("FILL", f"{selector} = [REDACTED]")
@@ -229,7 +250,7 @@ class GroqExtractor:
     @staticmethod
     async def check_login(agent):
         await agent.goto("https://console.groq.com/keys")
-        await agent.page.wait_for_timeout(3000)
+        await settle(agent.page, quiet_ms=1000, cap_ms=3000)  # SPA login redirects land after the first idle
         text = await agent.get_text()
         # If we see "Create an account" or "Continue with Google", we're on the login page
         if "Create an account" in text or "Continue with Google" in text:
@@ -240,7 +261,7 @@ class GroqExtractor:
     async def extract_key(agent):
         """If already logged in, try to create and extract a key."""
         await agent.goto("https://console.groq.com/keys")
-        await agent.page.wait_for_timeout(2000)
+        await settle(agent.page, quiet_ms=1000, cap_ms=2000)
         text = await agent.get_text()
         await agent.screenshot("groq-keys-page")
         return text
@@ -252,14 +273,14 @@ class OpenRouterExtractor:
     @staticmethod
     async def check_login(agent):
         await agent.goto("https://openrouter.ai/settings/keys")
-        await agent.page.wait_for_timeout(2000)
+        await settle(agent.page, quiet_ms=1000, cap_ms=2000)
         url = await agent.get_url()
         return "settings" in url and "auth" not in url
 
     @staticmethod
     async def extract_key(agent):
         await agent.goto("https://openrouter.ai/settings/keys")
-        await agent.page.wait_for_timeout(2000)
+        await settle(agent.page, quiet_ms=1000, cap_ms=2000)
         text = await agent.get_text()
         await agent.screenshot("openrouter-keys-page")
         return text
@@ -271,14 +292,14 @@ class GoogleAIExtractor:
     @staticmethod
     async def check_login(agent):
         await agent.goto("https://aistudio.google.com/apikey")
-        await agent.page.wait_for_timeout(3000)
+        await settle(agent.page, quiet_ms=1000, cap_ms=3000)
         url = await agent.get_url()
         return "apikey" in url
 
     @staticmethod
     async def extract_key(agent):
         await agent.goto("https://aistudio.google.com/apikey")
-        await agent.page.wait_for_timeout(3000)
+        await settle(agent.page, quiet_ms=1000, cap_ms=3000)
         text = await agent.get_text()
         await agent.screenshot("google-ai-keys-page")
         return text
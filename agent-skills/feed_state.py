@@ -0,0 +1,129 @@
+"""
+Feed State — "New since last run" tracking for RSS and post feeds
+==================================================================
+The GHL changelog and Reddit hot lists mostly repeat from one check to the
+next. FeedState remembers every item it has handed out, per feed, keyed by
+GUID (or link), with a content hash and first/last-seen timestamps, so
+callers only pass new or edited items on to Telegram, the knowledge base
+and the LLM.
+
+Feed names are per consumer ("telegram:ghl-changelog",
+"research:ghl-changelog"), so the bot and the daily research cycle each
+get their own idea of what is new.
+
+parse_rss() walks the XML with iterparse and stops after `limit` items,
+clearing each <item> once read, instead of splitting and regex-scanning
+the whole document.
+
+Usage:
+    from feed_state import FEED_STATE, parse_rss
+    entries = parse_rss(r.content, limit=20)
+    fresh = FEED_STATE.diff("telegram:ghl-changelog", entries)   # each has status "new" | "changed"
+"""
+
+import io
+import re
+import copy
+import time
+import hashlib
+import xml.etree.ElementTree as ET
+from pathlib import Path
+
+from state_store import JsonStore
+
+FEED_STATE_FILE = Path(__file__).parent / "feed-state.json"
+FORGET_AFTER = 90 * 86400  # drop items not seen in the feed for this long
+
+
+def _local(tag):
+    """'{http://purl.org/dc/elements/1.1/}creator' → 'creator'."""
+    return tag.rsplit("}", 1)[-1]
+
+
+def parse_rss(content, limit=None, description_chars=500):
+    """Stream <item>/<entry> elements out of an RSS or Atom document.
+
+    Returns [{guid, title, link, description, date, source}]. Stops reading
+    once `limit` items have been collected.
+    """
+    items = []
+    try:
+        for _, elem in ET.iterparse(io.BytesIO(content), events=("end",)):
+            if _local(elem.tag) not in ("item", "entry"):
+                continue
+            fields = {}
+            for child in elem:
+                name = _local(child.tag)
+                if name == "link" and not (child.text or "").strip():
+                    fields.setdefault("link", child.get("href", ""))  # Atom
+                else:
+                    fields.setdefault(name, (child.text or "").strip())
+            description = fields.get("description") or fields.get("summary") or fields.get("content", "")
+            item = {
+                "title": fields.get("title", "Unknown"),
+                "link": fields.get("link", ""),
+                "description": re.sub(r"<[^>]+>", "", description).strip()[:description_chars],
+                "date": fields.get("pubDate") or fields.get("published") or fields.get("updated", ""),
+                "source": fields.get("source", ""),
+            }
+            item["guid"] = fields.get("guid") or fields.get("id") or item["link"] or \
+                hashlib.sha1(f"{item['title']}|{item['date']}".encode()).hexdigest()
+            items.append(item)
+            elem.clear()
+            if limit and len(items) >= limit:
+                break
+    except ET.ParseError:
+        pass  # truncated or malformed feed — keep what was read
+    return items
+
+
+def fingerprint(item, fields=("title", "description")):
+    return hashlib.sha1("\x1f".join(str(item.get(f, "")) for f in fields).encode()).hexdigest()[:16]
+
+
+class FeedState:
+    def __init__(self, path=FEED_STATE_FILE):
+        self.store = JsonStore(path, default={}, indent=1)
+
+    def diff(self, feed, items, key="guid", fields=("title", "description"), commit=True, max_new=None):
+        """Return the items in `items` that are new or changed since the last diff of `feed`.
+
+        Each returned item gets status "new" or "changed" and its first_seen
+        time. With commit=False the state is left untouched (a preview).
+        With max_new, only the first max_new fresh items are returned and
+        marked seen; the rest stay fresh for the next diff.
+        """
+        fresh = []
+
+        def apply(state):
+            now = time.time()
+            seen = state.setdefault(feed, {})
+            for item in items:
+                k = item.get(key) or item.get("link") or item.get("url")
+                if not k:
+                    continue
+                h = fingerprint(item, fields)
+                prev = seen.get(k)
+                if prev is None or prev["hash"] != h:
+                    if max_new is not None and len(fresh) >= max_new:
+                        continue
+                    fresh.append(dict(item, status="new" if prev is None else "changed",
+                                      first_seen=prev["first_seen"] if prev else now))
+                seen[k] = {"hash": h, "first_seen": prev["first_seen"] if prev else now, "last_seen": now}
+            for k in [k for k, v in seen.items() if now - v["last_seen"] > FORGET_AFTER]:
+                del seen[k]
+
+        if commit:
+            self.store.update(apply)
+        else:
+            apply(copy.deepcopy(self.store.read()))
+        return fresh
+
+    def tracked(self, feed):
+        return len(self.store.read().get(feed, {}))
+
+    def reset(self, feed=None):
+        self.store.update(lambda state: state.clear() if feed is None else state.pop(feed, None))
+
+
+FEED_STATE = FeedState()
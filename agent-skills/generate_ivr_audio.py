@@ -1,13 +1,22 @@
 """
 Generate IVR greeting audio using Lee's ElevenLabs voice clone.
 Creates all the audio files needed for the DDWL phone system.
+
+Re-runs only synthesize prompts that are new, changed or missing
+(tracked in Media/ivr-audio/manifest.json — see tts_batch.py).
+
+    python generate_ivr_audio.py              # plan, estimate, confirm, generate
+    python generate_ivr_audio.py --dry-run    # plan and cost estimate only
+    python generate_ivr_audio.py --force      # new takes of every file, bypassing the TTS cache
 """
 
 import os
-import requests
+import sys
 from pathlib import Path
 from dotenv import load_dotenv
 
+from tts_batch import TTSBatch
+
 load_dotenv(Path(__file__).parent.parent / '.env')
 
 API_KEY = os.getenv("ELEVENLABS_API_KEY")
@@ -15,6 +24,14 @@ LEE_VOICE_ID = os.getenv("LEE_VOICE_ID", "6HrHqiq7ijVOY0eVOKhz")
 OUTPUT_DIR = Path(__file__).parent.parent / "Media" / "ivr-audio"
 OUTPUT_DIR.mkdir(parents=True, exist_ok=True)
 
+MODEL_ID = "eleven_monolingual_v1"
+VOICE_SETTINGS = {
+    "stability": 0.75,
+    "similarity_boost": 0.85,
+    "style": 0.0,
+    "use_speaker_boost": True,
+}
+
 # All IVR scripts
 SCRIPTS = {
     "01-main-greeting": (
@@ -110,41 +127,29 @@ SCRIPTS = {
 }
 
 
-def generate_audio(name, text):
-    """Generate audio using ElevenLabs API."""
-    url = f"https://api.elevenlabs.io/v1/text-to-speech/{LEE_VOICE_ID}"
-    headers = {
-        "xi-api-key": API_KEY,
-        "Content-Type": "application/json",
-    }
-    data = {
-        "text": text,
-        "model_id": "eleven_monolingual_v1",
-        "voice_settings": {
-            "stability": 0.75,
-            "similarity_boost": 0.85,
-            "style": 0.0,
-            "use_speaker_boost": True,
-        }
-    }
+BATCH = TTSBatch(OUTPUT_DIR, LEE_VOICE_ID, MODEL_ID, VOICE_SETTINGS, api_key=API_KEY)
 
+
+def report(name, speech, error):
+    if error:
+        print(f"    ✗ {name}: {error}")
+        return
+    size_kb = (OUTPUT_DIR / f"{name}.mp3").stat().st_size / 1024
+    print(f"    ✓ {name}.mp3 ({size_kb:.1f} KB){' — from cache' if speech.cached else ''}")
+
+
+def generate_audio(name, text):
+    """(Re)generate one prompt, keeping the batch manifest in step."""
     print(f"  Generating: {name}...")
     print(f"    Text: {text[:80]}...")
-    r = requests.post(url, headers=headers, json=data, timeout=30)
-
-    if r.status_code == 200:
-        filepath = OUTPUT_DIR / f"{name}.mp3"
-        with open(filepath, "wb") as f:
-            f.write(r.content)
-        size_kb = len(r.content) / 1024
-        print(f"    ✓ Saved: {filepath.name} ({size_kb:.1f} KB)")
-        return True
-    else:
-        print(f"    ✗ Error {r.status_code}: {r.text[:200]}")
-        return False
+    result = BATCH.run({name: text}, {name: "forced"}, on_done=report)
+    return not result["failed"]
 
 
 def main():
+    dry_run = "--dry-run" in sys.argv
+    force = "--force" in sys.argv
+
     print("\n" + "=" * 60)
     print("  DDWL IVR Audio Generator — Lee's Voice")
     print("=" * 60)
@@ -153,28 +158,35 @@ def main():
     print(f"  Scripts: {len(SCRIPTS)} audio files")
     print()
 
-    # Calculate total characters (ElevenLabs charges per character)
-    total_chars = sum(len(t) for t in SCRIPTS.values())
-    est_cost = total_chars * 0.00003  # ~$0.30 per 10K chars
-    print(f"  Total characters: {total_chars:,}")
-    print(f"  Estimated cost: ${est_cost:.2f}")
+    # Only new / changed / missing prompts are synthesized (see manifest.json)
+    plan = BATCH.plan(SCRIPTS, force=force)
+    if not plan:
+        print("  All audio files are up to date.\n")
+        return
+    for name, reason in plan.items():
+        print(f"    {name:<26} {reason}")
+    cost = BATCH.estimate(SCRIPTS, plan)
+    print(f"\n  To generate: {cost['prompts']} of {len(SCRIPTS)} files, {cost['chars']:,} characters")
+    print(f"  Already in TTS cache: {cost['cached_chars']:,} characters")
+    print(f"  Estimated cost: ${cost['usd']:.2f} ({cost['billed_chars']:,} characters billed)")
     print()
+    if dry_run:
+        return
 
-    confirm = input("  Generate all audio files? (y/n): ").strip().lower()
+    confirm = input("  Generate these audio files? (y/n): ").strip().lower()
     if confirm != "y":
         print("  Cancelled.")
         return
 
-    success = 0
-    failed = 0
-    for name, text in SCRIPTS.items():
-        if generate_audio(name, text):
-            success += 1
-        else:
-            failed += 1
+    print(f"\n  Synthesizing with {BATCH.workers} workers...")
+    result = BATCH.run(SCRIPTS, plan, on_done=report)
 
     print(f"\n  {'=' * 56}")
-    print(f"  Done! {success} generated, {failed} failed")
+    print(f"  Done in {result['seconds']}s! {result['generated']} generated "
+          f"({result['cached']} from cache, {result['billed_chars']:,} characters billed), "
+          f"{len(result['failed'])} failed")
+    if result["failed"]:
+        print("  Run again to retry just the failed files.")
     print(f"  Files saved to: {OUTPUT_DIR}")
     print(f"  {'=' * 56}\n")
 
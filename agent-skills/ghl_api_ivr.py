@@ -9,6 +9,8 @@ import os
 from pathlib import Path
 from dotenv import load_dotenv
 
+from ghl_cache import GHL_CACHE
+
 load_dotenv(Path(__file__).parent.parent / ".env")
 
 API_KEY = os.getenv("GHL_API_KEY")
@@ -21,13 +23,20 @@ HEADERS = {
 }
 
 
-def api_get(path, params=None):
-    r = requests.get(f"{BASE}{path}", headers=HEADERS, params=params or {})
+def _get(path, params):
+    r = requests.get(f"{BASE}{path}", headers=HEADERS, params=params)
     return r.status_code, r.json() if r.ok else r.text
 
 
+def api_get(path, params=None):
+    params = params or {}
+    return GHL_CACHE.get(path, params, lambda: _get(path, params), ok=lambda res: res[0] == 200)
+
+
 def api_post(path, data=None):
     r = requests.post(f"{BASE}{path}", headers=HEADERS, json=data or {})
+    if r.ok:
+        GHL_CACHE.invalidate(path)
     return r.status_code, r.json() if r.ok else r.text
 
 
@@ -0,0 +1,200 @@
+"""
+GHL Read Cache — TTL + stale-while-revalidate
+===============================================
+Shared by telegram_bot.ghl_get, ghl_doer.ghl_api and ghl_api_ivr.api_get.
+
+Workflows, pipelines, calendars, tags and custom fields change a few times a
+day at most, so repeat reads are served from memory. Once an entry passes its
+TTL it is still served (stale) while one background refresh runs, until the
+stale window runs out. Writes call invalidate() so the next read is fresh.
+
+Usage:
+    from ghl_cache import GHL_CACHE
+    data = GHL_CACHE.get("/workflows/", params, lambda: fetch(...))          # sync
+    data = await GHL_CACHE.aget("/workflows/", params, lambda: afetch(...))  # async
+    GHL_CACHE.invalidate("/contacts/")
+    GHL_CACHE.stats()
+"""
+
+import re
+import json
+import time
+import asyncio
+import threading
+
+# (endpoint regex, ttl seconds, stale window seconds) — first match wins.
+# Anything not listed (conversations, opportunity search, single contacts
+# /contacts/{id}...) is never cached. Only the contact list — including its
+# ?query= search — is, briefly; any contact write invalidates it.
+TTL_RULES = [
+    ("/customFields", 3600, 6 * 3600),
+    ("/tags", 1800, 6 * 3600),
+    ("/opportunities/pipelines", 1800, 6 * 3600),
+    ("/calendars/", 1800, 6 * 3600),
+    ("/forms/", 1800, 6 * 3600),
+    ("/users/", 3600, 6 * 3600),
+    ("/workflows/", 300, 3600),
+    (r"^/contacts/?$", 60, 300),
+]
+
+
+def ttl_for(endpoint):
+    """Return (ttl, stale_window) for an endpoint, or (0, 0) if it shouldn't be cached."""
+    for pattern, ttl, stale in TTL_RULES:
+        if re.search(pattern, endpoint):
+            return ttl, stale
+    return 0, 0
+
+
+def _resource(endpoint):
+    """'/contacts/abc' → '/contacts' — writes invalidate the whole resource."""
+    return "/" + endpoint.strip("/").split("/")[0]
+
+
+def _default_ok(value):
+    return not (isinstance(value, dict) and "error" in value)
+
+
+class GHLCache:
+    def __init__(self):
+        self._entries = {}  # key → (stored_at, endpoint, value)
+        self._refreshing = set()
+        self._tasks = set()
+        self._lock = threading.Lock()
+        self.counters = {"hits": 0, "stale_hits": 0, "misses": 0, "refreshes": 0, "invalidations": 0}
+
+    @staticmethod
+    def key(endpoint, params=None):
+        return endpoint + "?" + json.dumps(params or {}, sort_keys=True, default=str)
+
+    def _lookup(self, endpoint, params):
+        """Return (key, value, state) where state is 'fresh', 'stale', 'miss' or 'skip'."""
+        ttl, stale = ttl_for(endpoint)
+        k = self.key(endpoint, params)
+        if not ttl:
+            return k, None, "skip"
+        with self._lock:
+            entry = self._entries.get(k)
+        if entry is None:
+            return k, None, "miss"
+        age = time.time() - entry[0]
+        if age < ttl:
+            return k, entry[2], "fresh"
+        if age < ttl + stale:
+            return k, entry[2], "stale"
+        return k, None, "miss"
+
+    def _store(self, k, endpoint, value, ok):
+        if ok(value):
+            with self._lock:
+                self._entries[k] = (time.time(), endpoint, value)
+
+    def _count(self, name):
+        with self._lock:
+            self.counters[name] += 1
+
+    def _claim_refresh(self, k):
+        with self._lock:
+            if k in self._refreshing:
+                return False
+            self._refreshing.add(k)
+            self.counters["refreshes"] += 1
+            return True
+
+    def _release_refresh(self, k):
+        with self._lock:
+            self._refreshing.discard(k)
+
+    # ── sync callers (ghl_doer, ghl_api_ivr) ──
+    def get(self, endpoint, params, fetch, ok=_default_ok):
+        k, value, state = self._lookup(endpoint, params)
+        if state == "fresh":
+            self._count("hits")
+            return value
+        if state == "stale":
+            self._count("stale_hits")
+            if self._claim_refresh(k):
+                threading.Thread(target=self._refresh, args=(k, endpoint, fetch, ok), daemon=True).start()
+            return value
+        if state == "miss":
+            self._count("misses")
+        value = fetch()
+        self._store(k, endpoint, value, ok)
+        return value
+
+    def _refresh(self, k, endpoint, fetch, ok):
+        try:
+            self._store(k, endpoint, fetch(), ok)
+        except Exception:
+            pass
+        finally:
+            self._release_refresh(k)
+
+    # ── async callers (telegram_bot) ──
+    async def aget(self, endpoint, params, fetch, ok=_default_ok):
+        k, value, state = self._lookup(endpoint, params)
+        if state == "fresh":
+            self._count("hits")
+            return value
+        if state == "stale":
+            self._count("stale_hits")
+            if self._claim_refresh(k):
+                task = asyncio.create_task(self._arefresh(k, endpoint, fetch, ok))
+                self._tasks.add(task)
+                task.add_done_callback(self._tasks.discard)
+            return value
+        if state == "miss":
+            self._count("misses")
+        value = await fetch()
+        self._store(k, endpoint, value, ok)
+        return value
+
+    async def _arefresh(self, k, endpoint, fetch, ok):
+        try:
+            self._store(k, endpoint, await fetch(), ok)
+        except Exception:
+            pass
+        finally:
+            self._release_refresh(k)
+
+    def invalidate(self, endpoint=None):
+        """Drop cached reads for the endpoint's resource (e.g. '/contacts/'), or everything if None."""
+        with self._lock:
+            if endpoint is None:
+                dropped = len(self._entries)
+                self._entries.clear()
+            else:
+                prefix = _resource(endpoint)
+                stale = [k for k, (_, ep, _) in self._entries.items() if _resource(ep) == prefix]
+                for k in stale:
+                    del self._entries[k]
+                dropped = len(stale)
+            self.counters["invalidations"] += 1
+        return dropped
+
+    def stats(self):
+        with self._lock:
+            c = dict(self.counters)
+            c["entries"] = len(self._entries)
+        served = c["hits"] + c["stale_hits"]
+        total = served + c["misses"]
+        c["hit_rate"] = round(served / total, 3) if total else 0.0
+        return c
+
+
+GHL_CACHE = GHLCache()
+
+
+if __name__ == "__main__":
+    calls = []
+
+    def fake_fetch():
+        calls.append(time.time())
+        return {"workflows": [{"name": "IVR", "status": "published"}]}
+
+    for _ in range(5):
+        GHL_CACHE.get("/workflows/", {"locationId": "demo"}, fake_fetch)
+    GHL_CACHE.invalidate("/workflows/")
+    GHL_CACHE.get("/workflows/", {"locationId": "demo"}, fake_fetch)
+    print(f"  Upstream calls: {len(calls)} for 6 reads")
+    print(f"  Stats: {GHL_CACHE.stats()}")
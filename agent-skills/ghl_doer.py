@@ -30,6 +30,8 @@ import requests
 from pathlib import Path
 from datetime import datetime
 
+from ghl_cache import GHL_CACHE
+
 BASE_DIR = Path(__file__).parent.parent
 AGENT_DIR = Path(__file__).parent
 LOG_DIR = AGENT_DIR / "logs"
@@ -181,12 +183,22 @@ def classify_task(user_input):
 # 2. API EXECUTOR — Fast GHL API calls
 # ============================================================
 def ghl_api(method, endpoint, params=None, json_data=None):
-    """Make a GHL API call."""
-    url = f"{GHL_API_BASE}{endpoint}"
+    """Make a GHL API call. GETs go through the shared read cache; writes invalidate it."""
     if params is None:
         params = {}
     params.setdefault("locationId", GHL_LOCATION_ID)
 
+    if method == "GET":
+        return GHL_CACHE.get(endpoint, params, lambda: _ghl_request(method, endpoint, params, json_data))
+
+    result = _ghl_request(method, endpoint, params, json_data)
+    if "error" not in result:
+        GHL_CACHE.invalidate(endpoint)
+    return result
+
+
+def _ghl_request(method, endpoint, params, json_data):
+    url = f"{GHL_API_BASE}{endpoint}"
     try:
         if method == "GET":
             r = requests.get(url, headers=GHL_API_HEADERS, params=params, timeout=15)
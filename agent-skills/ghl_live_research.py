@@ -28,6 +28,18 @@ import requests
 from pathlib import Path
 from datetime import datetime
 
+from kb_index import KB_SEARCH
+from usage_tracker import ROUTER
+from http_cache import HTTP_CACHE
+from reddit_client import REDDIT
+from feed_state import FEED_STATE, parse_rss
+from llm_quota import QUOTA, estimate_tokens
+
+try:
+    from kb_vectors import KB_VECTORS
+except ImportError:  # numpy not installed — keyword search only
+    KB_VECTORS = None
+
 BASE_DIR = Path(__file__).parent.parent
 AGENT_DIR = Path(__file__).parent
 KB_DIR = AGENT_DIR / "ghl-knowledge"
@@ -64,36 +76,21 @@ def log(tag, msg):
 # ============================================================
 GHL_CHANGELOG_RSS = "https://ideas.gohighlevel.com/api/changelog/feed.rss"
 GHL_CHANGELOG_URL = "https://ideas.gohighlevel.com/changelog"
+CHANGELOG_TTL = 1800  # seconds before the feed is re-checked (conditional GET)
 
 
 def fetch_changelog():
     """Fetch latest GHL changelog entries via RSS."""
     log("CHANGELOG", "Fetching GHL changelog RSS...")
     try:
-        r = requests.get(GHL_CHANGELOG_RSS, timeout=15)
+        r = HTTP_CACHE.get(GHL_CHANGELOG_RSS, timeout=15, min_ttl=CHANGELOG_TTL)
         if not r.ok:
             log("CHANGELOG", f"RSS failed ({r.status_code}), trying web scrape...")
             return fetch_changelog_web()
 
-        # Parse RSS XML
-        content = r.text
-        entries = []
-        items = content.split("<item>")[1:]  # Skip header
-        for item in items[:20]:  # Last 20 entries
-            title = re.search(r"<title>(.*?)</title>", item)
-            link = re.search(r"<link>(.*?)</link>", item)
-            desc = re.search(r"<description>(.*?)</description>", item, re.DOTALL)
-            pub_date = re.search(r"<pubDate>(.*?)</pubDate>", item)
-
-            entry = {
-                "title": title.group(1) if title else "Unknown",
-                "link": link.group(1) if link else "",
-                "description": desc.group(1)[:500] if desc else "",
-                "date": pub_date.group(1) if pub_date else "",
-            }
-            # Clean HTML from description
-            entry["description"] = re.sub(r"<[^>]+>", "", entry["description"]).strip()
-            entries.append(entry)
+        entries = parse_rss(r.content, limit=20)  # Last 20 entries
+        for e in entries:
+            e.pop("source", None)
 
         log("CHANGELOG", f"Got {len(entries)} changelog entries")
         return entries
@@ -122,13 +119,27 @@ def fetch_changelog_web():
     return []
 
 
+def new_changelog_entries(consumer="research", max_new=None):
+    """Changelog entries this consumer hasn't seen yet (new or edited since its last check).
+    With max_new, only that many are returned — and marked seen."""
+    entries = fetch_changelog()
+    fresh = FEED_STATE.diff(f"{consumer}:ghl-changelog", entries, max_new=max_new)
+    log("CHANGELOG", f"{len(fresh)} new/changed of {len(entries)}")
+    return fresh
+
+
 def save_changelog(entries):
-    """Save changelog entries."""
+    """Add changelog entries to today's snapshot (merged by GUID, so re-runs don't duplicate)."""
     if not entries:
         return
 
     today = datetime.now().strftime("%Y%m%d")
     filepath = CHANGELOG_DIR / f"changelog-{today}.json"
+    if filepath.exists():
+        merged = {e.get("guid") or e.get("link") or e["title"]: e for e in json.loads(filepath.read_text())}
+        for e in entries:
+            merged[e.get("guid") or e.get("link") or e["title"]] = e
+        entries = list(merged.values())
     filepath.write_text(json.dumps(entries, indent=2))
 
     # Also save as readable markdown
@@ -151,99 +162,59 @@ def save_changelog(entries):
 # 2. REDDIT SCRAPER — Real user problems & solutions
 # ============================================================
 REDDIT_SUBREDDITS = ["gohighlevel", "HighLevel"]
+REDDIT_TTL = 300
 
 
 def search_reddit(query, subreddit="gohighlevel", limit=10):
     """Search Reddit for GHL discussions (no API key needed)."""
     log("REDDIT", f"Searching r/{subreddit}: {query}")
-    results = []
-
-    try:
-        url = f"https://www.reddit.com/r/{subreddit}/search.json"
-        params = {
-            "q": query,
-            "restrict_sr": "on",
-            "sort": "relevance",
-            "t": "year",
-            "limit": limit,
-        }
-        headers = {"User-Agent": "ExposureSolutions-GHL-Research/1.0"}
-        r = requests.get(url, params=params, headers=headers, timeout=15)
-
-        if r.ok:
-            data = r.json()
-            posts = data.get("data", {}).get("children", [])
-            for post in posts:
-                p = post.get("data", {})
-                results.append({
-                    "title": p.get("title", ""),
-                    "selftext": p.get("selftext", "")[:500],
-                    "score": p.get("score", 0),
-                    "num_comments": p.get("num_comments", 0),
-                    "url": f"https://reddit.com{p.get('permalink', '')}",
-                    "created": datetime.fromtimestamp(p.get("created_utc", 0)).strftime("%Y-%m-%d"),
-                    "subreddit": subreddit,
-                })
-            log("REDDIT", f"  Found {len(results)} posts")
-        else:
-            log("REDDIT", f"  HTTP {r.status_code}")
-    except Exception as e:
-        log("REDDIT", f"  Error: {str(e)[:100]}")
-
+    results = REDDIT.search(query, subreddit, limit, min_ttl=REDDIT_TTL)
+    log("REDDIT", f"  Found {len(results)} posts")
     return results
 
 
 def search_reddit_all(query, limit=10):
-    """Search all GHL subreddits."""
-    all_results = []
-    for sub in REDDIT_SUBREDDITS:
-        results = search_reddit(query, sub, limit)
-        all_results.extend(results)
-        time.sleep(1)  # Rate limit
-    # Sort by score
-    all_results.sort(key=lambda x: x.get("score", 0), reverse=True)
-    return all_results
+    """Search all GHL subreddits at once; deduped by post ID, highest score first."""
+    log("REDDIT", f"Searching {', '.join(f'r/{s}' for s in REDDIT_SUBREDDITS)}: {query}")
+    results = REDDIT.search_all(query, REDDIT_SUBREDDITS, limit, min_ttl=REDDIT_TTL)
+    log("REDDIT", f"  Found {len(results)} posts")
+    return results
 
 
 def get_reddit_hot(subreddit="gohighlevel", limit=15):
     """Get hot/trending posts from GHL subreddit."""
     log("REDDIT", f"Fetching hot posts from r/{subreddit}...")
-    try:
-        url = f"https://www.reddit.com/r/{subreddit}/hot.json"
-        headers = {"User-Agent": "ExposureSolutions-GHL-Research/1.0"}
-        r = requests.get(url, params={"limit": limit}, headers=headers, timeout=15)
+    results = REDDIT.hot(subreddit, limit, min_ttl=REDDIT_TTL)
+    log("REDDIT", f"  Got {len(results)} hot posts")
+    return results
 
-        if r.ok:
-            posts = r.json().get("data", {}).get("children", [])
-            results = []
-            for post in posts:
-                p = post.get("data", {})
-                if p.get("stickied"):
-                    continue
-                results.append({
-                    "title": p.get("title", ""),
-                    "selftext": p.get("selftext", "")[:500],
-                    "score": p.get("score", 0),
-                    "num_comments": p.get("num_comments", 0),
-                    "url": f"https://reddit.com{p.get('permalink', '')}",
-                    "created": datetime.fromtimestamp(p.get("created_utc", 0)).strftime("%Y-%m-%d"),
-                })
-            log("REDDIT", f"  Got {len(results)} hot posts")
-            return results
-        else:
-            log("REDDIT", f"  HTTP {r.status_code}")
-    except Exception as e:
-        log("REDDIT", f"  Error: {str(e)[:100]}")
-    return []
+
+def _unseen_hot(consumer, subreddit, posts, max_new=None):
+    return FEED_STATE.diff(f"{consumer}:reddit-hot:{subreddit}", posts, key="url", fields=("title", "selftext"),
+                           max_new=max_new)
+
+
+def new_reddit_hot(subreddit="gohighlevel", limit=15, consumer="research", max_new=None):
+    """Hot posts this consumer hasn't seen yet (score changes don't count as new).
+    With max_new, only that many are returned — and marked seen."""
+    return _unseen_hot(consumer, subreddit, get_reddit_hot(subreddit, limit), max_new)
 
 
 # ============================================================
 # 3. MULTI-AI QUERY — Ask multiple AIs the same question
 # ============================================================
-def ask_groq(question, context=""):
-    """Ask Groq (Llama 70B, free)."""
+def ask_groq(question, context="", priority="normal"):
+    """Ask Groq (Llama 70B, free). priority is the llm_quota class for this call."""
     if not GROQ_KEY:
         return None
+    if not ROUTER.allow("groq"):
+        log("GROQ", "Skipped — circuit open after recent failures")
+        return None
+    est = estimate_tokens(f"{context}\n\nQuestion: {question}", max_tokens=2000)
+    if not QUOTA.acquire("groq", tokens=est, priority=priority, timeout=30):
+        log("GROQ", "Skipped — shared free-tier quota exhausted")
+        return None
+    start = time.time()
     try:
         r = requests.post(
             "https://api.groq.com/openai/v1/chat/completions",
@@ -264,17 +235,39 @@ def ask_groq(question, context=""):
             },
             timeout=30,
         )
-        if r.ok:
-            return r.json()["choices"][0]["message"]["content"]
-    except Exception as e:
+    except requests.RequestException as e:
+        ROUTER.record("groq", time.time() - start, "timeout" if isinstance(e, requests.Timeout) else "error")
         log("GROQ", f"Error: {str(e)[:100]}")
-    return None
+        return None
+    latency = time.time() - start
+    if not r.ok:
+        ROUTER.record("groq", latency, r.status_code, r.headers.get("Retry-After"))
+        if r.status_code == 429:
+            QUOTA.backoff("groq", float(r.headers.get("Retry-After") or 30))
+        return None
+    try:
+        data = r.json()
+        answer = data["choices"][0]["message"]["content"]
+    except (ValueError, KeyError, IndexError, TypeError) as e:
+        ROUTER.record("groq", latency, "error")
+        log("GROQ", f"Unreadable reply: {str(e)[:100]}")
+        return None
+    ROUTER.record("groq", latency, r.status_code)
+    QUOTA.settle("groq", est, data.get("usage", {}).get("total_tokens"))
+    return answer
 
 
-def ask_gemini(question, context=""):
+def ask_gemini(question, context="", priority="normal"):
     """Ask Google Gemini (free tier)."""
     if not GOOGLE_KEY:
         return None
+    if not ROUTER.allow("google"):
+        log("GEMINI", "Skipped — circuit open after recent failures")
+        return None
+    if not QUOTA.acquire("google", tokens=estimate_tokens(f"{context}\n\n{question}"), priority=priority, timeout=30):
+        log("GEMINI", "Skipped — shared free-tier quota exhausted")
+        return None
+    start = time.time()
     try:
         r = requests.post(
             f"https://generativelanguage.googleapis.com/v1beta/models/gemini-2.0-flash:generateContent?key={GOOGLE_KEY}",
@@ -289,41 +282,50 @@ def ask_gemini(question, context=""):
             },
             timeout=30,
         )
-        if r.ok:
-            data = r.json()
-            return data["candidates"][0]["content"]["parts"][0]["text"]
-    except Exception as e:
+    except requests.RequestException as e:
+        ROUTER.record("google", time.time() - start, "timeout" if isinstance(e, requests.Timeout) else "error")
         log("GEMINI", f"Error: {str(e)[:100]}")
-    return None
+        return None
+    latency = time.time() - start
+    if not r.ok:
+        ROUTER.record("google", latency, r.status_code, r.headers.get("Retry-After"))
+        if r.status_code == 429:
+            QUOTA.backoff("google", float(r.headers.get("Retry-After") or 30))
+        return None
+    try:
+        answer = r.json()["candidates"][0]["content"]["parts"][0]["text"]
+    except (ValueError, KeyError, IndexError, TypeError) as e:
+        ROUTER.record("google", latency, "error")
+        log("GEMINI", f"Unreadable reply: {str(e)[:100]}")
+        return None
+    ROUTER.record("google", latency, r.status_code)
+    return answer
 
 
-def multi_ai_ask(question):
-    """Ask multiple AIs and compare answers."""
+def multi_ai_ask(question, priority="normal"):
+    """Ask multiple AIs and compare answers (priority: llm_quota class, e.g. "batch" for research runs)."""
     log("MULTI_AI", f"Asking: {question[:80]}...")
 
-    # Gather context from our knowledge base
-    context = ""
-    summaries_dir = KB_DIR / "summaries"
-    if summaries_dir.exists():
-        for sf in list(summaries_dir.glob("*.md"))[:3]:
-            content = sf.read_text(encoding="utf-8")
-            if any(word in content.lower() for word in question.lower().split()):
-                context += content[:1000] + "\n\n"
+    # Gather context from our knowledge base: the few most similar chunks,
+    # falling back to keyword search when nothing clears the similarity bar
+    context = KB_VECTORS.context(question, k=4, max_chars=2000) if KB_VECTORS else ""
+    if not context:
+        context = KB_SEARCH.context(question, max_chars=2000)
+    if context:
+        log("MULTI_AI", f"  Context: {len(context)} chars from knowledge base")
 
     answers = {}
 
     # Groq (Llama 70B)
     log("MULTI_AI", "  Asking Groq (Llama 70B)...")
-    groq_answer = ask_groq(question, context)
+    groq_answer = ask_groq(question, context, priority)
     if groq_answer:
         answers["Groq (Llama 70B)"] = groq_answer
         log("MULTI_AI", f"  ✅ Groq: {len(groq_answer)} chars")
 
-    time.sleep(1)
-
     # Gemini
     log("MULTI_AI", "  Asking Gemini 2.0 Flash...")
-    gemini_answer = ask_gemini(question, context)
+    gemini_answer = ask_gemini(question, context, priority)
     if gemini_answer:
         answers["Gemini 2.0 Flash"] = gemini_answer
         log("MULTI_AI", f"  ✅ Gemini: {len(gemini_answer)} chars")
@@ -340,7 +342,8 @@ def multi_ai_ask(question):
             f"Two AI experts answered this GoHighLevel question: '{question}'\n\n"
             f"Their answers:\n{combined}\n\n"
             f"Synthesize the BEST answer combining both. Where they disagree, note both approaches. "
-            f"Focus on what's most current and actionable. Be specific with menu paths and steps."
+            f"Focus on what's most current and actionable. Be specific with menu paths and steps.",
+            priority=priority,
         )
         if synthesis:
             answers["Synthesized Best Answer"] = synthesis
@@ -385,28 +388,27 @@ def run_full_research():
     # 1. Changelog
     print("\n  📋 Phase 1: GHL Changelog")
     print("  " + "-" * 50)
-    entries = fetch_changelog()
+    entries = new_changelog_entries()
     save_changelog(entries)
     all_intel["changelog"] = entries
 
     # 2. Reddit hot posts
     print("\n  🔥 Phase 2: Reddit Hot Posts")
     print("  " + "-" * 50)
-    for sub in REDDIT_SUBREDDITS:
-        hot = get_reddit_hot(sub, limit=10)
-        all_intel["reddit_hot"].extend(hot)
-        time.sleep(2)
+    for sub, hot in REDDIT.hot_all(REDDIT_SUBREDDITS, limit=10, min_ttl=REDDIT_TTL).items():
+        all_intel["reddit_hot"].extend(_unseen_hot("research", sub, hot))
 
     # Save Reddit intel
     today = datetime.now().strftime("%Y%m%d")
-    reddit_file = REDDIT_DIR / f"reddit-hot-{today}.json"
-    reddit_file.write_text(json.dumps(all_intel["reddit_hot"], indent=2))
+    if all_intel["reddit_hot"]:
+        reddit_file = REDDIT_DIR / f"reddit-hot-{today}.json"
+        reddit_file.write_text(json.dumps(all_intel["reddit_hot"], indent=2))
 
     # 3. Multi-AI research on top 3 topics
     print("\n  🧠 Phase 3: Multi-AI Research")
     print("  " + "-" * 50)
     for topic in AUTO_RESEARCH_TOPICS[:3]:
-        answers = multi_ai_ask(topic)
+        answers = multi_ai_ask(topic, priority="batch")
         if answers:
             all_intel["ai_answers"][topic] = answers
             # Save individual answer
@@ -416,7 +418,6 @@ def run_full_research():
             for ai_name, answer in answers.items():
                 lines.append(f"\n## {ai_name}\n\n{answer}\n")
             answer_file.write_text("\n".join(lines), encoding="utf-8")
-        time.sleep(2)
 
     # Save full intel report
     intel_file = LIVE_DIR / f"intel-{today}.json"
@@ -425,17 +426,17 @@ def run_full_research():
     # Print summary
     print(f"\n{'='*60}")
     print(f"  ✅ Research Complete!")
-    print(f"  📋 Changelog entries: {len(all_intel['changelog'])}")
-    print(f"  🔥 Reddit hot posts: {len(all_intel['reddit_hot'])}")
+    print(f"  📋 New changelog entries: {len(all_intel['changelog'])}")
+    print(f"  🔥 New Reddit hot posts: {len(all_intel['reddit_hot'])}")
     print(f"  🧠 AI research topics: {len(all_intel['ai_answers'])}")
     print(f"  📁 Saved to: {LIVE_DIR}")
     print(f"{'='*60}")
 
     # Print latest changelog
     if entries:
-        print(f"\n  📋 Latest GHL Changes:")
+        print(f"\n  📋 New GHL Changes:")
         for e in entries[:5]:
-            print(f"    • {e['title']}")
+            print(f"    • {e['title']}" + (" (updated)" if e.get("status") == "changed" else ""))
 
     # Print top Reddit posts
     if all_intel["reddit_hot"]:
@@ -460,10 +461,12 @@ def main():
     cmd = sys.argv[1].lower()
 
     if cmd == "changelog":
-        entries = fetch_changelog()
+        entries = new_changelog_entries()
         save_changelog(entries)
-        if entries:
-            print(f"\n  📋 Latest {len(entries)} GHL Changes:\n")
+        if not entries:
+            print("\n  📋 No new GHL changes since the last check.")
+        else:
+            print(f"\n  📋 {len(entries)} New GHL Changes:\n")
             for e in entries:
                 print(f"  [{e.get('date', '')}] {e['title']}")
                 if e.get("description"):
@@ -485,13 +488,11 @@ def main():
             print(f"  No Reddit results for '{query}'")
 
     elif cmd == "hot":
-        for sub in REDDIT_SUBREDDITS:
-            posts = get_reddit_hot(sub)
+        for sub, posts in REDDIT.hot_all(REDDIT_SUBREDDITS, min_ttl=REDDIT_TTL).items():
             if posts:
                 print(f"\n  🔥 Hot on r/{sub}:\n")
                 for p in posts[:10]:
                     print(f"  [{p['score']}↑] {p['title'][:70]}")
-            time.sleep(1)
 
     elif cmd == "ask":
         question = " ".join(sys.argv[2:]) if len(sys.argv) > 2 else "How to set up Voice AI in GoHighLevel?"
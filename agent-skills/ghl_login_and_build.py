@@ -17,6 +17,8 @@ from pathlib import Path
 from dotenv import load_dotenv
 from playwright.async_api import async_playwright
 
+from page_ready import Deadline, StepTimer, watch, settle, dom_quiet
+
 load_dotenv(Path(__file__).parent.parent / ".env")
 
 AGENT_DIR = Path(__file__).parent
@@ -32,6 +34,7 @@ LILLY_PASS = os.getenv("GHL_PASSWORD", "")
 
 CHROME_EXE = r"C:\Program Files\Google\Chrome\Application\chrome.exe"
 DEBUG_PORT = 9222
+RUN_DEADLINE = 600  # seconds for all three approaches
 
 
 def log(tag, msg):
@@ -65,20 +68,16 @@ async def dismiss_modals(page):
         pass
     try:
         await page.keyboard.press("Escape")
-        await page.wait_for_timeout(300)
+        await dom_quiet(page, quiet_ms=200, cap_ms=1500)
     except Exception:
         pass
 
 
-async def wait_and_check(page, timeout=15000):
+async def wait_and_check(page, timeout=15000, deadline=None):
     """Wait for page load and return (element_count, text_length, body_text)."""
-    try:
-        await page.wait_for_load_state("networkidle", timeout=timeout)
-    except Exception:
-        pass
-    await page.wait_for_timeout(2000)
+    await settle(page, deadline, cap_ms=timeout)
     await dismiss_modals(page)
-    await page.wait_for_timeout(1000)
+    await dom_quiet(page, deadline, cap_ms=5000)
 
     el_count = await page.evaluate("document.querySelectorAll('*').length")
     try:
@@ -96,11 +95,11 @@ async def is_logged_in(page):
     return "/location/" in url and "login" not in url
 
 
-async def auto_login(page, email, password):
+async def auto_login(page, email, password, deadline=None):
     """Auto-login to GHL with given credentials."""
     log("LOGIN", f"Logging in as {email}...")
     await page.goto(GHL_LOGIN_URL, wait_until="domcontentloaded", timeout=30000)
-    await page.wait_for_timeout(3000)
+    await settle(page, deadline)  # a live session redirects straight to /location/
 
     # Check if already logged in
     if await is_logged_in(page):
@@ -111,12 +110,10 @@ async def auto_login(page, email, password):
         # Fill email
         email_input = page.locator('input[type="email"], input[name="email"], input[placeholder*="email" i]').first
         await email_input.fill(email, timeout=5000)
-        await page.wait_for_timeout(500)
 
         # Fill password
         pass_input = page.locator('input[type="password"], input[name="password"]').first
         await pass_input.fill(password, timeout=5000)
-        await page.wait_for_timeout(500)
 
         # Click sign in
         login_btn = page.locator('button[type="submit"], button:has-text("Sign"), button:has-text("Log")').first
@@ -124,7 +121,10 @@ async def auto_login(page, email, password):
         log("LOGIN", "Submitted login form")
 
         # Wait for redirect
-        await page.wait_for_timeout(8000)
+        try:
+            await page.wait_for_url(lambda url: "/location/" in url, timeout=deadline.ms(20000) if deadline else 20000)
+        except Exception:
+            pass
 
         if await is_logged_in(page):
             log("LOGIN", f"Logged in as {email}")
@@ -139,11 +139,11 @@ async def auto_login(page, email, password):
         return False
 
 
-async def check_page_renders(page, name, url):
+async def check_page_renders(page, name, url, deadline=None):
     """Navigate to a URL and check if it renders."""
     log("CHECK", f"{name}: {url}")
     await page.goto(url, wait_until="domcontentloaded", timeout=20000)
-    el_count, text_len, body_text = await wait_and_check(page)
+    el_count, text_len, body_text = await wait_and_check(page, deadline=deadline)
     renders = el_count > 150 and text_len > 50
     status = "RENDERS" if renders else "BLANK"
     log("STATUS", f"{name}: {status} (elements={el_count}, text={text_len})")
@@ -153,11 +153,11 @@ async def check_page_renders(page, name, url):
 # ============================================================
 # APPROACH 1: Click Phone System from Settings sidebar
 # ============================================================
-async def approach_1_click_from_settings(page):
+async def approach_1_click_from_settings(page, deadline=None):
     """Navigate to Settings (which renders) and click Phone System link."""
     log("APPROACH_1", "Clicking Phone System from Settings sidebar...")
 
-    renders, body_text = await check_page_renders(page, "Settings", f"{BASE}/settings")
+    renders, body_text = await check_page_renders(page, "Settings", f"{BASE}/settings", deadline)
     if not renders:
         log("APPROACH_1", "Settings page didn't render either!")
         return False
@@ -170,13 +170,12 @@ async def approach_1_click_from_settings(page):
         await phone_link.wait_for(state="visible", timeout=5000)
         await phone_link.click()
         log("APPROACH_1", "Clicked 'Phone System' link")
-        await page.wait_for_timeout(3000)
     except Exception as e:
         log("APPROACH_1", f"Could not click Phone System link: {e}")
         return False
 
     # Check if the phone system page rendered
-    el_count, text_len, body_text = await wait_and_check(page)
+    el_count, text_len, body_text = await wait_and_check(page, deadline=deadline)
     renders = el_count > 150 and text_len > 50
     await screenshot(page, "a1-phone-system")
 
@@ -193,15 +192,14 @@ async def approach_1_click_from_settings(page):
                 link = page.locator(f'a:has-text("{link_text}")').first
                 if await link.is_visible(timeout=2000):
                     await link.click()
-                    await page.wait_for_timeout(3000)
-                    el2, txt2, body2 = await wait_and_check(page)
+                    el2, txt2, body2 = await wait_and_check(page, deadline=deadline)
                     r2 = el2 > 150 and txt2 > 50
                     log("APPROACH_1", f"  {link_text}: {'RENDERS' if r2 else 'BLANK'} ({el2} el, {txt2} txt)")
                     if r2:
                         await screenshot(page, f"a1-{link_text.lower().replace(' ', '-')}")
                     # Go back to settings
                     await page.goto(f"{BASE}/settings", wait_until="domcontentloaded", timeout=15000)
-                    await wait_and_check(page)
+                    await wait_and_check(page, deadline=deadline)
             except Exception:
                 continue
 
@@ -211,7 +209,7 @@ async def approach_1_click_from_settings(page):
 # ============================================================
 # APPROACH 2: Login with lilly@ credentials
 # ============================================================
-async def approach_2_lilly_login(page):
+async def approach_2_lilly_login(page, deadline=None):
     """Sign out and log in with lilly@ credentials to check different permissions."""
     log("APPROACH_2", "Trying lilly@ login for different permissions...")
 
@@ -219,24 +217,24 @@ async def approach_2_lilly_login(page):
     try:
         # Navigate to a page that renders
         await page.goto(f"{BASE}/dashboard", wait_until="domcontentloaded", timeout=15000)
-        await wait_and_check(page)
+        await wait_and_check(page, deadline=deadline)
 
         # Try to find sign out
         signout = page.locator('a:has-text("Signout"), a:has-text("Sign Out"), button:has-text("Sign Out")')
         if await signout.count() > 0:
             await signout.first.click()
-            await page.wait_for_timeout(3000)
+            await settle(page, deadline)
             log("APPROACH_2", "Signed out")
         else:
             # Try via URL
             await page.goto("https://app.gohighlevel.com/logout", wait_until="domcontentloaded", timeout=15000)
-            await page.wait_for_timeout(3000)
+            await settle(page, deadline)
             log("APPROACH_2", "Navigated to logout URL")
     except Exception as e:
         log("APPROACH_2", f"Sign out issue: {e}")
 
     # Login with lilly@
-    success = await auto_login(page, LILLY_EMAIL, LILLY_PASS)
+    success = await auto_login(page, LILLY_EMAIL, LILLY_PASS, deadline)
     if not success:
         log("APPROACH_2", "Could not log in with lilly@ credentials")
         return False
@@ -251,7 +249,7 @@ async def approach_2_lilly_login(page):
     ]
 
     for name, url in test_pages:
-        renders, body_text = await check_page_renders(page, name, url)
+        renders, body_text = await check_page_renders(page, name, url, deadline)
         await screenshot(page, f"a2-lilly-{name.lower().replace(' ', '-')}")
         if renders:
             log("APPROACH_2", f"{name} RENDERS with lilly@ login!")
@@ -264,12 +262,12 @@ async def approach_2_lilly_login(page):
 # ============================================================
 # APPROACH 3: Check agency-level settings
 # ============================================================
-async def approach_3_agency_settings(page):
+async def approach_3_agency_settings(page, deadline=None):
     """Check agency-level settings and billing to understand feature access."""
     log("APPROACH_3", "Checking agency settings and billing...")
 
     # Check billing page
-    renders, body_text = await check_page_renders(page, "Billing", f"{BASE}/settings/billing")
+    renders, body_text = await check_page_renders(page, "Billing", f"{BASE}/settings/billing", deadline)
     if renders:
         await screenshot(page, "a3-billing")
         log("BILLING", body_text[:400])
@@ -289,7 +287,7 @@ async def approach_3_agency_settings(page):
     ]
 
     for name, url in v2_pages:
-        renders, body_text = await check_page_renders(page, name, url)
+        renders, body_text = await check_page_renders(page, name, url, deadline)
         if renders:
             await screenshot(page, f"a3-{name.lower().replace(' ', '-')}")
             log("APPROACH_3", f"{name} RENDERS!")
@@ -334,27 +332,35 @@ async def main():
     browser = await pw.chromium.connect_over_cdp(f"http://127.0.0.1:{DEBUG_PORT}")
     context = browser.contexts[0]
     page = await context.new_page()
+    watch(page)
     log("START", "Connected to Chrome via CDP")
+    deadline = Deadline(RUN_DEADLINE)
+    timer = StepTimer("ghl-page-access")
 
     try:
         # Make sure we're logged in first
-        await page.goto(f"{BASE}/dashboard", wait_until="domcontentloaded", timeout=20000)
-        el_count, text_len, body_text = await wait_and_check(page)
-
-        if not await is_logged_in(page):
-            log("LOGIN", "Not logged in, auto-logging in...")
-            success = await auto_login(page, LILLY_EMAIL, LILLY_PASS)
+        async with timer.step("login"):
+            await page.goto(f"{BASE}/dashboard", wait_until="domcontentloaded", timeout=20000)
+            el_count, text_len, body_text = await wait_and_check(page, deadline=deadline)
+            success = await is_logged_in(page)
             if not success:
-                print("\n  Could not log in. Exiting.")
-                return
+                log("LOGIN", "Not logged in, auto-logging in...")
+                success = await auto_login(page, LILLY_EMAIL, LILLY_PASS, deadline)
+        if not success:
+            print("\n" + timer.save())
+            print("\n  Could not log in. Exiting.")
+            return
 
         # ── APPROACH 1: Click from Settings ──
         print("\n" + "-" * 50)
         print("  APPROACH 1: Click Phone System from Settings")
         print("-" * 50)
-        if await approach_1_click_from_settings(page):
+        async with timer.step("approach 1: settings sidebar"):
+            worked = await approach_1_click_from_settings(page, deadline)
+        if worked:
             print("\n  APPROACH 1 SUCCEEDED!")
             print("  Phone System page is accessible via Settings sidebar.")
+            print("\n" + timer.save())
             await keep_open()
             return
 
@@ -362,9 +368,12 @@ async def main():
         print("\n" + "-" * 50)
         print("  APPROACH 2: Login with lilly@ credentials")
         print("-" * 50)
-        if await approach_2_lilly_login(page):
+        async with timer.step("approach 2: lilly@ login"):
+            worked = await approach_2_lilly_login(page, deadline)
+        if worked:
             print("\n  APPROACH 2 SUCCEEDED!")
             print("  Different login unlocked the pages.")
+            print("\n" + timer.save())
             await keep_open()
             return
 
@@ -372,9 +381,12 @@ async def main():
         print("\n" + "-" * 50)
         print("  APPROACH 3: Check agency settings & V2 URLs")
         print("-" * 50)
-        if await approach_3_agency_settings(page):
+        async with timer.step("approach 3: v2 urls"):
+            worked = await approach_3_agency_settings(page, deadline)
+        if worked:
             print("\n  APPROACH 3 SUCCEEDED!")
             print("  V2 URLs work for this feature.")
+            print("\n" + timer.save())
             await keep_open()
             return
 
@@ -396,6 +408,7 @@ async def main():
         print("=" * 60)
 
         await screenshot(page, "all-approaches-failed")
+        print("\n" + timer.save())
 
     except Exception as e:
         log("ERROR", str(e))
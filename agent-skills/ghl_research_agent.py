@@ -15,7 +15,7 @@ USAGE:
     python ghl_research_agent.py learn          # Run full learning cycle
     python ghl_research_agent.py youtube         # Just YouTube transcripts
     python ghl_research_agent.py docs            # Just GHL docs
-    python ghl_research_agent.py search "IVR"    # Search knowledge base
+    python ghl_research_agent.py search "IVR"    # Search knowledge base (BM25, "phrases")
     python ghl_research_agent.py apps            # List app marketplace ideas
     python ghl_research_agent.py status          # Show what we've learned
 """
@@ -31,6 +31,9 @@ from pathlib import Path
 from datetime import datetime
 from dotenv import load_dotenv
 
+from kb_index import KB_SEARCH
+from llm_quota import QUOTA, estimate_tokens
+
 BASE_DIR = Path(__file__).parent.parent
 AGENT_DIR = Path(__file__).parent
 load_dotenv(BASE_DIR / '.env')
@@ -272,7 +275,7 @@ def process_youtube_sources():
 # 2. LLM SUMMARIZER — Uses free Groq to summarize content
 # ============================================================
 def summarize_with_llm(text, prompt_prefix, max_input=6000):
-    """Summarize text using Groq (free, fast)."""
+    """Summarize text using Groq (free, fast). Batch priority — pauses for quota, never starves the bot."""
     if not GROQ_KEY:
         log("LLM", "No GROQ_API_KEY, skipping summarization")
         return None
@@ -281,6 +284,11 @@ def summarize_with_llm(text, prompt_prefix, max_input=6000):
     if len(text) > max_input:
         text = text[:max_input] + "... [truncated]"
 
+    est = estimate_tokens(f"{prompt_prefix}\n\n{text}", max_tokens=2000)
+    if not QUOTA.acquire("groq", tokens=est, priority="batch", timeout=300):
+        log("LLM", "Groq quota exhausted for batch work, skipping")
+        return None
+
     try:
         r = requests.post(
             "https://api.groq.com/openai/v1/chat/completions",
@@ -302,7 +310,9 @@ def summarize_with_llm(text, prompt_prefix, max_input=6000):
             timeout=30,
         )
         if r.ok:
-            return r.json()["choices"][0]["message"]["content"]
+            data = r.json()
+            QUOTA.settle("groq", est, data.get("usage", {}).get("total_tokens"))
+            return data["choices"][0]["message"]["content"]
         else:
             log("LLM", f"Error: {r.status_code} {r.text[:100]}")
     except Exception as e:
@@ -342,8 +352,6 @@ def summarize_transcripts():
         else:
             log("SUMMARIZE", f"    ⚠️ Failed to summarize")
 
-        time.sleep(2)  # rate limit
-
 
 # ============================================================
 # 3. KNOWLEDGE BASE — Search & retrieve
@@ -376,39 +384,26 @@ def build_index():
             "length": len(content),
         })
 
-        # Extract topics
-        for keyword in ["IVR", "Voice AI", "Workflow", "Pipeline", "Calendar",
-                        "SMS", "Email", "WhatsApp", "Phone", "Conversation AI",
-                        "Membership", "Payment", "Invoice", "Webhook", "API",
-                        "Marketplace", "Custom Field", "Custom Value", "Trigger",
-                        "Automation", "Funnel", "Website", "Blog", "Social",
-                        "Reputation", "Review", "Affiliate", "Community"]:
-            if keyword.lower() in content.lower():
-                index["topics"].setdefault(keyword, []).append(sf.name)
+    # Extract topics — phrase lookups against the full-text index
+    KB_SEARCH.refresh(force=True)
+    for keyword in ["IVR", "Voice AI", "Workflow", "Pipeline", "Calendar",
+                    "SMS", "Email", "WhatsApp", "Phone", "Conversation AI",
+                    "Membership", "Payment", "Invoice", "Webhook", "API",
+                    "Marketplace", "Custom Field", "Custom Value", "Trigger",
+                    "Automation", "Funnel", "Website", "Blog", "Social",
+                    "Reputation", "Review", "Affiliate", "Community"]:
+        hits = KB_SEARCH.search(f'"{keyword}"', limit=1000, kinds={"summary"}, refresh=False)
+        if hits:
+            index["topics"][keyword] = sorted(h["file"].split("/", 1)[1] for h in hits)
 
     KB_INDEX.write_text(json.dumps(index, indent=2))
     log("INDEX", f"Built index: {len(index['transcripts'])} transcripts, {len(index['summaries'])} summaries, {len(index['topics'])} topics")
     return index
 
 
-def search_knowledge(query):
-    """Search the knowledge base for a topic."""
-    query_lower = query.lower()
-    results = []
-
-    for sf in SUMMARIES_DIR.glob("*.md"):
-        content = sf.read_text(encoding="utf-8")
-        if query_lower in content.lower():
-            # Find matching lines
-            matches = [line.strip() for line in content.split("\n")
-                       if query_lower in line.lower() and line.strip()]
-            results.append({
-                "file": sf.name,
-                "title": content.split("\n")[0].replace("# ", ""),
-                "matches": matches[:5],
-            })
-
-    return results
+def search_knowledge(query, limit=10):
+    """Search the knowledge base (BM25 ranked, "quoted phrases" supported)."""
+    return KB_SEARCH.search(query, limit=limit)
 
 
 # ============================================================
@@ -571,7 +566,7 @@ def main():
         if results:
             print(f"\n  Found {len(results)} results for '{query}':\n")
             for r in results:
-                print(f"  📄 {r['title']}")
+                print(f"  📄 {r['title']}  ({r['kind']}, score {r['score']:.2f})")
                 for m in r['matches'][:3]:
                     print(f"     → {m[:100]}")
                 print()
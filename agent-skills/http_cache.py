@@ -0,0 +1,256 @@
+"""
+HTTP Cache — Conditional GET disk cache for RSS and JSON feeds
+================================================================
+Google News RSS, the GHL changelog RSS and Reddit's JSON endpoints are polled
+by /news, /reddit, /research, the morning brief and the daily research cycle.
+Most of the time nothing changed since the last poll, so:
+
+    fresh       → Cache-Control max-age (or the caller's min_ttl) not yet
+                  passed: answered from disk, no network at all
+    revalidate  → stale entry with an ETag / Last-Modified: sent with
+                  If-None-Match / If-Modified-Since, a 304 reuses the body
+    miss        → normal GET, body stored zlib-compressed
+
+If the network fails — or the server answers 429 or 5xx — and a stale copy
+exists, the stale copy is served; r.upstream_status still says what the
+server answered, so callers can back off.
+Callers that decide not to go to the network at all (e.g. while rate
+limited) can ask for the stored copy directly with stale().
+Cache-Control no-store is respected unless the caller passes min_ttl —
+feeds that say no-store but only change a few times an hour can opt in.
+
+Storage: SQLite (http-cache.db), shared by every agent process. Counters for
+bytes and time saved live in the same file.
+
+Usage:
+    from http_cache import HTTP_CACHE
+    r = HTTP_CACHE.get(url, params=..., headers=..., timeout=15, min_ttl=300)
+    r.ok, r.status_code, r.text, r.content, r.json(), r.cache  # "fresh" | "revalidated" | "miss" | "stale"
+    r.upstream_status   # the server's status (429 on a stale copy served while rate limited)
+
+CLI:
+    python http_cache.py stats
+    python http_cache.py clear
+"""
+
+import re
+import sys
+import json
+import time
+import zlib
+import sqlite3
+import hashlib
+import threading
+from pathlib import Path
+
+import requests
+from requests.structures import CaseInsensitiveDict
+
+CACHE_DB = Path(__file__).parent / "http-cache.db"
+MAX_ENTRY_AGE = 7 * 86400  # rows untouched this long are pruned
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS entries (
+    key TEXT PRIMARY KEY,
+    url TEXT NOT NULL,
+    etag TEXT,
+    last_modified TEXT,
+    content_type TEXT,
+    stored_at REAL NOT NULL,
+    max_age REAL NOT NULL,
+    fetch_ms REAL NOT NULL,
+    size INTEGER NOT NULL,
+    body BLOB NOT NULL
+);
+CREATE TABLE IF NOT EXISTS counters (name TEXT PRIMARY KEY, value REAL NOT NULL DEFAULT 0);
+"""
+
+COUNTERS = ["fresh", "revalidated", "miss", "stale", "bytes_downloaded", "bytes_saved", "ms_saved"]
+
+
+def cache_control(header):
+    """'public, max-age=300' → {'public': True, 'max-age': '300'}."""
+    directives = {}
+    for part in (header or "").split(","):
+        name, _, value = part.strip().partition("=")
+        if name:
+            directives[name.lower()] = value.strip('"') or True
+    return directives
+
+
+def _max_age(headers):
+    cc = cache_control(headers.get("Cache-Control"))
+    if "no-cache" in cc or "no-store" in cc:
+        return 0.0
+    try:
+        return max(0.0, float(cc.get("max-age", 0)) - float(headers.get("Age", 0) or 0))
+    except ValueError:
+        return 0.0
+
+
+class CachedResponse:
+    """The parts of requests.Response the feed fetchers use."""
+
+    def __init__(self, status_code, content, headers, cache, upstream_status=None):
+        self.status_code = status_code
+        self.content = content
+        self.headers = headers
+        self.cache = cache
+        self.upstream_status = upstream_status or status_code
+
+    @property
+    def ok(self):
+        return self.status_code < 400
+
+    @property
+    def text(self):
+        match = re.search(r"charset=([\w-]+)", self.headers.get("Content-Type", ""))
+        return self.content.decode(match.group(1) if match else "utf-8", errors="replace")
+
+    def json(self):
+        return json.loads(self.content)
+
+
+class HTTPCache:
+    def __init__(self, path=CACHE_DB):
+        self.path = Path(path)
+        self._lock = threading.Lock()
+        self._db = None
+
+    @property
+    def db(self):
+        if self._db is None:
+            self._db = sqlite3.connect(str(self.path), timeout=10, check_same_thread=False)
+            self._db.execute("PRAGMA journal_mode=WAL")
+            self._db.executescript(SCHEMA)
+            with self._db:
+                self._db.execute("DELETE FROM entries WHERE stored_at < ?", (time.time() - MAX_ENTRY_AGE,))
+        return self._db
+
+    @staticmethod
+    def key(url, params=None):
+        full = requests.Request("GET", url, params=params).prepare().url
+        return full, hashlib.sha1(full.encode()).hexdigest()
+
+    def _bump(self, **amounts):
+        with self._lock, self.db:
+            for name, amount in amounts.items():
+                self.db.execute(
+                    "INSERT INTO counters (name, value) VALUES (?, ?) "
+                    "ON CONFLICT(name) DO UPDATE SET value = value + excluded.value", (name, amount))
+
+    def _load(self, key):
+        with self._lock:
+            return self.db.execute(
+                "SELECT etag, last_modified, content_type, stored_at, max_age, fetch_ms, size, body "
+                "FROM entries WHERE key = ?", (key,)).fetchone()
+
+    def _save(self, key, url, r, max_age, fetch_ms):
+        body = zlib.compress(r.content, 6)
+        with self._lock, self.db:
+            self.db.execute(
+                "INSERT OR REPLACE INTO entries VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (key, url, r.headers.get("ETag"), r.headers.get("Last-Modified"),
+                 r.headers.get("Content-Type", ""), time.time(), max_age, fetch_ms, len(r.content), body))
+
+    def _touch(self, key, max_age):
+        with self._lock, self.db:
+            self.db.execute("UPDATE entries SET stored_at = ?, max_age = ? WHERE key = ?",
+                            (time.time(), max_age, key))
+
+    def get(self, url, params=None, headers=None, timeout=15, min_ttl=0, session=None):
+        """GET through the cache. Returns a CachedResponse; raises like requests.get on failure with no copy.
+
+        Pass a requests.Session to reuse its pooled connections.
+        """
+        full, key = self.key(url, params)
+        entry = self._load(key)
+        now = time.time()
+
+        if entry:
+            etag, last_modified, content_type, stored_at, max_age, fetch_ms, size, body = entry
+            cached = lambda state, extra={}, upstream=None: CachedResponse(
+                200, zlib.decompress(body), CaseInsensitiveDict(extra, **{"Content-Type": content_type}), state,
+                upstream)
+            if now - stored_at < max(max_age, min_ttl):
+                self._bump(fresh=1, bytes_saved=size, ms_saved=fetch_ms)
+                return cached("fresh")
+            headers = dict(headers or {})
+            if etag:
+                headers["If-None-Match"] = etag
+            if last_modified:
+                headers["If-Modified-Since"] = last_modified
+
+        started = time.time()
+        try:
+            r = (session or requests).get(full, headers=headers, timeout=timeout)
+        except requests.RequestException:
+            if entry:
+                self._bump(stale=1, bytes_saved=size)
+                return cached("stale")
+            raise
+        elapsed_ms = (time.time() - started) * 1000
+
+        if r.status_code == 304 and entry:
+            self._touch(key, _max_age(r.headers))
+            self._bump(revalidated=1, bytes_downloaded=len(r.content), bytes_saved=size,
+                       ms_saved=max(0.0, fetch_ms - elapsed_ms))
+            return cached("revalidated", r.headers)
+
+        if entry and (r.status_code == 429 or r.status_code >= 500):
+            # Rate limited or down: the stored copy beats an error page
+            self._bump(stale=1, bytes_downloaded=len(r.content), bytes_saved=size)
+            return cached("stale", r.headers, r.status_code)
+
+        self._bump(miss=1, bytes_downloaded=len(r.content))
+        if r.status_code == 200:
+            cc = cache_control(r.headers.get("Cache-Control"))
+            if "no-store" not in cc or min_ttl:
+                self._save(key, full, r, _max_age(r.headers), elapsed_ms)
+        return CachedResponse(r.status_code, r.content, r.headers, "miss")
+
+    def stale(self, url, params=None):
+        """The stored copy of `url` however old, without touching the network — or None."""
+        entry = self._load(self.key(url, params)[1])
+        if not entry:
+            return None
+        content_type, size, body = entry[2], entry[6], entry[7]
+        self._bump(stale=1, bytes_saved=size)
+        return CachedResponse(200, zlib.decompress(body), CaseInsensitiveDict({"Content-Type": content_type}), "stale")
+
+    def stats(self):
+        with self._lock:
+            values = dict(self.db.execute("SELECT name, value FROM counters").fetchall())
+            entries, stored, raw = self.db.execute(
+                "SELECT COUNT(*), COALESCE(SUM(LENGTH(body)), 0), COALESCE(SUM(size), 0) FROM entries").fetchone()
+        out = {name: int(values.get(name, 0)) for name in COUNTERS}
+        requests_total = out["fresh"] + out["revalidated"] + out["miss"] + out["stale"]
+        out["served_locally_pct"] = round(100 * (requests_total - out["miss"]) / requests_total, 1) if requests_total else 0.0
+        out.update(entries=entries, stored_bytes=stored, raw_bytes=raw)
+        return out
+
+    def clear(self):
+        with self._lock, self.db:
+            self.db.execute("DELETE FROM entries")
+            self.db.execute("DELETE FROM counters")
+
+
+HTTP_CACHE = HTTPCache()
+
+
+if __name__ == "__main__":
+    cmd = sys.argv[1] if len(sys.argv) > 1 else "stats"
+    if cmd == "clear":
+        HTTP_CACHE.clear()
+        print("  Cache cleared.")
+    elif cmd == "stats":
+        s = HTTP_CACHE.stats()
+        print(f"\n  Requests: {s['fresh']} fresh, {s['revalidated']} revalidated (304), "
+              f"{s['stale']} stale on error, {s['miss']} downloaded")
+        print(f"  Served locally: {s['served_locally_pct']}%")
+        print(f"  Downloaded: {s['bytes_downloaded'] / 1024:.0f} KB   "
+              f"Saved: {s['bytes_saved'] / 1024:.0f} KB, {s['ms_saved'] / 1000:.1f}s")
+        print(f"  Entries: {s['entries']} ({s['stored_bytes'] / 1024:.0f} KB on disk, "
+              f"{s['raw_bytes'] / 1024:.0f} KB uncompressed)\n")
+    else:
+        print("Usage: python http_cache.py [stats|clear]")
@@ -0,0 +1,403 @@
+"""
+KB Index — Incremental full-text search over ghl-knowledge/
+=============================================================
+One inverted index over YouTube transcripts, LLM summaries, changelog
+entries, Reddit posts and multi-AI answers. Each term maps to the documents
+it appears in and the token positions inside them, so a query is a few
+dictionary lookups instead of reading and lowercasing every file.
+
+    ranking → BM25 (k1=1.2, b=0.75)
+    phrases → "voice ai" in quotes must appear as consecutive words
+    updates → on each query the source folders are re-stat'ed (at most every
+              REFRESH_INTERVAL seconds); only files whose mtime/size changed
+              are re-tokenized. The index is saved to search-index.json.
+
+Usage:
+    from kb_index import KB_SEARCH
+    KB_SEARCH.search('"voice ai" outbound', limit=5)
+    KB_SEARCH.context("how do I set up IVR", max_chars=3000)   # for LLM prompts
+
+CLI:
+    python kb_index.py search "IVR menu"
+    python kb_index.py rebuild
+    python kb_index.py stats
+"""
+
+import re
+import sys
+import json
+import math
+import time
+import threading
+from pathlib import Path
+
+from state_store import atomic_write
+
+AGENT_DIR = Path(__file__).parent
+KB_DIR = AGENT_DIR / "ghl-knowledge"
+INDEX_FILE = KB_DIR / "search-index.json"
+INDEX_VERSION = 1
+REFRESH_INTERVAL = 5.0
+
+BM25_K1 = 1.2
+BM25_B = 0.75
+
+# (kind, folder, glob) — what gets indexed
+SOURCES = [
+    ("transcript", "youtube-transcripts", "*.json"),
+    ("summary", "summaries", "*.md"),
+    ("changelog", "changelog", "*.json"),
+    ("reddit", "reddit", "*.json"),
+    ("ai-answer", "ai-answers", "*.md"),
+]
+
+_TOKEN = re.compile(r"[a-z0-9]+")
+_PHRASE = re.compile(r'"([^"]+)"')
+
+# Dropped from free-text queries (still indexed, so phrases like "how to" work)
+STOPWORDS = {
+    "a", "an", "and", "are", "as", "at", "be", "by", "can", "do", "does", "for",
+    "from", "how", "i", "in", "is", "it", "of", "on", "or", "that", "the", "this",
+    "to", "what", "when", "where", "which", "with", "you", "your", "my", "we",
+}
+
+
+def _fold(token):
+    """Light plural folding so 'workflows' matches 'workflow' (not 'ss' words like 'address')."""
+    if len(token) > 3 and token.endswith("s") and not token.endswith("ss"):
+        return token[:-1]
+    return token
+
+
+def tokenize(text):
+    return [_fold(t) for t in _TOKEN.findall(text.lower())]
+
+
+def _token_offsets(text):
+    """Character offset of every token, so hits can be turned into snippets without rescanning."""
+    return [m.start() for m in _TOKEN.finditer(text.lower())]
+
+
+def parse_query(query):
+    """Split a query into (free terms, phrases); each phrase is a token list."""
+    phrases = [tokenize(p) for p in _PHRASE.findall(query)]
+    phrases = [p for p in phrases if p]
+    rest = _PHRASE.sub(" ", query)
+    terms = [t for t in tokenize(rest) if t not in STOPWORDS]
+    return terms, phrases
+
+
+# ============================================================
+# DOCUMENT EXTRACTION — one file → one or more documents
+# ============================================================
+def _md_title(text, fallback):
+    first = text.split("\n", 1)[0].strip()
+    return first.lstrip("#").strip() or fallback
+
+
+def extract_documents(kind, path):
+    """Return [(doc_suffix, title, text)] for one source file."""
+    if path.suffix == ".md":
+        text = path.read_text(encoding="utf-8")
+        return [("", _md_title(text, path.stem), text)]
+
+    data = json.loads(path.read_text(encoding="utf-8"))
+    if kind == "transcript":
+        title = data.get("title", path.stem)
+        return [("", title, f"{title}\n{data.get('transcript', '')}")]
+    if kind == "changelog":
+        return [(f"#{i}", e.get("title", ""), f"{e.get('title', '')}\n{e.get('description', '')}")
+                for i, e in enumerate(data) if isinstance(e, dict)]
+    if kind == "reddit":
+        return [(f"#{i}", p.get("title", ""), f"{p.get('title', '')}\n{p.get('selftext', '')}")
+                for i, p in enumerate(data) if isinstance(p, dict)]
+    return []
+
+
+def _signature(path):
+    st = path.stat()
+    return [st.st_mtime_ns, st.st_size]
+
+
+# ============================================================
+# INDEX
+# ============================================================
+class KnowledgeIndex:
+    def __init__(self, kb_dir=KB_DIR, index_file=INDEX_FILE):
+        self.kb_dir = Path(kb_dir)
+        self.index_file = Path(index_file)
+        self._lock = threading.Lock()
+        self._last_scan = 0.0
+        self._loaded = False
+        self._reset()
+
+    def _reset(self):
+        self.files = {}     # relpath → {"sig": [mtime_ns, size], "docs": [doc_id, ...]}
+        self.docs = {}      # doc_id → {"file", "kind", "title", "text", "offsets", "length"}
+        self.postings = {}  # term → {doc_id: [positions]}
+        self.total_length = 0
+
+    # ── persistence ──
+    def _load(self):
+        self._loaded = True
+        if not self.index_file.exists():
+            return
+        try:
+            data = json.loads(self.index_file.read_text(encoding="utf-8"))
+        except (OSError, ValueError):
+            return
+        if data.get("version") != INDEX_VERSION:
+            return
+        self.files = data["files"]
+        self.docs = data["docs"]
+        self.postings = data["postings"]
+        self.total_length = sum(d["length"] for d in self.docs.values())
+
+    def _save(self):
+        data = {"version": INDEX_VERSION, "files": self.files, "docs": self.docs, "postings": self.postings}
+        atomic_write(self.index_file, json.dumps(data, separators=(",", ":")))
+
+    # ── incremental updates ──
+    def _add(self, relpath, sig, kind, path):
+        doc_ids = []
+        for suffix, title, text in extract_documents(kind, path):
+            doc_id = relpath + suffix
+            tokens = tokenize(text)
+            for pos, term in enumerate(tokens):
+                self.postings.setdefault(term, {}).setdefault(doc_id, []).append(pos)
+            self.docs[doc_id] = {"file": relpath, "kind": kind, "title": title, "text": text,
+                                 "offsets": _token_offsets(text), "length": len(tokens)}
+            self.total_length += len(tokens)
+            doc_ids.append(doc_id)
+        self.files[relpath] = {"sig": sig, "docs": doc_ids}
+
+    def _remove(self, relpath):
+        for doc_id in self.files.pop(relpath, {}).get("docs", []):
+            doc = self.docs.pop(doc_id, None)
+            if not doc:
+                continue
+            self.total_length -= doc["length"]
+            for term in set(tokenize(doc["text"])):
+                plist = self.postings.get(term)
+                if plist is not None:
+                    plist.pop(doc_id, None)
+                    if not plist:
+                        del self.postings[term]
+
+    def refresh(self, force=False):
+        """Re-index files that were added, changed or deleted. Returns the number of files touched."""
+        with self._lock:
+            if not self._loaded:
+                self._load()
+            if not force and time.time() - self._last_scan < REFRESH_INTERVAL:
+                return 0
+            self._last_scan = time.time()
+
+            seen = set()
+            changed = 0
+            for kind, folder, pattern in SOURCES:
+                for path in (self.kb_dir / folder).glob(pattern):
+                    relpath = f"{folder}/{path.name}"
+                    seen.add(relpath)
+                    try:
+                        sig = _signature(path)
+                    except OSError:
+                        continue
+                    known = self.files.get(relpath)
+                    if known and known["sig"] == sig:
+                        continue
+                    self._remove(relpath)
+                    try:
+                        self._add(relpath, sig, kind, path)
+                    except (OSError, ValueError):
+                        self.files[relpath] = {"sig": sig, "docs": []}  # unreadable — retry when it changes
+                    changed += 1
+
+            for relpath in [f for f in self.files if f not in seen]:
+                self._remove(relpath)
+                changed += 1
+
+            if changed:
+                self._save()
+            return changed
+
+    def rebuild(self):
+        with self._lock:
+            self._reset()
+            self._loaded = True
+        return self.refresh(force=True)
+
+    # ── queries ──
+    def _phrase_positions(self, doc_id, phrase):
+        """Start positions where the phrase's tokens appear consecutively in doc_id."""
+        starts = set(self.postings.get(phrase[0], {}).get(doc_id, []))
+        for offset, term in enumerate(phrase[1:], 1):
+            positions = self.postings.get(term, {}).get(doc_id)
+            if not positions:
+                return set()
+            starts &= {p - offset for p in positions}
+            if not starts:
+                break
+        return starts
+
+    def _bm25(self, term, doc_id, n_docs, avg_len):
+        plist = self.postings.get(term)
+        if not plist or doc_id not in plist:
+            return 0.0
+        df = len(plist)
+        idf = math.log(1 + (n_docs - df + 0.5) / (df + 0.5))
+        tf = len(plist[doc_id])
+        length = self.docs[doc_id]["length"]
+        return idf * tf * (BM25_K1 + 1) / (tf + BM25_K1 * (1 - BM25_B + BM25_B * length / avg_len))
+
+    def search(self, query, limit=10, kinds=None, refresh=True):
+        """BM25-ranked documents for a query. Quoted phrases are required matches.
+
+        Returns [{"doc_id", "file", "kind", "title", "score", "matches"}], best first.
+        """
+        if refresh:
+            self.refresh()
+        terms, phrases = parse_query(query)
+        if not terms and not phrases:
+            return []
+
+        with self._lock:
+            if phrases:
+                candidates = None
+                for phrase in phrases:
+                    docs = set(self.postings.get(phrase[0], {}))
+                    docs = {d for d in docs if self._phrase_positions(d, phrase)}
+                    candidates = docs if candidates is None else candidates & docs
+            else:
+                candidates = set()
+                for term in terms:
+                    candidates.update(self.postings.get(term, {}))
+            if kinds:
+                candidates = {d for d in candidates if self.docs[d]["kind"] in kinds}
+            if not candidates:
+                return []
+
+            n_docs = len(self.docs)
+            avg_len = self.total_length / n_docs if n_docs else 1.0
+            score_terms = terms + [t for p in phrases for t in p if t not in STOPWORDS]
+            scored = []
+            for doc_id in candidates:
+                score = sum(self._bm25(t, doc_id, n_docs, avg_len) for t in score_terms)
+                scored.append((score, doc_id))
+            scored.sort(key=lambda x: (-x[0], x[1]))
+
+            results = []
+            for score, doc_id in scored[:limit]:
+                doc = self.docs[doc_id]
+                results.append({
+                    "doc_id": doc_id,
+                    "file": doc["file"],
+                    "kind": doc["kind"],
+                    "title": doc["title"],
+                    "score": round(score, 3),
+                    "matches": self._snippets(doc_id, terms, phrases),
+                })
+            return results
+
+    def _snippets(self, doc_id, terms, phrases, limit=5, width=240):
+        """Lines (or windows of long lines, e.g. transcripts) around the query's hits."""
+        if phrases:
+            hits = set()
+            for phrase in phrases:
+                hits |= self._phrase_positions(doc_id, phrase)
+        else:
+            hits = {p for t in terms for p in self.postings.get(t, {}).get(doc_id, [])}
+        doc = self.docs[doc_id]
+        text, offsets = doc["text"], doc["offsets"]
+        out = []
+        covered = -1  # hits before this offset are already inside a snippet
+        for pos in sorted(hits):
+            at = offsets[pos]
+            if at < covered:
+                continue
+            line_start = text.rfind("\n", 0, at) + 1
+            line_end = text.find("\n", at)
+            if line_end == -1:
+                line_end = len(text)
+            if line_end - line_start <= width:
+                out.append(text[line_start:line_end].strip())
+                covered = line_end
+            else:
+                start = max(line_start, at - width // 2)
+                end = min(line_end, start + width)
+                out.append(("…" if start > line_start else "") + text[start:end].strip()
+                           + ("…" if end < line_end else ""))
+                covered = end
+            if len(out) >= limit:
+                break
+        return out
+
+    def context(self, query, max_chars=3000, limit=3):
+        """Best-matching passages for a question, formatted for an LLM prompt."""
+        parts = []
+        budget = max_chars
+        for r in self.search(query, limit=limit):
+            passage = "\n".join(r["matches"])
+            block = f"[{r['kind']}] {r['title']}\n{passage}"[:budget]
+            parts.append(block)
+            budget -= len(block) + 2
+            if budget <= 0:
+                break
+        return "\n\n".join(parts)
+
+    def stats(self):
+        with self._lock:
+            if not self._loaded:
+                self._load()
+            kinds = {}
+            for doc in self.docs.values():
+                kinds[doc["kind"]] = kinds.get(doc["kind"], 0) + 1
+            return {
+                "files": len(self.files),
+                "documents": len(self.docs),
+                "terms": len(self.postings),
+                "tokens": self.total_length,
+                "by_kind": kinds,
+            }
+
+
+KB_SEARCH = KnowledgeIndex()
+
+
+# ============================================================
+# MAIN
+# ============================================================
+def main():
+    if len(sys.argv) < 2:
+        print("Usage:")
+        print("  python kb_index.py search \"query\"   # BM25 search, \"quoted phrases\" supported")
+        print("  python kb_index.py rebuild          # Re-index everything from scratch")
+        print("  python kb_index.py stats            # Index size")
+        return
+
+    cmd = sys.argv[1].lower()
+    if cmd == "search":
+        query = " ".join(sys.argv[2:])
+        KB_SEARCH.refresh()
+        start = time.perf_counter()
+        results = KB_SEARCH.search(query, refresh=False)
+        elapsed = (time.perf_counter() - start) * 1000
+        print(f"\n  {len(results)} results for {query!r} ({elapsed:.2f} ms)\n")
+        for r in results:
+            print(f"  [{r['score']:.2f}] ({r['kind']}) {r['title'][:70]}")
+            for m in r["matches"][:2]:
+                print(f"     → {m[:120]}")
+    elif cmd == "rebuild":
+        start = time.perf_counter()
+        n = KB_SEARCH.rebuild()
+        print(f"  Indexed {n} files in {time.perf_counter() - start:.2f}s → {INDEX_FILE.name}")
+        print(f"  {KB_SEARCH.stats()}")
+    elif cmd == "stats":
+        KB_SEARCH.refresh()
+        print(f"  {KB_SEARCH.stats()}")
+    else:
+        print(f"Unknown command: {cmd}")
+
+
+if __name__ == "__main__":
+    main()
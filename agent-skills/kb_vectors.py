@@ -0,0 +1,389 @@
+"""
+KB Vectors — Local embedding retrieval for LLM context
+========================================================
+Transcripts and summaries are split into ~120-word chunks, embedded on the
+CPU and stored as one float32 matrix (vectors.npy, opened memory-mapped).
+A question is embedded the same way and matched with a single
+matrix-vector product; only the top-k chunks go into the prompt.
+
+Embedders:
+    sentence-transformers installed → KB_EMBED_MODEL (default all-MiniLM-L6-v2)
+    otherwise                       → feature hashing of words, word pairs and
+                                      character 4-grams (no model download);
+                                      stopwords and spoken filler are skipped
+
+Each embedder has its own relevance cutoff (min_score). Hashed vectors of
+unrelated text still score 0.1-0.2 against each other, so for them a chunk
+must also contain at least half of the question's content words — otherwise
+nothing is returned and callers fall back to keyword search.
+
+Only files whose mtime/size changed are re-chunked and re-embedded; rows for
+unchanged files are copied across from the previous matrix.
+
+Usage:
+    from kb_vectors import KB_VECTORS
+    KB_VECTORS.search("outbound voice ai compliance", k=4)
+    KB_VECTORS.context("how do I set up IVR", k=4, max_chars=2000)
+
+CLI:
+    python kb_vectors.py search "question"
+    python kb_vectors.py rebuild
+"""
+
+import os
+import re
+import sys
+import json
+import time
+import hashlib
+import threading
+from pathlib import Path
+
+import numpy as np
+
+from kb_index import STOPWORDS, tokenize
+from state_store import atomic_write
+
+AGENT_DIR = Path(__file__).parent
+KB_DIR = AGENT_DIR / "ghl-knowledge"
+VECTORS_DIR = KB_DIR / "vectors"
+MATRIX_FILE = VECTORS_DIR / "vectors.npy"
+CHUNKS_FILE = VECTORS_DIR / "chunks.json"
+REFRESH_INTERVAL = 5.0
+
+CHUNK_WORDS = 120
+CHUNK_OVERLAP = 30
+
+# Transcripts are speech — these carry no topic either
+FILLER_WORDS = {
+    "so", "if", "but", "not", "just", "like", "get", "got", "going", "gonna", "me", "us", "up",
+    "out", "about", "into", "then", "also", "here", "right", "know", "really", "okay", "ok",
+    "yeah", "um", "uh", "let", "s", "t", "don", "re", "ll", "ve", "m", "have", "has", "was",
+    "were", "will", "there", "they", "them", "their", "our", "all", "want", "need", "thing", "some",
+}
+IGNORED_WORDS = STOPWORDS | FILLER_WORDS
+
+# (kind, folder, glob)
+SOURCES = [
+    ("transcript", "youtube-transcripts", "*.json"),
+    ("summary", "summaries", "*.md"),
+]
+
+
+# ============================================================
+# EMBEDDERS
+# ============================================================
+def content_terms(text):
+    """Words of `text` that say what it's about (kb_index tokens, minus stopwords and filler)."""
+    return {t for t in tokenize(text) if t not in IGNORED_WORDS}
+
+
+class HashingEmbedder:
+    """Signed feature hashing → L2-normalized dense vector. Deterministic, no model files."""
+
+    # Measured on ghl-knowledge/: on-topic questions score 0.19-0.55, off-topic
+    # ones up to 0.22 — so the word-overlap check does most of the filtering
+    min_score = 0.18
+    needs_overlap = True
+
+    def __init__(self, dim=512):
+        self.dim = dim
+        self.name = f"hashing-{dim}-v2"
+
+    def _features(self, text):
+        words = [w for w in re.findall(r"[a-z0-9]+", text.lower()) if w not in IGNORED_WORDS]
+        feats = list(words)
+        feats += [f"{a} {b}" for a, b in zip(words, words[1:])]
+        for w in words:
+            padded = f"<{w}>"
+            feats += [padded[i:i + 4] for i in range(max(1, len(padded) - 3))]
+        return feats
+
+    def _embed_one(self, text):
+        counts = {}
+        for f in self._features(text):
+            h = int.from_bytes(hashlib.blake2b(f.encode(), digest_size=8).digest(), "little")
+            idx = h % self.dim
+            sign = 1.0 if (h >> 63) & 1 else -1.0
+            counts[idx] = counts.get(idx, 0.0) + sign
+        vec = np.zeros(self.dim, dtype=np.float32)
+        for idx, c in counts.items():
+            vec[idx] = np.sign(c) * np.log1p(abs(c))  # sublinear term frequency
+        return vec
+
+    def embed(self, texts):
+        mat = np.vstack([self._embed_one(t) for t in texts]) if texts else np.zeros((0, self.dim), np.float32)
+        norms = np.linalg.norm(mat, axis=1, keepdims=True)
+        return mat / np.maximum(norms, 1e-9)
+
+
+class SentenceTransformerEmbedder:
+    min_score = 0.3  # MiniLM cosine: unrelated sentences sit around 0-0.2
+    needs_overlap = False
+
+    def __init__(self, model_name):
+        from sentence_transformers import SentenceTransformer
+        self.model = SentenceTransformer(model_name, device="cpu")
+        self.dim = self.model.get_sentence_embedding_dimension()
+        self.name = f"st-{model_name}"
+
+    def embed(self, texts):
+        return self.model.encode(texts, normalize_embeddings=True, convert_to_numpy=True).astype(np.float32)
+
+
+def default_embedder():
+    model = os.environ.get("KB_EMBED_MODEL", "all-MiniLM-L6-v2")
+    try:
+        return SentenceTransformerEmbedder(model)
+    except Exception:  # not installed, or model unavailable offline
+        return HashingEmbedder()
+
+
+# ============================================================
+# CHUNKING
+# ============================================================
+def _windows(words, size=CHUNK_WORDS, overlap=CHUNK_OVERLAP):
+    step = size - overlap
+    for start in range(0, max(1, len(words) - overlap), step):
+        yield " ".join(words[start:start + size])
+
+
+def chunk_file(kind, path):
+    """Return (title, [chunk text]) for one source file."""
+    if kind == "transcript":
+        data = json.loads(path.read_text(encoding="utf-8"))
+        title = data.get("title", path.stem)
+        return title, [c for c in _windows(data.get("transcript", "").split()) if c]
+
+    text = path.read_text(encoding="utf-8")
+    title = text.split("\n", 1)[0].lstrip("#").strip() or path.stem
+    # Summaries: pack paragraphs/bullet blocks into chunks of up to CHUNK_WORDS
+    chunks, current = [], []
+    for block in re.split(r"\n\s*\n", text):
+        words = block.split()
+        if current and len(current) + len(words) > CHUNK_WORDS:
+            chunks.append(" ".join(current))
+            current = []
+        current += words
+        while len(current) > CHUNK_WORDS:
+            chunks.append(" ".join(current[:CHUNK_WORDS]))
+            current = current[CHUNK_WORDS - CHUNK_OVERLAP:]
+    if current:
+        chunks.append(" ".join(current))
+    return title, chunks
+
+
+def _signature(path):
+    st = path.stat()
+    return [st.st_mtime_ns, st.st_size]
+
+
+# ============================================================
+# INDEX
+# ============================================================
+class VectorIndex:
+    def __init__(self, kb_dir=KB_DIR, vectors_dir=VECTORS_DIR, embedder=None):
+        self.kb_dir = Path(kb_dir)
+        self.vectors_dir = Path(vectors_dir)
+        self.matrix_file = self.vectors_dir / MATRIX_FILE.name
+        self.chunks_file = self.vectors_dir / CHUNKS_FILE.name
+        self._embedder = embedder
+        self._lock = threading.Lock()
+        self._last_scan = 0.0
+        self._loaded = False
+        self.files = {}    # relpath → {"sig", "title", "kind", "rows": [start, end]}
+        self.chunks = []   # row → {"file", "text"}
+        self.matrix = np.zeros((0, 1), dtype=np.float32)
+
+    @property
+    def embedder(self):
+        if self._embedder is None:
+            self._embedder = default_embedder()
+        return self._embedder
+
+    # ── persistence ──
+    def _load(self):
+        self._loaded = True
+        if not (self.chunks_file.exists() and self.matrix_file.exists()):
+            return
+        try:
+            meta = json.loads(self.chunks_file.read_text(encoding="utf-8"))
+            matrix = np.load(self.matrix_file, mmap_mode="r")
+        except (OSError, ValueError):
+            return
+        if meta.get("embedder") != self.embedder.name or matrix.shape[0] != len(meta["chunks"]):
+            return  # different model or torn write — rebuild
+        self.files = meta["files"]
+        self.chunks = meta["chunks"]
+        self.matrix = matrix
+
+    def _save(self):
+        self.vectors_dir.mkdir(parents=True, exist_ok=True)
+        tmp = self.matrix_file.with_suffix(".tmp.npy")
+        np.save(tmp, np.ascontiguousarray(self.matrix, dtype=np.float32))
+        os.replace(tmp, self.matrix_file)
+        meta = {"embedder": self.embedder.name, "dim": int(self.matrix.shape[1]),
+                "files": self.files, "chunks": self.chunks}
+        atomic_write(self.chunks_file, json.dumps(meta))
+        self.matrix = np.load(self.matrix_file, mmap_mode="r")
+
+    # ── incremental updates ──
+    def refresh(self, force=False):
+        """Re-embed files that were added or changed, drop deleted ones. Returns files touched."""
+        with self._lock:
+            if not self._loaded:
+                self._load()
+            if not force and time.time() - self._last_scan < REFRESH_INTERVAL:
+                return 0
+            self._last_scan = time.time()
+
+            current = {}
+            for kind, folder, pattern in SOURCES:
+                for path in (self.kb_dir / folder).glob(pattern):
+                    try:
+                        current[f"{folder}/{path.name}"] = (kind, path, _signature(path))
+                    except OSError:
+                        continue
+
+            changed = [r for r, (_, _, sig) in current.items()
+                       if r not in self.files or self.files[r]["sig"] != sig]
+            removed = [r for r in self.files if r not in current]
+            if not changed and not removed:
+                return 0
+
+            files, chunks, blocks = {}, [], []
+            # Unchanged files keep their existing rows
+            for relpath, info in self.files.items():
+                if relpath in current and relpath not in changed:
+                    start, end = info["rows"]
+                    files[relpath] = dict(info, rows=[len(chunks), len(chunks) + end - start])
+                    chunks += self.chunks[start:end]
+                    blocks.append(np.asarray(self.matrix[start:end], dtype=np.float32))
+            # Changed/new files are re-chunked and embedded in one batch
+            new_texts = []
+            for relpath in changed:
+                kind, path, sig = current[relpath]
+                try:
+                    title, pieces = chunk_file(kind, path)
+                except (OSError, ValueError):
+                    title, pieces = path.stem, []
+                files[relpath] = {"sig": sig, "title": title, "kind": kind,
+                                  "rows": [len(chunks), len(chunks) + len(pieces)]}
+                chunks += [{"file": relpath, "text": p} for p in pieces]
+                # The title is prepended so chunks deep in a transcript keep their topic
+                new_texts += [f"{title}. {p}" for p in pieces]
+            if new_texts:
+                blocks.append(self.embedder.embed(new_texts))
+
+            self.files = files
+            self.chunks = chunks
+            self.matrix = np.vstack(blocks) if blocks else np.zeros((0, self.embedder.dim), np.float32)
+            self._save()
+            return len(changed) + len(removed)
+
+    def rebuild(self):
+        with self._lock:
+            self.files, self.chunks = {}, []
+            self.matrix = np.zeros((0, self.embedder.dim), dtype=np.float32)
+            self._loaded = True
+        return self.refresh(force=True)
+
+    # ── queries ──
+    def search(self, query, k=4, min_score=None, refresh=True):
+        """Top-k chunks by cosine similarity: [{"file", "kind", "title", "text", "score"}].
+
+        min_score defaults to the embedder's own cutoff.
+        """
+        if refresh:
+            self.refresh()
+        embedder = self.embedder
+        min_score = embedder.min_score if min_score is None else min_score
+        terms = content_terms(query) if embedder.needs_overlap else set()
+        need = (len(terms) + 1) // 2
+        with self._lock:
+            n = len(self.chunks)
+            if not n or not query.strip():
+                return []
+            q = embedder.embed([query])[0]
+            scores = self.matrix @ q
+            # Look a little deeper than k: some of the best scores may fail the overlap check
+            depth = min(n, k * 5 if terms else k)
+            top = np.argpartition(-scores, depth - 1)[:depth]
+            top = top[np.argsort(-scores[top])]
+            results = []
+            for row in top:
+                score = float(scores[row])
+                if score < min_score or len(results) == k:
+                    break
+                chunk = self.chunks[row]
+                info = self.files[chunk["file"]]
+                if terms and len(terms & content_terms(f"{info['title']} {chunk['text']}")) < need:
+                    continue
+                results.append({"file": chunk["file"], "kind": info["kind"], "title": info["title"],
+                                "text": chunk["text"], "score": round(score, 3)})
+            return results
+
+    def context(self, query, k=4, max_chars=2000):
+        """Most relevant chunks for a question, formatted for an LLM prompt ("" if nothing relevant)."""
+        parts = []
+        budget = max_chars
+        for r in self.search(query, k=k):
+            block = f"[{r['title']}]\n{r['text']}"[:budget]
+            parts.append(block)
+            budget -= len(block) + 2
+            if budget <= 0:
+                break
+        return "\n\n".join(parts)
+
+    def stats(self):
+        with self._lock:
+            if not self._loaded:
+                self._load()
+            return {
+                "embedder": self.embedder.name,
+                "files": len(self.files),
+                "chunks": len(self.chunks),
+                "dim": int(self.matrix.shape[1]) if len(self.chunks) else self.embedder.dim,
+                "matrix_bytes": int(self.matrix.nbytes) if len(self.chunks) else 0,
+            }
+
+
+KB_VECTORS = VectorIndex()
+
+
+# ============================================================
+# MAIN
+# ============================================================
+def main():
+    if len(sys.argv) < 2:
+        print("Usage:")
+        print("  python kb_vectors.py search \"question\"   # Top chunks by cosine similarity")
+        print("  python kb_vectors.py rebuild             # Re-embed everything")
+        print("  python kb_vectors.py stats               # Index size")
+        return
+
+    cmd = sys.argv[1].lower()
+    if cmd == "search":
+        query = " ".join(sys.argv[2:])
+        KB_VECTORS.refresh()
+        start = time.perf_counter()
+        results = KB_VECTORS.search(query, k=5, refresh=False)
+        elapsed = (time.perf_counter() - start) * 1000
+        print(f"\n  {len(results)} chunks for {query!r} ({elapsed:.2f} ms)\n")
+        for r in results:
+            print(f"  [{r['score']:.3f}] ({r['kind']}) {r['title'][:70]}")
+            print(f"     → {r['text'][:160]}…")
+    elif cmd == "rebuild":
+        start = time.perf_counter()
+        n = KB_VECTORS.rebuild()
+        print(f"  Embedded {n} files in {time.perf_counter() - start:.2f}s → {MATRIX_FILE.parent.name}/")
+        print(f"  {KB_VECTORS.stats()}")
+    elif cmd == "stats":
+        KB_VECTORS.refresh()
+        print(f"  {KB_VECTORS.stats()}")
+    else:
+        print(f"Unknown command: {cmd}")
+
+
+if __name__ == "__main__":
+    main()
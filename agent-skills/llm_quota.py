@@ -0,0 +1,188 @@
+"""
+LLM Quota — Shared free-tier budget across every agent process
+================================================================
+The Telegram bot, chat widget, client bots, scout, research agents and the
+nightly summarizer all spend the same Groq (and Cerebras, Mistral...) free
+tier. This keeps one set of token buckets per provider in llm-quota.json,
+updated under state_store's file lock, so every process sees the same budget.
+
+    rpm → requests per minute      refills continuously
+    tpm → tokens per minute        (estimated up front, corrected by settle())
+    rpd → requests per day         rolling 24h bucket
+
+Priority classes hold part of each bucket back for more important traffic:
+
+    interactive  Telegram, chat widget, client bots — may drain a bucket to zero
+    normal       scout, live research, multi-brain  — leaves 15% untouched
+    batch        nightly summaries, bulk jobs       — leaves 40% untouched
+
+So a summarization run slows down long before it can starve a visitor.
+
+Usage:
+    from llm_quota import QUOTA, estimate_tokens
+    est = estimate_tokens(messages, max_tokens=500)
+    if QUOTA.acquire("groq", tokens=est, priority="batch", timeout=120):
+        r = requests.post(...)
+        QUOTA.settle("groq", est, r.json()["usage"]["total_tokens"])
+
+CLI:
+    python llm_quota.py status
+"""
+
+import sys
+import json
+import time
+import asyncio
+from pathlib import Path
+
+from state_store import JsonStore
+
+AGENT_DIR = Path(__file__).parent
+QUOTA_FILE = AGENT_DIR / "llm-quota.json"
+
+# Free-tier limits per provider (requests/min, tokens/min, requests/day)
+LIMITS = {
+    "groq": {"rpm": 30, "tpm": 12000, "rpd": 1000},
+    "cerebras": {"rpm": 30, "tpm": 60000, "rpd": 14400},
+    "mistral": {"rpm": 60, "tpm": 500000, "rpd": 50000},
+    "github-models": {"rpm": 15, "tpm": 8000, "rpd": 150},
+    "openrouter": {"rpm": 20, "tpm": 100000, "rpd": 50},
+    "google": {"rpm": 10, "tpm": 250000, "rpd": 250},
+}
+
+# Share of each bucket a priority class must leave for the classes above it
+RESERVE = {"interactive": 0.0, "normal": 0.15, "batch": 0.40}
+
+PERIODS = {"rpm": 60, "tpm": 60, "rpd": 86400}
+
+
+def estimate_tokens(messages_or_text, max_tokens=0):
+    """Rough prompt size (4 chars/token) plus the completion budget."""
+    if isinstance(messages_or_text, str):
+        chars = len(messages_or_text)
+    else:
+        chars = sum(len(m.get("content") or "") for m in messages_or_text)
+    return chars // 4 + max_tokens
+
+
+class QuotaManager:
+    def __init__(self, path=QUOTA_FILE, limits=None):
+        self.store = JsonStore(path, default={}, indent=2)
+        self.limits = LIMITS if limits is None else limits
+
+    def _refill(self, state, provider, now):
+        """Bring a provider's buckets up to date; creates them full on first use."""
+        limits = self.limits[provider]
+        buckets = state.setdefault(provider, {})
+        for name, capacity in limits.items():
+            level, stamp = buckets.get(name, [capacity, now])
+            rate = capacity / PERIODS[name]
+            buckets[name] = [min(capacity, level + (now - stamp) * rate), now]
+        return buckets
+
+    def _try(self, provider, tokens, priority):
+        """One locked attempt. Returns 0 if granted, else seconds until it could be."""
+        if provider not in self.limits:
+            return 0
+        reserve = RESERVE.get(priority, RESERVE["normal"])
+        cost = {"rpm": 1, "tpm": tokens, "rpd": 1}
+        wait = [0.0]
+
+        def attempt(state):
+            now = time.time()
+            buckets = self._refill(state, provider, now)
+            blocked = buckets.get("blocked_until", 0) - now
+            if blocked > 0:
+                wait[0] = blocked
+                return
+            needs = {}
+            for name, capacity in self.limits[provider].items():
+                floor = capacity * reserve
+                # Capped at what this priority may use, so an oversized request gets
+                # through once the bucket is full instead of waiting out its timeout
+                need = needs[name] = min(cost[name], capacity - floor)
+                if buckets[name][0] - need < floor:
+                    rate = capacity / PERIODS[name]
+                    wait[0] = max(wait[0], (floor + need - buckets[name][0]) / rate)
+            if wait[0] == 0:
+                for name, need in needs.items():
+                    buckets[name][0] -= need
+
+        self.store.update(attempt)
+        return wait[0]
+
+    def acquire(self, provider, tokens=0, priority="normal", timeout=0):
+        """Take one request (and `tokens`) from the provider's buckets.
+
+        Waits up to `timeout` seconds for capacity. Returns True if granted.
+        Providers without configured limits are always granted.
+        """
+        deadline = time.time() + timeout
+        while True:
+            wait = self._try(provider, tokens, priority)
+            if wait == 0:
+                return True
+            if time.time() + wait > deadline:
+                return False
+            time.sleep(min(wait, 5))
+
+    async def aacquire(self, provider, tokens=0, priority="interactive", timeout=0):
+        """acquire() for the bot's event loop — never blocks other updates while waiting."""
+        deadline = time.time() + timeout
+        while True:
+            wait = await asyncio.to_thread(self._try, provider, tokens, priority)
+            if wait == 0:
+                return True
+            if time.time() + wait > deadline:
+                return False
+            await asyncio.sleep(min(wait, 5))
+
+    def settle(self, provider, estimated, actual):
+        """Correct the tokens-per-minute bucket once the real usage is known."""
+        if provider not in self.limits or actual is None:
+            return
+
+        def apply(state):
+            buckets = self._refill(state, provider, time.time())
+            capacity = self.limits[provider]["tpm"]
+            buckets["tpm"][0] = min(capacity, buckets["tpm"][0] + estimated - actual)
+
+        self.store.update(apply)
+
+    def backoff(self, provider, seconds):
+        """Provider answered 429 — hold everyone off it for `seconds`."""
+        if provider not in self.limits:
+            return
+
+        def apply(state):
+            buckets = self._refill(state, provider, time.time())
+            buckets["blocked_until"] = max(buckets.get("blocked_until", 0), time.time() + seconds)
+
+        self.store.update(apply)
+
+    def status(self):
+        """Current bucket levels per provider (refilled to now, without writing)."""
+        state = json.loads(json.dumps(self.store.read()))
+        now = time.time()
+        out = {}
+        for provider, limits in self.limits.items():
+            buckets = self._refill(state, provider, now)
+            out[provider] = {name: f"{buckets[name][0]:.0f}/{cap}" for name, cap in limits.items()}
+            if buckets.get("blocked_until", 0) > now:
+                out[provider]["blocked_for"] = f"{buckets['blocked_until'] - now:.0f}s"
+        return out
+
+
+QUOTA = QuotaManager()
+
+
+if __name__ == "__main__":
+    if len(sys.argv) < 2 or sys.argv[1] != "status":
+        print("Usage: python llm_quota.py status")
+        sys.exit(0)
+    print(f"\n  {'Provider':<16} {'req/min':>10} {'tok/min':>14} {'req/day':>12}")
+    print(f"  {'-'*56}")
+    for provider, b in QUOTA.status().items():
+        extra = f"  (429 backoff {b['blocked_for']})" if "blocked_for" in b else ""
+        print(f"  {provider:<16} {b['rpm']:>10} {b['tpm']:>14} {b['rpd']:>12}{extra}")
+    print()
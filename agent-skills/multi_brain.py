@@ -12,11 +12,15 @@ import subprocess
 import platform
 import psutil
 import requests
-from concurrent.futures import ThreadPoolExecutor, as_completed
+import sys
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
 from datetime import datetime
 from pathlib import Path
 from dotenv import load_dotenv
 
+from usage_tracker import ROUTER
+from llm_quota import QUOTA, estimate_tokens
+
 load_dotenv(Path(__file__).parent.parent / '.env')
 
 
@@ -25,36 +29,42 @@ load_dotenv(Path(__file__).parent.parent / '.env')
 # ============================================================
 BRAINS = {
     "Groq (Llama 70B)": {
+        "provider": "groq",
         "url": "https://api.groq.com/openai/v1/chat/completions",
         "key_env": "GROQ_API_KEY",
         "model": "llama-3.3-70b-versatile",
         "style": "openai",
     },
     "Mistral (Small)": {
+        "provider": "mistral",
         "url": "https://api.mistral.ai/v1/chat/completions",
         "key_env": "MISTRAL_API_KEY",
         "model": "mistral-small-latest",
         "style": "openai",
     },
     "Cerebras (Llama 70B)": {
+        "provider": "cerebras",
         "url": "https://api.cerebras.ai/v1/chat/completions",
         "key_env": "CEREBRAS_API_KEY",
         "model": "llama-3.3-70b",
         "style": "openai",
     },
     "GitHub (GPT-4o-mini)": {
+        "provider": "github-models",
         "url": "https://models.inference.ai.azure.com/chat/completions",
         "key_env": "GITHUB_MODELS_TOKEN",
         "model": "gpt-4o-mini",
         "style": "openai",
     },
     "OpenRouter (Nemotron)": {
+        "provider": "openrouter",
         "url": "https://openrouter.ai/api/v1/chat/completions",
         "key_env": "OPENROUTER_API_KEY",
         "model": "nvidia/nemotron-nano-9b-v2:free",
         "style": "openai",
     },
     "Google (Gemini 2.5)": {
+        "provider": "google",
         "url": None,  # special handling
         "key_env": "GOOGLE_API_KEY",
         "model": "gemini-2.5-flash",
@@ -68,6 +78,11 @@ def query_brain(name, config, prompt, system_prompt="You are a helpful assistant
     key = os.getenv(config["key_env"])
     if not key:
         return {"name": name, "response": None, "error": "No API key", "time": 0}
+    provider = config["provider"]
+    if not ROUTER.allow(provider):
+        return {"name": name, "response": None, "error": "Circuit open (recent failures)", "time": 0}
+    if not QUOTA.acquire(provider, tokens=estimate_tokens(system_prompt + prompt, max_tokens=500)):
+        return {"name": name, "response": None, "error": "Free-tier quota exhausted", "time": 0}
 
     start = time.time()
     try:
@@ -81,48 +96,114 @@ def query_brain(name, config, prompt, system_prompt="You are a helpful assistant
                       ],
                       "max_tokens": 500},
                 timeout=20)
-            data = r.json()
-            if "choices" in data:
-                elapsed = time.time() - start
-                return {"name": name, "response": data["choices"][0]["message"]["content"],
-                        "time": elapsed, "error": None}
-            else:
-                return {"name": name, "response": None, "error": str(data)[:100], "time": time.time() - start}
-
-        elif config["style"] == "google":
+        else:
             r = requests.post(
                 f"https://generativelanguage.googleapis.com/v1beta/models/{config['model']}:generateContent?key={key}",
                 headers={"Content-Type": "application/json"},
                 json={"contents": [{"parts": [{"text": f"{system_prompt}\n\n{prompt}"}]}]},
                 timeout=20)
-            data = r.json()
-            if "candidates" in data:
-                elapsed = time.time() - start
-                return {"name": name, "response": data["candidates"][0]["content"]["parts"][0]["text"],
-                        "time": elapsed, "error": None}
-            else:
-                return {"name": name, "response": None, "error": str(data)[:100], "time": time.time() - start}
-
-    except Exception as e:
+    except requests.Timeout as e:
+        ROUTER.record(provider, time.time() - start, "timeout")
+        return {"name": name, "response": None, "error": str(e)[:100], "time": time.time() - start}
+    except requests.RequestException as e:
+        ROUTER.record(provider, time.time() - start, "error")
         return {"name": name, "response": None, "error": str(e)[:100], "time": time.time() - start}
 
-
-def ask_all_brains(prompt, system_prompt="You are a helpful assistant."):
-    """Send prompt to ALL brains simultaneously, return all results."""
+    elapsed = time.time() - start
+    if r.status_code == 429:
+        QUOTA.backoff(provider, float(r.headers.get("Retry-After") or 30))
+    # Recorded once, after parsing: a 200 with an unreadable body counts as an error
+    try:
+        data = r.json()
+        if config["style"] == "openai":
+            response = data["choices"][0]["message"]["content"]
+        else:
+            response = data["candidates"][0]["content"]["parts"][0]["text"]
+    except (ValueError, KeyError, IndexError, TypeError):
+        ROUTER.record(provider, elapsed, "error" if r.ok else r.status_code, r.headers.get("Retry-After"))
+        return {"name": name, "response": None, "error": r.text[:100], "time": elapsed}
+    ROUTER.record(provider, elapsed, r.status_code, r.headers.get("Retry-After"))
+    return {"name": name, "response": response, "time": elapsed, "error": None}
+
+
+def ask_routed(prompt, system_prompt="You are a helpful assistant.", task_type="chat"):
+    """Ask the fastest healthy brain for this task type, falling through to the next on failure."""
+    by_provider = {config["provider"]: (name, config) for name, config in BRAINS.items()}
+    for provider in ROUTER.ranked(task_type):
+        if provider not in by_provider:
+            continue
+        result = query_brain(*by_provider[provider], prompt, system_prompt)
+        if _valid(result):
+            return result
+    return None
+
+
+def _valid(result):
+    return bool(result.get("response") and result["response"].strip())
+
+
+def ask_all_brains(prompt, system_prompt="You are a helpful assistant.", mode="all", k=1,
+                   deadline=None, validate=_valid):
+    """Send prompt to ALL brains simultaneously.
+
+    mode="all"    — wait for every brain (or until `deadline` seconds)
+    mode="first"  — return as soon as one valid answer arrives
+    mode="quorum" — return as soon as `k` valid answers arrive (or at `deadline`)
+
+    Returns one result per brain, finished ones sorted by speed first. Brains still
+    running when the call returns get status "cancelled" (or "timeout" past the
+    deadline) with the time waited so far; their threads finish in the background.
+    """
+    needed = {"first": 1, "quorum": k}.get(mode)
+    start = time.time()
+    executor = ThreadPoolExecutor(max_workers=len(BRAINS))
+    futures = {
+        executor.submit(query_brain, name, config, prompt, system_prompt): name
+        for name, config in BRAINS.items()
+    }
     results = []
-    with ThreadPoolExecutor(max_workers=6) as executor:
-        futures = {
-            executor.submit(query_brain, name, config, prompt, system_prompt): name
-            for name, config in BRAINS.items()
-        }
-        for future in as_completed(futures):
-            results.append(future.result())
-
-    # Sort by speed
-    results.sort(key=lambda x: x["time"])
+    good = 0
+    pending = set(futures)
+    try:
+        while pending:
+            remaining = None if deadline is None else deadline - (time.time() - start)
+            if remaining is not None and remaining <= 0:
+                break
+            done, pending = wait(pending, timeout=remaining, return_when=FIRST_COMPLETED)
+            for future in done:
+                result = future.result()
+                result["status"] = "ok" if validate(result) else "error"
+                good += result["status"] == "ok"
+                results.append(result)
+            if needed and good >= needed:
+                break
+    finally:
+        executor.shutdown(wait=False, cancel_futures=True)
+
+    # Sort by speed, then report whoever we stopped waiting for
+    results.sort(key=lambda x: (x["status"] != "ok", x["time"]))
+    waited = time.time() - start
+    timed_out = deadline is not None and waited >= deadline
+    for future in pending:
+        results.append({"name": futures[future], "response": None, "time": waited,
+                        "status": "timeout" if timed_out else "cancelled",
+                        "error": f"{'Deadline' if timed_out else 'Stopped waiting'} after {waited:.2f}s"})
     return results
 
 
+def ask_fastest(prompt, system_prompt="You are a helpful assistant.", deadline=20):
+    """First valid answer from any brain, or None. Never waits on the slow ones."""
+    results = ask_all_brains(prompt, system_prompt, mode="first", deadline=deadline)
+    return results[0] if results and results[0]["status"] == "ok" else None
+
+
+def print_latency_report(results):
+    """Per-provider latency table for any ask_all_brains mode."""
+    icons = {"ok": "✓", "error": "✗", "cancelled": "…", "timeout": "⏱"}
+    for r in results:
+        print(f"  {icons.get(r['status'], '?')} {r['name']:<25} {r['time']:6.2f}s  {r['status']}")
+
+
 def get_pc_info():
     """Gather real PC system info."""
     info = {}
@@ -236,14 +317,40 @@ PC Data:
     print(f"  {'=' * 66}")
     print(f"  SPEED LEADERBOARD")
     print(f"  {'=' * 66}")
-    for i, r in enumerate(results, 1):
-        bar = "█" * int(r["time"] * 10)
-        status = "✓" if r["response"] else "✗"
-        print(f"  {i}. {status} {r['name']:<25} {r['time']:.2f}s {bar}")
+    print_latency_report(results)
 
     print(f"\n  Total cost: $0.00 (all free APIs)")
     print(f"  {'=' * 66}\n")
 
 
+def race(prompt, mode="first", k=2, deadline=20):
+    """CLI: race the brains on one prompt and show what each mode costs."""
+    start = time.time()
+    results = ask_all_brains(prompt, mode=mode, k=k, deadline=deadline)
+    elapsed = time.time() - start
+    winners = [r for r in results if r["status"] == "ok"]
+    print(f"\n  mode={mode} → {len(winners)} answer(s) in {elapsed:.2f}s\n")
+    print_latency_report(results)
+    for r in winners:
+        print(f"\n  {'─' * 66}\n  {r['name']}:\n  {'─' * 66}")
+        for line in r["response"].strip().split("\n"):
+            print(f"    {line}")
+    print()
+
+
 if __name__ == "__main__":
-    demo()
+    # python multi_brain.py                       → PC analysis demo (waits for all)
+    # python multi_brain.py first "prompt"        → first valid answer
+    # python multi_brain.py quorum 2 "prompt"     → first 2 valid answers
+    # python multi_brain.py all 8 "prompt"        → everything that answers within 8s
+    args = sys.argv[1:]
+    if not args:
+        demo()
+    elif args[0] == "first":
+        race(" ".join(args[1:]) or "Say hello in five words.", mode="first")
+    elif args[0] == "quorum":
+        race(" ".join(args[2:]) or "Say hello in five words.", mode="quorum", k=int(args[1]))
+    elif args[0] == "all":
+        race(" ".join(args[2:]) or "Say hello in five words.", mode="all", deadline=float(args[1]))
+    else:
+        print(f"Unknown mode: {args[0]} (use first, quorum or all)")
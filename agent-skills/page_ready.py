@@ -0,0 +1,328 @@
+"""
+Page Ready — Wait for what the page is doing, not for a fixed number of ms
+============================================================================
+The browser agents and IVR builders used to pad every navigation and click
+with wait_for_timeout(500..8000). Each wait here returns as soon as its
+signal is seen, and gives up quietly when its budget runs out (the old
+sleeps never failed either):
+
+    network_idle   no request matching `pattern` in flight and none started
+                   or finished for quiet_ms (websockets, event streams and
+                   long polls older than LONG_POLL_MS are ignored)
+    dom_quiet      a MutationObserver saw no DOM changes for quiet_ms
+    frame_ready    an iframe whose URL contains e.g. "client-app-automation"
+                   is attached (optionally: and shows a selector)
+    selector_ready a selector reached a state (visible, attached, hidden...)
+    settle         network_idle and dom_quiet together — the default after
+                   a navigation
+    after_click    settle with a shorter quiet window and cap
+
+Flows that know what they are waiting for pass a request `pattern`; generic
+navigation of arbitrary sites (beacons, polling, carousels never go quiet)
+should pass a cap_ms no longer than the sleep it replaces.
+
+Every wait takes an optional Deadline, so a whole flow can share one time
+budget; each wait's own cap_ms still bounds it.
+
+StepTimer records how long each step of a run took and appends the run to
+logs/step-timings.jsonl, so successive runs of the same flow can be compared.
+
+Usage:
+    from page_ready import Deadline, StepTimer, watch, settle, frame_ready
+    watch(page)                               # as soon as the page exists
+    deadline = Deadline(120)
+    timer = StepTimer("build-ivr")
+    async with timer.step("open workflows"):
+        await page.goto(url)
+        await settle(page, deadline, pattern="/workflow")
+        wf = await frame_ready(page, "client-app-automation", "button", deadline)
+    timer.save()
+
+CLI:
+    python page_ready.py report [run-name]    # last runs, step by step
+"""
+
+import sys
+import json
+import time
+import asyncio
+import weakref
+from pathlib import Path
+from collections import deque
+from contextlib import asynccontextmanager
+
+LOG_DIR = Path(__file__).parent / "logs"
+TIMINGS_FILE = LOG_DIR / "step-timings.jsonl"
+
+QUIET_MS = 500          # silence that counts as "settled"
+SETTLE_CAP_MS = 10000   # longest a single settle() may take
+WAIT_CAP_MS = 15000     # longest a frame / selector wait may take
+CLICK_QUIET_MS = 300    # UI reactions to a click are quicker than page loads
+CLICK_CAP_MS = 5000
+LONG_POLL_MS = 10000    # requests open longer than this don't block idleness
+POLL_S = 0.05
+
+# Observe structure and text, plus the attributes apps flip to show/hide
+# things — not style, which animations rewrite every frame.
+DOM_QUIET_JS = """
+([quietMs, capMs, selector]) => new Promise(resolve => {
+    const root = (selector && document.querySelector(selector)) || document.documentElement;
+    const start = performance.now();
+    let last = start, mutations = 0;
+    const observer = new MutationObserver(records => { mutations += records.length; last = performance.now(); });
+    observer.observe(root, {childList: true, subtree: true, characterData: true,
+                            attributes: true, attributeFilter: ['class', 'hidden', 'aria-hidden', 'disabled', 'open']});
+    const tick = () => {
+        const now = performance.now();
+        if (now - last >= quietMs || now - start >= capMs) {
+            observer.disconnect();
+            resolve({quiet: now - last >= quietMs, mutations, ms: Math.round(now - start)});
+        } else {
+            setTimeout(tick, Math.min(50, quietMs));
+        }
+    };
+    setTimeout(tick, Math.min(50, quietMs));
+})
+"""
+
+
+class Deadline:
+    """One time budget shared by every wait in a flow."""
+
+    def __init__(self, seconds):
+        self.seconds = seconds
+        self.end = time.monotonic() + seconds
+
+    def remaining(self):
+        return max(0.0, self.end - time.monotonic())
+
+    @property
+    def expired(self):
+        return self.remaining() <= 0
+
+    def ms(self, cap_ms=None):
+        """Milliseconds left (at least 1, at most cap_ms) — ready to pass as a Playwright timeout."""
+        left = int(self.remaining() * 1000)
+        if cap_ms is not None:
+            left = min(left, cap_ms)
+        return max(1, left)
+
+
+def _scope(deadline, cap_ms):
+    """The tighter of the shared deadline and this wait's own cap."""
+    local = Deadline(cap_ms / 1000)
+    if deadline is not None:
+        local.end = min(local.end, deadline.end)
+    return local
+
+
+def _matches(pattern, url):
+    if pattern is None:
+        return True
+    if isinstance(pattern, str):
+        return pattern in url
+    return bool(pattern.search(url))
+
+
+# ============================================================
+# NETWORK
+# ============================================================
+class _NetworkWatch:
+    """Requests in flight on one page, and when each started or ended."""
+
+    def __init__(self, page):
+        self.inflight = {}                 # request → start time
+        self.events = deque(maxlen=500)    # (time, url) of recent starts / ends
+        page.on("request", self._started)
+        page.on("requestfinished", self._ended)
+        page.on("requestfailed", self._ended)
+
+    def _started(self, request):
+        if request.resource_type in ("websocket", "eventsource"):
+            return  # never "finish" — would keep the page busy forever
+        now = time.monotonic()
+        self.inflight[request] = now
+        self.events.append((now, request.url))
+
+    def _ended(self, request):
+        if self.inflight.pop(request, None) is not None:
+            self.events.append((time.monotonic(), request.url))
+
+    def busy(self, pattern, since, quiet_s, long_poll_s):
+        """True while a matching request is open, or one moved within the last quiet_s."""
+        now = time.monotonic()
+        for request, started in list(self.inflight.items()):
+            if now - started < long_poll_s and _matches(pattern, request.url):
+                return True
+        last = since
+        for at, url in reversed(self.events):
+            if at <= since:
+                break
+            if _matches(pattern, url):
+                last = at
+                break
+        return now - last < quiet_s
+
+
+_WATCHES = weakref.WeakKeyDictionary()
+
+
+def watch(page):
+    """Start tracking requests on `page`. Idempotent; call it as soon as the page exists
+    so requests fired by the first navigation or click are seen."""
+    if page not in _WATCHES:
+        _WATCHES[page] = _NetworkWatch(page)
+    return _WATCHES[page]
+
+
+async def network_idle(page, deadline=None, pattern=None, quiet_ms=QUIET_MS, cap_ms=SETTLE_CAP_MS,
+                       long_poll_ms=LONG_POLL_MS):
+    """Wait until no request matching `pattern` (substring or compiled regex; None = any)
+    has been open or moved for quiet_ms. Returns False if the budget ran out first.
+
+    Raise long_poll_ms when waiting on a request that is known to be slow.
+    """
+    net = watch(page)
+    scope = _scope(deadline, cap_ms)
+    since = time.monotonic()
+    while net.busy(pattern, since, quiet_ms / 1000, long_poll_ms / 1000):
+        if scope.expired:
+            return False
+        await asyncio.sleep(POLL_S)
+    return True
+
+
+# ============================================================
+# DOM
+# ============================================================
+async def dom_quiet(target, deadline=None, quiet_ms=QUIET_MS, cap_ms=SETTLE_CAP_MS, selector=None):
+    """Wait until the DOM of a page or frame (or the subtree under `selector`) stops
+    changing for quiet_ms. Returns False if the budget ran out or the page navigated away."""
+    budget = _scope(deadline, cap_ms).ms()
+    try:
+        result = await asyncio.wait_for(
+            target.evaluate(DOM_QUIET_JS, [quiet_ms, budget, selector]), timeout=budget / 1000 + 2)
+        return bool(result and result.get("quiet"))
+    except Exception:
+        return False  # execution context destroyed by a navigation, frame detached, ...
+
+
+async def selector_ready(target, selector, deadline=None, state="visible", cap_ms=WAIT_CAP_MS):
+    """Wait for `selector` in a page or frame to reach `state`. Returns True/False."""
+    try:
+        await target.wait_for_selector(selector, state=state, timeout=_scope(deadline, cap_ms).ms())
+        return True
+    except Exception:
+        return False
+
+
+async def frame_ready(page, url_part, selector=None, deadline=None, cap_ms=WAIT_CAP_MS):
+    """The first frame whose URL contains `url_part` (or any of a tuple of them) — waiting
+    for it to attach and, with `selector`, to show it. None if that doesn't happen in time."""
+    parts = (url_part,) if isinstance(url_part, str) else tuple(url_part)
+    scope = _scope(deadline, cap_ms)
+    changed = asyncio.Event()
+    on_frame = lambda frame: changed.set()
+    page.on("frameattached", on_frame)
+    page.on("framenavigated", on_frame)
+    try:
+        while True:
+            frame = next((f for f in page.frames if any(p in f.url for p in parts)), None)
+            if frame or scope.expired:
+                break
+            changed.clear()
+            try:
+                await asyncio.wait_for(changed.wait(), timeout=scope.remaining())
+            except asyncio.TimeoutError:
+                pass
+    finally:
+        page.remove_listener("frameattached", on_frame)
+        page.remove_listener("framenavigated", on_frame)
+    if frame and selector and not await selector_ready(frame, selector, scope):
+        return None
+    return frame
+
+
+async def settle(page, deadline=None, pattern=None, quiet_ms=QUIET_MS, cap_ms=SETTLE_CAP_MS):
+    """Network idle (for `pattern`) and a quiet DOM, watched together — what a fixed
+    sleep after a navigation or click was standing in for. True if both were seen."""
+    scope = _scope(deadline, cap_ms)
+    idle, quiet = await asyncio.gather(network_idle(page, scope, pattern, quiet_ms, cap_ms),
+                                       dom_quiet(page, scope, quiet_ms, cap_ms))
+    return idle and quiet
+
+
+async def after_click(page, deadline=None, pattern=None, cap_ms=CLICK_CAP_MS):
+    """settle() for the UI's reaction to a click, input or key press."""
+    return await settle(page, deadline, pattern, quiet_ms=CLICK_QUIET_MS, cap_ms=cap_ms)
+
+
+# ============================================================
+# STEP TIMINGS
+# ============================================================
+class StepTimer:
+    """Wall time of each named step in one run of a flow."""
+
+    def __init__(self, run):
+        self.run = run
+        self.started = time.time()
+        self.steps = []
+
+    @asynccontextmanager
+    async def step(self, name):
+        started = time.monotonic()
+        ok = False
+        try:
+            yield
+            ok = True
+        finally:
+            self.steps.append({"step": name, "ms": round((time.monotonic() - started) * 1000), "ok": ok})
+
+    def total_ms(self):
+        return round((time.time() - self.started) * 1000)
+
+    def report(self, previous=None):
+        """Table of steps; with a previous run of the same flow, the change per step."""
+        before = {s["step"]: s["ms"] for s in (previous or {}).get("steps", [])}
+        lines = [f"  {self.run} — {self.total_ms() / 1000:.1f}s"]
+        for s in self.steps:
+            delta = f"  ({s['ms'] - before[s['step']]:+d} ms)" if s["step"] in before else ""
+            lines.append(f"    {'ok ' if s['ok'] else 'ERR'} {s['step']:<36} {s['ms']:>7} ms{delta}")
+        return "\n".join(lines)
+
+    def save(self, path=TIMINGS_FILE):
+        """Append this run to the timings log and return the report against the last run."""
+        previous = next((r for r in reversed(load_runs(path)) if r["run"] == self.run), None)
+        record = {"run": self.run, "at": time.strftime("%Y-%m-%dT%H:%M:%S"),
+                  "total_ms": self.total_ms(), "steps": self.steps}
+        path.parent.mkdir(parents=True, exist_ok=True)
+        with open(path, "a", encoding="utf-8") as f:
+            f.write(json.dumps(record) + "\n")
+        return self.report(previous)
+
+
+def load_runs(path=TIMINGS_FILE):
+    if not path.exists():
+        return []
+    runs = []
+    for line in path.read_text(encoding="utf-8").splitlines():
+        try:
+            runs.append(json.loads(line))
+        except ValueError:
+            continue
+    return runs
+
+
+if __name__ == "__main__":
+    if len(sys.argv) < 2 or sys.argv[1] != "report":
+        print("Usage: python page_ready.py report [run-name]")
+        sys.exit(0)
+    name = sys.argv[2] if len(sys.argv) > 2 else None
+    runs = [r for r in load_runs() if name is None or r["run"] == name][-5:]
+    if not runs:
+        print("  No step timings recorded yet.")
+    for r in runs:
+        print(f"\n  {r['at']}  {r['run']}  {r['total_ms'] / 1000:.1f}s")
+        for s in r["steps"]:
+            print(f"    {'ok ' if s['ok'] else 'ERR'} {s['step']:<36} {s['ms']:>7} ms")
+    print()
@@ -0,0 +1,228 @@
+"""
+Reddit Client — One pooled, rate-aware reader for every Reddit feed
+=====================================================================
+ghl_live_research (r/gohighlevel, r/HighLevel) and xai_scout (site-wide
+search) both read Reddit's public JSON. They share this client:
+
+- one requests.Session with a keep-alive pool, so a sweep reuses connections
+- subreddits / queries fetched concurrently (search_all, hot_all)
+- pacing from Reddit's own X-Ratelimit-Remaining / -Reset headers and
+  Retry-After on 429, instead of fixed sleeps between calls; a wait longer
+  than MAX_RETRY_WAIT is never slept out — the last stored copy (or
+  nothing) is returned instead
+- responses go through http_cache (conditional GET + min_ttl)
+- one post record for everyone, remembered by post ID
+
+Post record:
+    {id, title, selftext, subreddit, author, score, num_comments,
+     url, created, created_utc, stickied}
+
+Usage:
+    from reddit_client import REDDIT
+    REDDIT.search("IVR setup", "gohighlevel", limit=10)
+    REDDIT.hot("gohighlevel", limit=15)
+    REDDIT.search_all("workflow", ["gohighlevel", "HighLevel"])   # merged, deduped by ID
+    REDDIT.hot_all(["gohighlevel", "HighLevel"])                  # {subreddit: posts}
+
+CLI:
+    python reddit_client.py sweep     # time a full hot + search sweep
+"""
+
+import sys
+import time
+import threading
+from datetime import datetime
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from http_cache import HTTP_CACHE
+
+USER_AGENT = "ExposureSolutions-GHL-Research/1.0"
+BASE_URL = "https://www.reddit.com"
+MAX_WORKERS = 4
+DEFAULT_TTL = 300      # seconds a listing is reused before revalidating
+MAX_RETRY_WAIT = 30    # never sleep longer than this for the rate budget
+MAX_POSTS = 5000       # posts remembered by ID
+
+
+def log(tag, msg):
+    ts = time.strftime("%H:%M:%S")
+    print(f"  [{ts}] [{tag}] {msg}")
+
+
+def to_post(data):
+    """Reddit 'thing' data → the shared post record."""
+    created = data.get("created_utc", 0)
+    return {
+        "id": data.get("id", ""),
+        "title": data.get("title", ""),
+        "selftext": (data.get("selftext") or "")[:500],
+        "subreddit": data.get("subreddit", ""),
+        "author": data.get("author", ""),
+        "score": data.get("score", 0),
+        "num_comments": data.get("num_comments", 0),
+        "url": f"https://reddit.com{data.get('permalink', '')}",
+        "created": datetime.fromtimestamp(created).strftime("%Y-%m-%d"),
+        "created_utc": created,
+        "stickied": bool(data.get("stickied")),
+    }
+
+
+class RatePacer:
+    """Tracks Reddit's remaining-request budget across threads and waits when it runs out."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.remaining = None  # unknown until the first response
+        self.reset_at = 0.0
+        self.blocked_until = 0.0  # set by a 429; other responses can't lift it early
+
+    def wait(self, max_wait=MAX_RETRY_WAIT):
+        """Claim one request from the budget, sleeping until it allows one.
+        Returns False straight away if that would take longer than max_wait."""
+        while True:
+            with self._lock:
+                now = time.time()
+                if now < self.blocked_until:
+                    delay = self.blocked_until - now
+                elif self.remaining is None or self.remaining >= 1 or now >= self.reset_at:
+                    if self.remaining is not None:
+                        self.remaining -= 1  # claim one before the request goes out
+                    return True
+                else:
+                    delay = self.reset_at - now
+            if delay > max_wait:
+                return False
+            time.sleep(delay)
+
+    def update(self, headers):
+        remaining = headers.get("X-Ratelimit-Remaining")
+        reset = headers.get("X-Ratelimit-Reset")
+        if remaining is None or reset is None:
+            return
+        with self._lock:
+            self.remaining = float(remaining)
+            self.reset_at = time.time() + float(reset)
+
+    def block(self, seconds):
+        with self._lock:
+            self.blocked_until = max(self.blocked_until, time.time() + seconds)
+
+
+class RedditClient:
+    def __init__(self, user_agent=USER_AGENT, max_workers=MAX_WORKERS):
+        self.session = requests.Session()
+        self.session.headers["User-Agent"] = user_agent
+        adapter = HTTPAdapter(pool_connections=2, pool_maxsize=max_workers)
+        self.session.mount("https://", adapter)
+        self.max_workers = max_workers
+        self.pacer = RatePacer()
+        self.posts = OrderedDict()  # id → latest record
+        self._lock = threading.Lock()
+
+    def _remember(self, posts):
+        with self._lock:
+            for p in posts:
+                self.posts[p["id"]] = p
+                self.posts.move_to_end(p["id"])
+            while len(self.posts) > MAX_POSTS:
+                self.posts.popitem(last=False)
+
+    def post(self, post_id):
+        """Last-seen record for a post ID, or None."""
+        with self._lock:
+            return self.posts.get(post_id)
+
+    def _posts(self, r):
+        try:
+            children = r.json().get("data", {}).get("children", [])
+        except ValueError:
+            log("REDDIT", "  Unreadable response")
+            return []
+        posts = [to_post(c.get("data", {})) for c in children if c.get("kind", "t3") == "t3"]
+        self._remember(posts)
+        return posts
+
+    def _rate_limited(self, url, params):
+        """The rate budget is out for longer than MAX_RETRY_WAIT: last stored copy, or []."""
+        r = HTTP_CACHE.stale(url, params)
+        log("REDDIT", f"  Rate limited — {'serving the last stored copy' if r else 'skipped'}")
+        return self._posts(r) if r else []
+
+    def listing(self, path, params, timeout=15, min_ttl=DEFAULT_TTL):
+        """GET a listing (e.g. '/r/x/hot.json') and return post records. [] on any failure."""
+        url = f"{BASE_URL}{path}"
+        for attempt in range(2):
+            if not self.pacer.wait():
+                return self._rate_limited(url, params)
+            try:
+                r = HTTP_CACHE.get(url, params=params, timeout=timeout, min_ttl=min_ttl, session=self.session)
+            except requests.RequestException as e:
+                log("REDDIT", f"  Error: {str(e)[:100]}")
+                return []
+            self.pacer.update(r.headers)
+            if r.upstream_status == 429:
+                delay = float(r.headers.get("Retry-After") or r.headers.get("X-Ratelimit-Reset") or 5)
+                self.pacer.block(delay)
+                if r.cache == "stale":
+                    log("REDDIT", "  Rate limited — serving the last stored copy")
+                    return self._posts(r)
+                if attempt == 0 and delay <= MAX_RETRY_WAIT:
+                    log("REDDIT", f"  Rate limited — retrying in {delay:.0f}s")
+                    continue
+                return self._rate_limited(url, params)
+            if not r.ok:
+                log("REDDIT", f"  HTTP {r.status_code}")
+                return []
+            return self._posts(r)
+        return []
+
+    def search(self, query, subreddit="all", limit=10, sort="relevance", t="year", timeout=15, min_ttl=DEFAULT_TTL):
+        params = {"q": query, "sort": sort, "t": t, "limit": limit}
+        if subreddit != "all":
+            params["restrict_sr"] = "on"
+        return self.listing(f"/r/{subreddit}/search.json", params, timeout, min_ttl)
+
+    def hot(self, subreddit, limit=15, include_stickied=False, timeout=15, min_ttl=DEFAULT_TTL):
+        posts = self.listing(f"/r/{subreddit}/hot.json", {"limit": limit}, timeout, min_ttl)
+        return posts if include_stickied else [p for p in posts if not p["stickied"]]
+
+    def _map(self, fn, items):
+        with ThreadPoolExecutor(max_workers=min(self.max_workers, max(1, len(items)))) as executor:
+            return list(executor.map(fn, items))
+
+    def search_all(self, query, subreddits, limit=10, **kwargs):
+        """Search several subreddits at once; merged, deduped by post ID, highest score first."""
+        merged = {}
+        for posts in self._map(lambda sub: self.search(query, sub, limit, **kwargs), subreddits):
+            for p in posts:
+                merged.setdefault(p["id"], p)
+        return sorted(merged.values(), key=lambda p: p["score"], reverse=True)
+
+    def hot_all(self, subreddits, limit=15, **kwargs):
+        """Hot listings for several subreddits at once → {subreddit: posts}."""
+        return dict(zip(subreddits, self._map(lambda sub: self.hot(sub, limit, **kwargs), subreddits)))
+
+
+REDDIT = RedditClient()
+
+
+if __name__ == "__main__":
+    if len(sys.argv) < 2 or sys.argv[1] != "sweep":
+        print("Usage: python reddit_client.py sweep")
+        sys.exit(0)
+    subs = ["gohighlevel", "HighLevel"]
+    queries = ["workflow automation", "IVR", "voice AI", "calendar booking"]
+    started = time.time()
+    jobs = [("hot", s) for s in subs] + [(q, s) for q in queries for s in subs]
+    results = REDDIT._map(
+        lambda job: REDDIT.hot(job[1], min_ttl=0) if job[0] == "hot" else REDDIT.search(job[0], job[1], min_ttl=0),
+        jobs)
+    elapsed = time.time() - started
+    for (what, sub), posts in zip(jobs, results):
+        print(f"  r/{sub:<12} {what:<22} {len(posts)} posts")
+    print(f"\n  {len(jobs)} requests in {elapsed:.1f}s, "
+          f"{len(REDDIT.posts)} distinct posts, rate budget left: {REDDIT.pacer.remaining}\n")
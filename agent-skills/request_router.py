@@ -0,0 +1,366 @@
+"""
+Request Router — Resource profiles and a static-asset store for Playwright pages
+==================================================================================
+Scraping a page for its text still downloaded every image, font, video,
+analytics script and ad on it. RequestRouter sits on a page or context
+(page.route / context.route) and decides per request:
+
+    profile      blocks
+    ---------    --------------------------------------------------------
+    text-only    images, media, fonts, text tracks, beacons + trackers
+    no-media     audio/video, beacons + trackers (screenshots still look right)
+    full         nothing
+
+Stylesheets and scripts always load — visibility checks, inner_text and
+SPAs need them — but together with fonts and images they go through the
+asset store: a content-addressed blob directory (asset-cache/) with a
+SQLite index of URL → blob, validators and freshness. The store is shared by
+every profile and login, so it only keeps what a shared cache may: nothing
+requested with Authorization, marked private / no-store, or varying by
+Cookie. Cache-Control immutable is reused for a week without asking, and so
+are fingerprinted URLs (app.3f9a1c2e.js) that don't say otherwise; an explicit
+max-age or no-cache wins over the URL's shape, and is reused for that long,
+then revalidated with If-None-Match / If-Modified-Since. The store is capped
+at MAX_STORE_BYTES, least recently used first out.
+
+Usage:
+    from request_router import RequestRouter
+    router = RequestRouter("text-only")
+    await router.attach(page)          # or a BrowserContext
+    router.profile = "full"            # switch for the next navigation
+    router.stats()                     # blocked / served from store / fetched
+
+CLI:
+    python request_router.py bench https://example.com [more urls]   # bytes + time per profile
+    python request_router.py stats
+    python request_router.py clear
+"""
+
+import re
+import sys
+import json
+import time
+import shutil
+import sqlite3
+import hashlib
+import asyncio
+import threading
+from pathlib import Path
+from urllib.parse import urlparse
+
+from http_cache import cache_control
+from state_store import atomic_write
+
+AGENT_DIR = Path(__file__).parent
+STORE_DIR = AGENT_DIR / "asset-cache"
+
+MAX_STORE_BYTES = 300 * 1024 * 1024
+MAX_ASSET_BYTES = 8 * 1024 * 1024
+IMMUTABLE_TTL = 7 * 86400
+
+PROFILES = {
+    "text-only": {"block_types": {"image", "media", "font", "texttrack", "ping", "manifest"}, "block_trackers": True},
+    "no-media": {"block_types": {"media", "texttrack", "ping"}, "block_trackers": True},
+    "full": {"block_types": set(), "block_trackers": False},
+}
+DEFAULT_PROFILE = "full"
+
+STORABLE_TYPES = {"stylesheet", "script", "font", "image"}
+
+# Headers a cached asset needs to be usable again (CORS matters for fonts and module scripts)
+KEPT_HEADERS = ("content-type", "access-control-allow-origin", "access-control-allow-credentials",
+                "timing-allow-origin", "cache-control")
+
+TRACKER_DOMAINS = {
+    "google-analytics.com", "googletagmanager.com", "doubleclick.net", "googlesyndication.com",
+    "googleadservices.com", "adservice.google.com", "connect.facebook.net", "facebook.com/tr",
+    "hotjar.com", "hotjar.io", "segment.io", "cdn.segment.com", "mixpanel.com", "amplitude.com",
+    "fullstory.com", "clarity.ms", "bat.bing.com", "ads.linkedin.com", "snap.licdn.com",
+    "analytics.tiktok.com", "scorecardresearch.com", "quantserve.com", "taboola.com",
+    "outbrain.com", "criteo.com", "criteo.net", "adsrvr.org", "amazon-adsystem.com",
+    "js-agent.newrelic.com", "nr-data.net", "heapanalytics.com", "mouseflow.com", "crazyegg.com",
+}
+
+FINGERPRINTED = re.compile(r"[.\-_/][0-9a-f]{8,}[.\-_/]|[?&]v(er)?=[0-9a-f]{6,}", re.I)
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS assets (
+    url TEXT PRIMARY KEY,
+    sha TEXT NOT NULL,
+    headers TEXT NOT NULL,
+    etag TEXT,
+    last_modified TEXT,
+    stored_at REAL NOT NULL,
+    max_age REAL NOT NULL,
+    last_used REAL NOT NULL,
+    size INTEGER NOT NULL
+);
+CREATE INDEX IF NOT EXISTS assets_sha ON assets (sha);
+CREATE INDEX IF NOT EXISTS assets_used ON assets (last_used);
+"""
+
+
+def is_tracker(url):
+    parsed = urlparse(url)
+    host = parsed.hostname or ""
+    for domain in TRACKER_DOMAINS:
+        name, _, path = domain.partition("/")
+        if (host == name or host.endswith("." + name)) and (not path or parsed.path.startswith("/" + path)):
+            return True
+    return False
+
+
+def _freshness(url, headers):
+    """Seconds a stored response may be reused without revalidating, or None if it mustn't be stored."""
+    cc = cache_control(headers.get("cache-control"))
+    if "no-store" in cc or "private" in cc:
+        return None
+    vary = {v.strip().lower() for v in (headers.get("vary") or "").split(",")}
+    if vary & {"*", "cookie", "authorization"}:
+        return None  # per-user variants: one shared copy would leak between logins
+    if "no-cache" in cc:
+        return 0.0
+    if "immutable" in cc:
+        return IMMUTABLE_TTL
+    if "max-age" in cc:
+        try:
+            return max(0.0, float(cc["max-age"]) - float(headers.get("age", 0) or 0))
+        except (TypeError, ValueError):
+            return 0.0
+    return IMMUTABLE_TTL if FINGERPRINTED.search(url) else 0.0
+
+
+class AssetStore:
+    """Static assets by URL, bodies stored once per content hash."""
+
+    def __init__(self, root=STORE_DIR, max_bytes=MAX_STORE_BYTES):
+        self.root = Path(root)
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._db = None
+
+    @property
+    def db(self):
+        if self._db is None:
+            (self.root / "blobs").mkdir(parents=True, exist_ok=True)
+            self._db = sqlite3.connect(str(self.root / "index.db"), timeout=10, check_same_thread=False)
+            self._db.execute("PRAGMA journal_mode=WAL")
+            self._db.executescript(SCHEMA)
+        return self._db
+
+    def _blob(self, sha):
+        return self.root / "blobs" / sha[:2] / sha
+
+    def lookup(self, url):
+        """(body, headers, fresh, etag, last_modified) or None."""
+        with self._lock:
+            row = self.db.execute(
+                "SELECT sha, headers, etag, last_modified, stored_at, max_age FROM assets WHERE url = ?",
+                (url,)).fetchone()
+        if not row:
+            return None
+        sha, headers, etag, last_modified, stored_at, max_age = row
+        try:
+            body = self._blob(sha).read_bytes()
+        except OSError:
+            self.forget(url)
+            return None
+        with self._lock, self.db:
+            self.db.execute("UPDATE assets SET last_used = ? WHERE url = ?", (time.time(), url))
+        return body, json.loads(headers), time.time() - stored_at < max_age, etag, last_modified
+
+    def put(self, url, body, headers, max_age):
+        sha = hashlib.sha256(body).hexdigest()
+        blob = self._blob(sha)
+        if not blob.exists():
+            blob.parent.mkdir(parents=True, exist_ok=True)
+            atomic_write(blob, body, durable=False)  # unique temp name: pages often share assets
+        kept = {k: v for k, v in headers.items() if k in KEPT_HEADERS}
+        now = time.time()
+        with self._lock, self.db:
+            self.db.execute("INSERT OR REPLACE INTO assets VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                            (url, sha, json.dumps(kept), headers.get("etag"), headers.get("last-modified"),
+                             now, max_age, now, len(body)))
+        self._prune()
+
+    def refresh(self, url, max_age):
+        """A 304 confirmed the stored copy — start its freshness over."""
+        with self._lock, self.db:
+            self.db.execute("UPDATE assets SET stored_at = ?, max_age = ? WHERE url = ?", (time.time(), max_age, url))
+
+    def forget(self, url):
+        with self._lock, self.db:
+            self.db.execute("DELETE FROM assets WHERE url = ?", (url,))
+
+    def _prune(self):
+        """Drop least recently used URLs until the distinct blobs fit in max_bytes."""
+        with self._lock:
+            total = self.db.execute(
+                "SELECT COALESCE(SUM(size), 0) FROM (SELECT sha, MAX(size) AS size FROM assets GROUP BY sha)").fetchone()[0]
+            if total <= self.max_bytes:
+                return
+            victims = self.db.execute("SELECT url, sha, size FROM assets ORDER BY last_used").fetchall()
+            with self.db:
+                for url, sha, size in victims:
+                    if total <= self.max_bytes * 0.9:
+                        break
+                    self.db.execute("DELETE FROM assets WHERE url = ?", (url,))
+                    if not self.db.execute("SELECT 1 FROM assets WHERE sha = ? LIMIT 1", (sha,)).fetchone():
+                        self._blob(sha).unlink(missing_ok=True)
+                        total -= size
+
+    def stats(self):
+        with self._lock:
+            urls, distinct, stored = self.db.execute(
+                "SELECT COUNT(*), COUNT(DISTINCT sha), "
+                "COALESCE((SELECT SUM(size) FROM (SELECT MAX(size) AS size FROM assets GROUP BY sha)), 0) "
+                "FROM assets").fetchone()
+        return {"urls": urls, "blobs": distinct, "stored_bytes": stored}
+
+    def clear(self):
+        with self._lock:
+            if self._db is not None:
+                self._db.close()
+                self._db = None
+            shutil.rmtree(self.root, ignore_errors=True)
+
+
+ASSET_STORE = AssetStore()
+
+
+class RequestRouter:
+    """Blocks what the current profile doesn't need and serves static assets from the store."""
+
+    def __init__(self, profile=DEFAULT_PROFILE, store=ASSET_STORE):
+        if profile not in PROFILES:
+            raise ValueError(f"Unknown resource profile {profile!r} — one of {', '.join(PROFILES)}")
+        self.profile = profile
+        self.store = store
+        self.counters = {"blocked_type": 0, "blocked_tracker": 0, "store_fresh": 0, "store_revalidated": 0,
+                         "fetched": 0, "passed": 0, "bytes_from_store": 0, "bytes_fetched": 0}
+
+    async def attach(self, target):
+        """Route every request of a Page or BrowserContext through this router."""
+        await target.route("**/*", self._handle)
+        return self
+
+    async def detach(self, target):
+        await target.unroute("**/*", self._handle)
+
+    async def _handle(self, route):
+        request = route.request
+        rules = PROFILES[self.profile]
+        if request.resource_type in rules["block_types"]:
+            self.counters["blocked_type"] += 1
+            return await route.abort("blockedbyclient")
+        if rules["block_trackers"] and is_tracker(request.url):
+            self.counters["blocked_tracker"] += 1
+            return await route.abort("blockedbyclient")
+        if request.method != "GET" or request.resource_type not in STORABLE_TYPES \
+                or not request.url.startswith(("http://", "https://")) or "authorization" in request.headers:
+            self.counters["passed"] += 1
+            return await route.continue_()
+        try:
+            await self._from_store(route, request.url)
+        except Exception:
+            # Page closed mid-request, network error in fetch() ... let the browser handle it
+            try:
+                await route.continue_()
+            except Exception:
+                pass
+
+    async def _from_store(self, route, url):
+        cached = await asyncio.to_thread(self.store.lookup, url)
+        headers = {}
+        if cached:
+            body, stored_headers, fresh, etag, last_modified = cached
+            if fresh:
+                self.counters["store_fresh"] += 1
+                self.counters["bytes_from_store"] += len(body)
+                return await route.fulfill(status=200, headers=stored_headers, body=body)
+            if etag:
+                headers["if-none-match"] = etag
+            if last_modified:
+                headers["if-modified-since"] = last_modified
+
+        response = await route.fetch(headers={**route.request.headers, **headers})
+        if response.status == 304 and cached:
+            max_age = _freshness(url, response.headers)
+            if max_age is None:
+                await asyncio.to_thread(self.store.forget, url)
+            else:
+                await asyncio.to_thread(self.store.refresh, url, max_age)
+            self.counters["store_revalidated"] += 1
+            self.counters["bytes_from_store"] += len(body)
+            return await route.fulfill(status=200, headers=stored_headers, body=body)
+
+        payload = await response.body()
+        self.counters["fetched"] += 1
+        self.counters["bytes_fetched"] += len(payload)
+        max_age = _freshness(url, response.headers)
+        if response.status == 200 and max_age is not None and len(payload) <= MAX_ASSET_BYTES:
+            await asyncio.to_thread(self.store.put, url, payload, response.headers, max_age)
+        await route.fulfill(response=response, body=payload)
+
+    def stats(self):
+        return dict(self.counters, profile=self.profile)
+
+
+# ============================================================
+# BENCHMARK — same URLs under each profile
+# ============================================================
+async def bench(urls):
+    """Load each URL under every profile (cold store, then warm) and print bytes and time."""
+    from playwright.async_api import async_playwright
+    from page_ready import watch, settle
+
+    async def transferred(request):
+        try:
+            sizes = await request.sizes()
+            return sizes["responseBodySize"] + sizes["responseHeadersSize"]
+        except Exception:
+            return 0
+
+    ASSET_STORE.clear()
+    async with async_playwright() as pw:
+        browser = await pw.chromium.launch(headless=True)
+        print(f"\n  {'profile':<16} {'requests':>9} {'blocked':>8} {'from store':>11} {'network KB':>11} {'load s':>7}")
+        print(f"  {'-' * 67}")
+        for run in ("full (no router)", "full", "no-media", "text-only", "text-only (warm)"):
+            profile = run.split(" ")[0]
+            context = await browser.new_context()
+            page = await context.new_page()
+            router = None if "no router" in run else await RequestRouter(profile).attach(page)
+            watch(page)
+            finished = []
+            page.on("requestfinished", lambda r: finished.append(r))
+            started = time.time()
+            for url in urls:
+                try:
+                    await page.goto(url, wait_until="load", timeout=30000)
+                except Exception as e:
+                    print(f"  {url}: {str(e)[:80]}")
+                await settle(page)
+            elapsed = time.time() - started
+            network = sum(await asyncio.gather(*(transferred(r) for r in finished)))
+            s = router.stats() if router else {}
+            blocked = s.get("blocked_type", 0) + s.get("blocked_tracker", 0)
+            print(f"  {run:<16} {len(finished):>9} {blocked:>8} {s.get('store_fresh', 0) + s.get('store_revalidated', 0):>11} "
+                  f"{(network - s.get('bytes_from_store', 0)) / 1024:>11.0f} {elapsed:>7.1f}")
+            await context.close()
+        await browser.close()
+    print()
+
+
+if __name__ == "__main__":
+    cmd = sys.argv[1] if len(sys.argv) > 1 else ""
+    if cmd == "bench" and len(sys.argv) > 2:
+        asyncio.run(bench(sys.argv[2:]))
+    elif cmd == "stats":
+        s = ASSET_STORE.stats()
+        print(f"\n  Asset store: {s['urls']} URLs → {s['blobs']} blobs, {s['stored_bytes'] / 1024 / 1024:.1f} MB\n")
+    elif cmd == "clear":
+        ASSET_STORE.clear()
+        print("  Asset store cleared.")
+    else:
+        print("Usage: python request_router.py [bench URL...|stats|clear]")
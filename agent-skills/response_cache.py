@@ -0,0 +1,170 @@
+"""
+Response Cache — Semantic FAQ cache for LLM answers
+=====================================================
+Website visitors and client-bot users ask the same few questions over and
+over ("what is wholesaling", "how do I get started"). This cache answers
+repeats without an LLM round-trip.
+
+    key    = client + system prompt + normalized question
+    exact  → normalized text matches a cached question
+    near   → MinHash (character 3-gram) similarity ≥ threshold
+    expiry → TTL per entry, LRU eviction past max_entries
+
+Only cache standalone questions. A follow-up whose meaning depends on
+earlier turns must go to the LLM. So must anything carrying lead details —
+digits (addresses, phone numbers, prices) or an email: "sell my house at 1234
+Oak St" and "... 1284 Oak St" are near-identical text but different people,
+and one visitor must never get the answer written for another's details.
+
+Usage:
+    from response_cache import ResponseCache
+    cache = ResponseCache(threshold=0.8, ttl=86400, max_entries=1000)
+    answer = cache.get("ddwl", system_prompt, question)
+    if answer is None:
+        answer = call_llm(...)
+        cache.put("ddwl", system_prompt, question, answer)
+    cache.stats()   # hits, misses, llm_calls_avoided_pct
+"""
+
+import re
+import time
+import hashlib
+import threading
+from collections import OrderedDict
+
+NUM_PERM = 64
+_MERSENNE = (1 << 61) - 1
+_PERMS = [
+    (int.from_bytes(hashlib.blake2b(f"a{i}".encode(), digest_size=8).digest(), "big") % _MERSENNE | 1,
+     int.from_bytes(hashlib.blake2b(f"b{i}".encode(), digest_size=8).digest(), "big") % _MERSENNE)
+    for i in range(NUM_PERM)
+]
+
+_CONTRACTIONS = {
+    "what's": "what is", "whats": "what is", "how's": "how is", "it's": "it is",
+    "i'm": "i am", "don't": "do not", "can't": "cannot", "you're": "you are",
+    "where's": "where is", "who's": "who is",
+}
+_FILLER = {"hey", "hi", "hello", "please", "pls", "thanks", "thank", "um", "uh", "so", "just", "lilly"}
+_PERSONAL = re.compile(r"\d|[\w.+-]+@[\w-]+\.\w")
+
+
+def normalize(text):
+    """Lowercase, expand contractions, drop punctuation and filler words."""
+    words = []
+    for w in text.lower().split():
+        w = _CONTRACTIONS.get(w.strip("?!.,"), w)
+        w = re.sub(r"[^a-z0-9 ]", "", w)
+        if w and w not in _FILLER:
+            words.append(w)
+    return " ".join(words)
+
+
+def is_personal(text):
+    """True if `text` carries lead details (a number or an email) and must not be cached."""
+    return bool(_PERSONAL.search(text))
+
+
+def minhash(text):
+    """64-slot MinHash signature over character 3-grams of normalized text."""
+    padded = f" {text} "
+    shingles = {padded[i:i + 3] for i in range(max(1, len(padded) - 2))}
+    hashes = [int.from_bytes(hashlib.blake2b(s.encode(), digest_size=8).digest(), "big") for s in shingles]
+    return tuple(min((a * h + b) % _MERSENNE for h in hashes) for a, b in _PERMS)
+
+
+def similarity(sig_a, sig_b):
+    """Estimated Jaccard similarity of two signatures."""
+    return sum(1 for x, y in zip(sig_a, sig_b) if x == y) / NUM_PERM
+
+
+class ResponseCache:
+    def __init__(self, threshold=0.8, ttl=24 * 3600, max_entries=1000):
+        self.threshold = threshold
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._entries = OrderedDict()  # key → (stored_at, namespace, signature, answer)
+        self._lock = threading.Lock()
+        self.counters = {"exact_hits": 0, "near_hits": 0, "misses": 0, "personal": 0, "stores": 0, "evictions": 0}
+
+    @staticmethod
+    def namespace(client, system_prompt):
+        return client + ":" + hashlib.sha1(system_prompt.encode()).hexdigest()[:12]
+
+    def get(self, client, system_prompt, question):
+        """Return a cached answer for this question (or a near-duplicate), else None."""
+        if is_personal(question):
+            with self._lock:
+                self.counters["personal"] += 1
+            return None
+        ns = self.namespace(client, system_prompt)
+        norm = normalize(question)
+        key = ns + "|" + norm
+        now = time.time()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry and now - entry[0] < self.ttl:
+                self._entries.move_to_end(key)
+                self.counters["exact_hits"] += 1
+                return entry[3]
+
+            sig = minhash(norm)
+            best_key, best_score = None, 0.0
+            expired = []
+            for k, (stored_at, entry_ns, entry_sig, _) in self._entries.items():
+                if now - stored_at >= self.ttl:
+                    expired.append(k)
+                    continue
+                if entry_ns != ns:
+                    continue
+                score = similarity(sig, entry_sig)
+                if score > best_score:
+                    best_key, best_score = k, score
+            for k in expired:
+                del self._entries[k]
+
+            if best_key is not None and best_score >= self.threshold:
+                self._entries.move_to_end(best_key)
+                self.counters["near_hits"] += 1
+                return self._entries[best_key][3]
+
+            self.counters["misses"] += 1
+            return None
+
+    def put(self, client, system_prompt, question, answer):
+        ns = self.namespace(client, system_prompt)
+        norm = normalize(question)
+        if not norm or not answer or is_personal(question):
+            return
+        key = ns + "|" + norm
+        with self._lock:
+            self._entries[key] = (time.time(), ns, minhash(norm), answer)
+            self._entries.move_to_end(key)
+            self.counters["stores"] += 1
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.counters["evictions"] += 1
+
+    def stats(self):
+        with self._lock:
+            c = dict(self.counters)
+            c["entries"] = len(self._entries)
+        hits = c["exact_hits"] + c["near_hits"]
+        lookups = hits + c["misses"] + c["personal"]
+        c["llm_calls_avoided_pct"] = round(100 * hits / lookups, 1) if lookups else 0.0
+        return c
+
+
+if __name__ == "__main__":
+    cache = ResponseCache()
+    prompt = "You are Lilly."
+    cache.put("ddwl", prompt, "What is wholesaling?", "Wholesaling is...")
+    cache.put("ddwl", prompt, "How do I get started?", "Start by...")
+    for q in ["what is wholesaling", "Hey, what's wholesaling?", "how do i get started with wholesaling",
+              "How do I get started", "Do you buy houses in Tampa?"]:
+        print(f"  {q:45} → {cache.get('ddwl', prompt, q)}")
+    cache.put("ddwl", prompt, "I want to sell my house at 1234 Oak Street Tampa", "Thanks! For 1234 Oak Street...")
+    for q in ["I want to sell my house at 1234 Oak Street Tampa", "I want to sell my house at 1284 Oak Street Tampa",
+              "Email me at lee@example.com"]:
+        print(f"  {q:45} → {cache.get('ddwl', prompt, q)}")
+    print(f"  Stats: {cache.stats()}")
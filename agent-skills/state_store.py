@@ -0,0 +1,206 @@
+"""
+State Store — Safe shared files for concurrent agents
+=======================================================
+The Telegram bot, inbox watcher and browser agents all touch brain.json and
+.env at the same time. Everything here follows three rules:
+
+1. Writers hold an advisory lock (<file>.lock) for the whole read-modify-write,
+   so two agents never lose each other's updates.
+2. Writes go to a temp file in the same directory, then os.replace() — readers
+   see the old file or the new one, never half of one.
+3. Reads are cached by (mtime, size) and only reparsed when the file changed.
+
+Usage:
+    store = JsonStore(AGENT_DIR / "brain.json", default={"services": {}})
+    store.read()                                     # cached parse
+    store.get("services.groq.status")
+    store.update(lambda d: d["services"].setdefault("x", {}))
+    store.compare_and_swap("services.groq.status", "needs_signup", "active")
+"""
+
+import os
+import json
+import copy
+import tempfile
+from pathlib import Path
+from contextlib import contextmanager
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+    import msvcrt
+
+_MISSING = object()
+
+
+@contextmanager
+def file_lock(path):
+    """Exclusive advisory lock on <path>.lock, held for the duration of the block."""
+    lock_path = f"{path}.lock"
+    with open(lock_path, "a+") as f:
+        if fcntl:
+            fcntl.flock(f.fileno(), fcntl.LOCK_EX)
+        else:
+            f.seek(0)
+            msvcrt.locking(f.fileno(), msvcrt.LK_LOCK, 1)
+        try:
+            yield
+        finally:
+            if fcntl:
+                fcntl.flock(f.fileno(), fcntl.LOCK_UN)
+            else:
+                f.seek(0)
+                msvcrt.locking(f.fileno(), msvcrt.LK_UNLCK, 1)
+
+
+def atomic_write(path, text, encoding="utf-8", durable=True):
+    """Write text (or bytes) to path via a uniquely named temp file + rename, keeping the original
+    file's permissions. Concurrent writers of one path never collide; the last rename wins.
+    durable=False skips the fsync — for caches, where a lost write just means a miss."""
+    path = Path(path)
+    fd, tmp = tempfile.mkstemp(dir=str(path.parent), prefix=f".{path.name}.", suffix=".tmp")
+    try:
+        if isinstance(text, bytes):
+            f = os.fdopen(fd, "wb")
+        else:
+            f = os.fdopen(fd, "w", encoding=encoding, newline="")
+        with f:
+            f.write(text)
+            if durable:
+                f.flush()
+                os.fsync(f.fileno())
+        if path.exists():
+            os.chmod(tmp, path.stat().st_mode & 0o777)
+        os.replace(tmp, path)
+    except BaseException:
+        if os.path.exists(tmp):
+            os.unlink(tmp)
+        raise
+
+
+def _signature(path):
+    try:
+        st = os.stat(path)
+        return st.st_mtime_ns, st.st_size
+    except FileNotFoundError:
+        return None
+
+
+def _walk(data, key_path):
+    """Follow 'a.b.c' into nested dicts; returns (parent, last_key)."""
+    keys = key_path.split(".")
+    for k in keys[:-1]:
+        data = data.setdefault(k, {})
+    return data, keys[-1]
+
+
+class JsonStore:
+    def __init__(self, path, default=None, indent=4):
+        self.path = Path(path)
+        self.default = default if default is not None else {}
+        self.indent = indent
+        self._cache = None
+        self._cache_sig = None
+
+    def _load(self):
+        if self.path.exists():
+            with open(self.path, "r", encoding="utf-8") as f:
+                return json.load(f)
+        return copy.deepcopy(self.default)
+
+    def read(self):
+        """Parsed file contents, reparsed only when the file changed on disk. Treat as read-only."""
+        sig = _signature(self.path)
+        if self._cache is None or sig != self._cache_sig:
+            self._cache = self._load()
+            self._cache_sig = sig
+        return self._cache
+
+    def get(self, key_path, default=None):
+        data = self.read()
+        for k in key_path.split("."):
+            if not isinstance(data, dict) or k not in data:
+                return default
+            data = data[k]
+        return data
+
+    def _write(self, data):
+        atomic_write(self.path, json.dumps(data, indent=self.indent))
+        self._cache = data
+        self._cache_sig = _signature(self.path)
+
+    def update(self, fn):
+        """Locked read-modify-write: fn(data) mutates a fresh copy of the file, which is then saved."""
+        with file_lock(self.path):
+            data = self._load()
+            fn(data)
+            self._write(data)
+            return data
+
+    def replace(self, data):
+        """Locked overwrite of the whole document."""
+        with file_lock(self.path):
+            self._write(data)
+
+    def set(self, key_path, value):
+        def apply(data):
+            parent, key = _walk(data, key_path)
+            parent[key] = value
+        self.update(apply)
+
+    def compare_and_swap(self, key_path, expected, new):
+        """Set key_path to new only if it currently equals expected. Returns True if swapped."""
+        with file_lock(self.path):
+            data = self._load()
+            parent, key = _walk(data, key_path)
+            if parent.get(key, _MISSING if expected is not None else None) != expected:
+                return False
+            parent[key] = new
+            self._write(data)
+            return True
+
+
+class EnvFile:
+    """KEY=value file (.env) with locked, atomic single-key updates and mtime-cached reads."""
+
+    def __init__(self, path):
+        self.path = Path(path)
+        self._cache = {}
+        self.signature = None  # (mtime_ns, size) of the last parse
+
+    def read(self):
+        sig = _signature(self.path)
+        if sig != self.signature:
+            values = {}
+            if self.path.exists():
+                for line in self.path.read_text(encoding="utf-8").splitlines():
+                    line = line.strip()
+                    if line and not line.startswith("#") and "=" in line:
+                        k, v = line.split("=", 1)
+                        v = v.strip()
+                        if len(v) >= 2 and v[0] == v[-1] and v[0] in "'\"":
+                            v = v[1:-1]
+                        values[k.strip()] = v
+            self._cache = values
+            self.signature = sig
+        return self._cache
+
+    def set(self, key, value):
+        """Replace (or append) one KEY=value line, leaving every other line untouched."""
+        with file_lock(self.path):
+            lines = []
+            found = False
+            if self.path.exists():
+                with open(self.path, "r", encoding="utf-8") as f:
+                    for line in f:
+                        if line.strip().startswith(f"{key}="):
+                            lines.append(f"{key}={value}\n")
+                            found = True
+                        else:
+                            lines.append(line)
+            if not found:
+                if lines and not lines[-1].endswith("\n"):
+                    lines[-1] += "\n"
+                lines.append(f"{key}={value}\n")
+            atomic_write(self.path, "".join(lines))
@@ -21,7 +21,6 @@ import time
 import logging
 import asyncio
 import subprocess
-import requests
 from pathlib import Path
 from datetime import datetime
 
@@ -36,6 +35,11 @@ BASE_DIR = Path(__file__).parent.parent
 AGENT_DIR = Path(__file__).parent
 sys.path.insert(0, str(AGENT_DIR))
 
+import async_http  # noqa: E402 — shared non-blocking client, one pool per host
+from ghl_cache import GHL_CACHE  # noqa: E402
+from llm_quota import QUOTA, estimate_tokens  # noqa: E402
+from browser_pool import BROWSER_POOL  # noqa: E402 — warm Chromium for /browse and /scrape
+
 # Load env
 env_file = BASE_DIR / ".env"
 if env_file.exists():
@@ -73,17 +77,17 @@ async def deny_access(update: Update):
     await safe_reply(update, "🔒 <b>Access denied.</b>\n<i>Server commands are admin-only.</i>")
 
 
-def notify_admin(msg):
-    """Send a proactive Telegram message to admin (callable from anywhere, sync)."""
+async def notify_admin(msg):
+    """Send a proactive Telegram message to admin (await from any handler; use tg_notify.py outside the bot)."""
     if not TELEGRAM_TOKEN:
         return False
     try:
-        r = requests.post(
+        r = await async_http.post(
             f"https://api.telegram.org/bot{TELEGRAM_TOKEN}/sendMessage",
             json={"chat_id": list(ADMIN_IDS)[0], "text": msg, "parse_mode": "HTML"},
             timeout=10,
         )
-        return r.ok
+        return r.is_success
     except Exception:
         return False
 
@@ -91,15 +95,20 @@ def notify_admin(msg):
 # ============================================================
 # GHL API
 # ============================================================
-def ghl_get(endpoint, params=None):
+async def ghl_get(endpoint, params=None):
     if params is None:
         params = {}
     params.setdefault("locationId", GHL_LOCATION_ID)
-    try:
-        r = requests.get(f"{GHL_API_BASE}{endpoint}", headers=GHL_API_HEADERS, params=params, timeout=15)
-        return r.json() if r.status_code == 200 else {"error": r.text[:200]}
-    except Exception as e:
-        return {"error": str(e)[:200]}
+
+    async def fetch():
+        try:
+            r = await async_http.get(f"{GHL_API_BASE}{endpoint}", headers=GHL_API_HEADERS, params=params, timeout=15)
+            return r.json() if r.status_code == 200 else {"error": r.text[:200]}
+        except Exception as e:
+            return {"error": str(e)[:200]}
+
+    # Repeat reads (Refresh taps, /wf) come from the shared TTL cache
+    return await GHL_CACHE.aget(endpoint, params, fetch)
 
 
 # ============================================================
@@ -186,55 +195,108 @@ async def cmd_start(update: Update, context: ContextTypes.DEFAULT_TYPE):
 # ============================================================
 # /status — System dashboard
 # ============================================================
-async def cmd_status(update: Update, context: ContextTypes.DEFAULT_TYPE):
-    await update.effective_chat.send_action(ChatAction.TYPING)
+async def _status_workflows():
+    data = await ghl_get("/workflows/")
+    if "workflows" not in data:
+        return []
+    wf = data["workflows"]
+    pub = sum(1 for w in wf if w.get("status") == "published")
+    draft = len(wf) - pub
+    return [
+        f"\n⚡ <b>Workflows:</b> {len(wf)} total",
+        f"   ✅ {pub} published  •  📝 {draft} draft",
+    ]
 
-    lines = ["<b>📊 DDWL System Dashboard</b>\n"]
-    lines.append("━━━━━━━━━━━━━━━━━━━━━━━━━━")
 
-    # Workflows
-    data = ghl_get("/workflows/")
-    if "workflows" in data:
-        wf = data["workflows"]
-        pub = sum(1 for w in wf if w.get("status") == "published")
-        draft = len(wf) - pub
-        lines.append(f"\n⚡ <b>Workflows:</b> {len(wf)} total")
-        lines.append(f"   ✅ {pub} published  •  📝 {draft} draft")
-
-    # Contacts
-    data = ghl_get("/contacts/", {"limit": 1})
+async def _status_contacts():
+    data = await ghl_get("/contacts/", {"limit": 1})
     if "meta" in data:
-        lines.append(f"\n📋 <b>Contacts:</b> {data['meta'].get('total', '?')}")
+        return [f"\n📋 <b>Contacts:</b> {data['meta'].get('total', '?')}"]
     elif "contacts" in data:
-        lines.append(f"\n📋 <b>Contacts:</b> loaded")
-
-    # Pipelines
-    data = ghl_get("/opportunities/pipelines")
-    if "pipelines" in data:
-        pipes = data["pipelines"]
-        lines.append(f"\n🎯 <b>Pipelines:</b> {len(pipes)}")
-        for p in pipes[:3]:
-            stages = len(p.get("stages", []))
-            lines.append(f"   • {p['name']} ({stages} stages)")
-
-    # Calendars
-    data = ghl_get("/calendars/")
+        return [f"\n📋 <b>Contacts:</b> loaded"]
+    return []
+
+
+async def _status_pipelines():
+    data = await ghl_get("/opportunities/pipelines")
+    if "pipelines" not in data:
+        return []
+    pipes = data["pipelines"]
+    lines = [f"\n🎯 <b>Pipelines:</b> {len(pipes)}"]
+    for p in pipes[:3]:
+        stages = len(p.get("stages", []))
+        lines.append(f"   • {p['name']} ({stages} stages)")
+    return lines
+
+
+async def _status_calendars():
+    data = await ghl_get("/calendars/")
     if "calendars" in data:
-        lines.append(f"\n📅 <b>Calendars:</b> {len(data['calendars'])}")
+        return [f"\n📅 <b>Calendars:</b> {len(data['calendars'])}"]
+    return []
+
 
-    # Knowledge base
+def _count_kb_files():
     kb_dir = AGENT_DIR / "ghl-knowledge"
-    if kb_dir.exists():
-        transcripts = len(list((kb_dir / "youtube-transcripts").glob("*.json"))) if (kb_dir / "youtube-transcripts").exists() else 0
-        summaries = len(list((kb_dir / "summaries").glob("*.md"))) if (kb_dir / "summaries").exists() else 0
-        reddit_files = len(list((kb_dir / "reddit").glob("*.json"))) if (kb_dir / "reddit").exists() else 0
-        lines.append(f"\n🧠 <b>Knowledge Base:</b>")
-        lines.append(f"   📹 {transcripts} transcripts  •  📝 {summaries} summaries")
-        if reddit_files:
-            lines.append(f"   🔥 {reddit_files} Reddit snapshots")
+    if not kb_dir.exists():
+        return None
+    transcripts = len(list((kb_dir / "youtube-transcripts").glob("*.json"))) if (kb_dir / "youtube-transcripts").exists() else 0
+    summaries = len(list((kb_dir / "summaries").glob("*.md"))) if (kb_dir / "summaries").exists() else 0
+    reddit_files = len(list((kb_dir / "reddit").glob("*.json"))) if (kb_dir / "reddit").exists() else 0
+    return transcripts, summaries, reddit_files
+
+
+async def _status_knowledge():
+    counts = await asyncio.to_thread(_count_kb_files)
+    if counts is None:
+        return []
+    transcripts, summaries, reddit_files = counts
+    lines = [
+        f"\n🧠 <b>Knowledge Base:</b>",
+        f"   📹 {transcripts} transcripts  •  📝 {summaries} summaries",
+    ]
+    if reddit_files:
+        lines.append(f"   🔥 {reddit_files} Reddit snapshots")
+    return lines
+
+
+# (label, section coroutine, timeout seconds) — rendered in this order
+STATUS_SECTIONS = [
+    ("⚡ Workflows", _status_workflows, 8),
+    ("📋 Contacts", _status_contacts, 8),
+    ("🎯 Pipelines", _status_pipelines, 8),
+    ("📅 Calendars", _status_calendars, 8),
+    ("🧠 Knowledge Base", _status_knowledge, 3),
+]
+
+
+async def gather_sections(sections):
+    """Run every dashboard section at once. Slow or failing sections render as a one-line placeholder
+    instead of holding up the rest, so the dashboard costs the slowest section, not the sum."""
+    async def run(label, fn, timeout):
+        try:
+            return await asyncio.wait_for(fn(), timeout)
+        except asyncio.TimeoutError:
+            logger.warning(f"Dashboard section timed out: {label}")
+            return [f"\n{label}: <i>⏳ slow to respond, try Refresh</i>"]
+        except Exception as e:
+            return [f"\n{label}: <i>❌ {str(e)[:80]}</i>"]
+
+    results = await asyncio.gather(*(run(label, fn, timeout) for label, fn, timeout in sections))
+    return [line for section in results for line in section]
+
+
+async def cmd_status(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    await update.effective_chat.send_action(ChatAction.TYPING)
+
+    lines = ["<b>📊 DDWL System Dashboard</b>\n"]
+    lines.append("━━━━━━━━━━━━━━━━━━━━━━━━━━")
+    lines.extend(await gather_sections(STATUS_SECTIONS))
 
     lines.append(f"\n━━━━━━━━━━━━━━━━━━━━━━━━━━")
     lines.append(f"🕐 <i>{datetime.now().strftime('%H:%M  •  %d %b %Y')}</i>")
+    cache = GHL_CACHE.stats()
+    lines.append(f"🗄 <i>GHL cache: {cache['hits'] + cache['stale_hits']} hits · {cache['misses']} misses</i>")
 
     keyboard = [
         [
@@ -251,7 +313,7 @@ async def cmd_status(update: Update, context: ContextTypes.DEFAULT_TYPE):
 # ============================================================
 async def cmd_workflows(update: Update, context: ContextTypes.DEFAULT_TYPE):
     await update.effective_chat.send_action(ChatAction.TYPING)
-    data = ghl_get("/workflows/")
+    data = await ghl_get("/workflows/")
     if "workflows" not in data:
         await safe_reply(update, f"❌ Error: {data.get('error', 'Unknown')}")
         return
@@ -286,7 +348,7 @@ async def cmd_workflows(update: Update, context: ContextTypes.DEFAULT_TYPE):
 # ============================================================
 async def cmd_contacts(update: Update, context: ContextTypes.DEFAULT_TYPE):
     await update.effective_chat.send_action(ChatAction.TYPING)
-    data = ghl_get("/contacts/", {"limit": 10})
+    data = await ghl_get("/contacts/", {"limit": 10})
     if "contacts" not in data:
         await safe_reply(update, f"❌ Error: {data.get('error', 'Unknown')}")
         return
@@ -307,37 +369,45 @@ async def cmd_contacts(update: Update, context: ContextTypes.DEFAULT_TYPE):
 # ============================================================
 # /research — Reddit + Changelog
 # ============================================================
+RESEARCH_SHOW = 5  # items per feed per /research; the rest wait for the next one
+
+
 async def cmd_research(update: Update, context: ContextTypes.DEFAULT_TYPE):
     await update.effective_chat.send_action(ChatAction.TYPING)
     await safe_reply(update, "🔍 <b>Running research...</b>\n<i>Reddit + GHL Changelog</i>")
 
     try:
-        from ghl_live_research import get_reddit_hot, fetch_changelog, save_changelog
+        from ghl_live_research import new_reddit_hot, new_changelog_entries, save_changelog
 
         parts = []
+        # Seen-state is per chat, and only what is shown here counts as seen
+        consumer = f"telegram:{update.effective_chat.id}"
 
-        # Reddit
-        posts = get_reddit_hot("gohighlevel", limit=5)
+        # Reddit — only posts not shown in this chat before
+        posts = await asyncio.to_thread(new_reddit_hot, "gohighlevel", 15, consumer, RESEARCH_SHOW)
         if posts:
-            lines = ["<b>🔥 Hot on r/gohighlevel</b>\n"]
-            for p in posts[:5]:
+            lines = ["<b>🔥 New on r/gohighlevel</b>\n"]
+            for p in posts:
                 score = p.get('score', 0)
                 lines.append(f"  <b>{score}↑</b>  {p['title'][:55]}")
             parts.append("\n".join(lines))
 
         # Changelog
-        entries = fetch_changelog()
+        entries = await asyncio.to_thread(new_changelog_entries, consumer, RESEARCH_SHOW)
         if entries:
-            save_changelog(entries)
-            lines = ["\n<b>📋 Latest GHL Changes</b>\n"]
-            for e in entries[:5]:
-                lines.append(f"  • {e['title'][:55]}")
+            await asyncio.to_thread(save_changelog, entries)
+            lines = ["\n<b>📋 New GHL Changes</b>\n"]
+            for e in entries:
+                mark = " <i>(updated)</i>" if e["status"] == "changed" else ""
+                lines.append(f"  • {e['title'][:55]}{mark}")
             parts.append("\n".join(lines))
 
         if parts:
             await safe_reply(update, "\n\n".join(parts))
         else:
-            await safe_reply(update, "No new data found.")
+            await safe_reply(update, "Nothing new since your last /research.")
+        if len(posts) == RESEARCH_SHOW or len(entries) == RESEARCH_SHOW:
+            await safe_reply(update, "<i>There may be more — /research again for the next batch.</i>")
     except Exception as e:
         await safe_reply(update, f"❌ Research error: {str(e)[:200]}")
 
@@ -356,7 +426,7 @@ async def cmd_ask(update: Update, context: ContextTypes.DEFAULT_TYPE):
 
     try:
         from ghl_live_research import multi_ai_ask
-        answers = multi_ai_ask(question)
+        answers = await asyncio.to_thread(multi_ai_ask, question, "interactive")
         if answers:
             if "Synthesized Best Answer" in answers:
                 text = f"<b>🧠 Best Answer</b>\n\n{answers['Synthesized Best Answer'][:3500]}"
@@ -373,6 +443,22 @@ async def cmd_ask(update: Update, context: ContextTypes.DEFAULT_TYPE):
 # ============================================================
 # /say — Lee's voice
 # ============================================================
+async def reply_lee_voice(update: Update, text, caption, prefix=None):
+    """Say `text` in Lee's voice as OGG/Opus voice notes, each sent the moment it's
+    encoded (see voice_notes.py). Returns how many notes were sent."""
+    from voice_notes import voice_notes
+    sent = 0
+    async for note in voice_notes(text, prefix=prefix):
+        await update.effective_message.reply_voice(
+            voice=note.audio,
+            filename=f"lee-ai.{note.format}",
+            caption=caption if sent == 0 else None,
+            parse_mode=ParseMode.HTML,
+        )
+        sent += 1
+    return sent
+
+
 async def cmd_say(update: Update, context: ContextTypes.DEFAULT_TYPE):
     text = " ".join(context.args) if context.args else ""
     if not text:
@@ -381,19 +467,13 @@ async def cmd_say(update: Update, context: ContextTypes.DEFAULT_TYPE):
 
     await update.effective_chat.send_action(ChatAction.RECORD_VOICE)
 
+    from tts_cache import TTSError
     try:
-        from voice_review import speak
-        audio_path = speak(text, play=False)
-        if audio_path and Path(audio_path).exists():
-            with open(audio_path, "rb") as f:
-                await update.effective_message.reply_voice(
-                    voice=f,
-                    caption=f"🎤 <i>{text[:100]}</i>",
-                    parse_mode=ParseMode.HTML,
-                )
-            logger.info(f"Voice sent: {text[:50]}")
-        else:
-            await safe_reply(update, f"🔇 Voice generation failed.\n<i>{text}</i>")
+        notes = await reply_lee_voice(update, text, f"🎤 <i>{text[:100]}</i>")
+        logger.info(f"Voice sent ({notes} notes): {text[:50]}")
+    except TTSError as e:
+        logger.warning(f"Voice generation failed: {e}")
+        await safe_reply(update, f"🔇 Voice generation failed.\n<i>{text}</i>")
     except Exception as e:
         await safe_reply(update, f"❌ Voice error: {str(e)[:200]}")
 
@@ -412,12 +492,12 @@ async def cmd_do(update: Update, context: ContextTypes.DEFAULT_TYPE):
     try:
         from ghl_doer import classify_task, execute_api_task, format_result
 
-        classification = classify_task(task)
+        classification = await asyncio.to_thread(classify_task, task)
         action = classification.get("action", "")
         task_type = classification.get("type", "")
 
         if task_type == "api":
-            result = execute_api_task(classification)
+            result = await asyncio.to_thread(execute_api_task, classification)
             output = format_result(result, action)
             await safe_reply(update, f"<b>✅ {action}</b>\n\n{output[:3500]}")
         else:
@@ -443,10 +523,10 @@ async def cmd_reddit(update: Update, context: ContextTypes.DEFAULT_TYPE):
         from ghl_live_research import search_reddit_all, get_reddit_hot
 
         if query:
-            posts = search_reddit_all(query, limit=8)
+            posts = await asyncio.to_thread(search_reddit_all, query, limit=8)
             title = f"Reddit: '{query}'"
         else:
-            posts = get_reddit_hot("gohighlevel", limit=8)
+            posts = await asyncio.to_thread(get_reddit_hot, "gohighlevel", limit=8)
             title = "Hot on r/gohighlevel"
 
         if posts:
@@ -483,7 +563,7 @@ async def button_handler(update: Update, context: ContextTypes.DEFAULT_TYPE):
     elif action == "pipelines":
         # Quick pipelines view
         await update.effective_chat.send_action(ChatAction.TYPING)
-        data = ghl_get("/opportunities/pipelines")
+        data = await ghl_get("/opportunities/pipelines")
         if "pipelines" in data:
             lines = ["<b>🎯 Pipelines</b>\n"]
             for p in data["pipelines"]:
@@ -500,7 +580,7 @@ async def button_handler(update: Update, context: ContextTypes.DEFAULT_TYPE):
         await update.effective_chat.send_action(ChatAction.TYPING)
         try:
             from ghl_live_research import fetch_changelog
-            entries = fetch_changelog()
+            entries = await asyncio.to_thread(fetch_changelog)
             if entries:
                 lines = ["<b>📋 GHL Changelog</b>\n"]
                 for e in entries[:8]:
@@ -537,15 +617,8 @@ async def button_handler(update: Update, context: ContextTypes.DEFAULT_TYPE):
     elif action == "voice_test":
         await update.effective_chat.send_action(ChatAction.RECORD_VOICE)
         try:
-            from voice_review import speak
-            audio_path = speak("Hey, this is Lee A.I. checking in. All systems running smooth. Hit me up if you need anything.", play=False)
-            if audio_path and Path(audio_path).exists():
-                with open(audio_path, "rb") as f:
-                    await update.effective_message.reply_voice(
-                        voice=f,
-                        caption="🎤 <i>Lee AI voice test</i>",
-                        parse_mode=ParseMode.HTML,
-                    )
+            await reply_lee_voice(update, "Hey, this is Lee A.I. checking in. All systems running smooth. Hit me up if you need anything.",
+                                  "🎤 <i>Lee AI voice test</i>")
         except Exception as e:
             await safe_reply(update, f"❌ Voice error: {str(e)[:200]}")
 
@@ -606,16 +679,9 @@ async def handle_voice(update: Update, context: ContextTypes.DEFAULT_TYPE):
 
     # 4. Generate voice response summary
     try:
-        from voice_review import speak
-        response_text = f"Got it. I processed your request: {transcript[:80]}."
-        audio_path = speak(response_text, play=False)
-        if audio_path and Path(audio_path).exists():
-            with open(audio_path, "rb") as f:
-                await update.effective_message.reply_voice(
-                    voice=f,
-                    caption="🎤 <i>Lee AI response</i>",
-                    parse_mode=ParseMode.HTML,
-                )
+        # The fixed opener is cached once; only the transcript part is synthesized
+        await reply_lee_voice(update, f"{transcript[:80]}.", "🎤 <i>Lee AI response</i>",
+                              prefix="Got it. I processed your request:")
     except Exception as e:
         logger.warning(f"Voice response failed: {e}")
 
@@ -627,15 +693,14 @@ async def transcribe_voice(audio_path):
         return None
 
     try:
-        with open(audio_path, "rb") as f:
-            r = requests.post(
-                "https://api.groq.com/openai/v1/audio/transcriptions",
-                headers={"Authorization": f"Bearer {GROQ_KEY}"},
-                files={"file": (audio_path.name, f, "audio/ogg")},
-                data={"model": "whisper-large-v3-turbo", "language": "en"},
-                timeout=30,
-            )
-        if r.ok:
+        r = await async_http.post(
+            "https://api.groq.com/openai/v1/audio/transcriptions",
+            headers={"Authorization": f"Bearer {GROQ_KEY}"},
+            files={"file": (audio_path.name, audio_path.read_bytes(), "audio/ogg")},
+            data={"model": "whisper-large-v3-turbo", "language": "en"},
+            timeout=30,
+        )
+        if r.is_success:
             return r.json().get("text", "").strip()
         else:
             logger.error(f"Whisper error {r.status_code}: {r.text[:200]}")
@@ -653,7 +718,7 @@ async def cmd_trends(update: Update, context: ContextTypes.DEFAULT_TYPE):
     await safe_reply(update, "🔍 <b>Scout is scanning trends...</b>\n<i>Google News + Groq analysis</i>")
     try:
         from xai_scout import get_trending
-        result = get_trending()
+        result = await asyncio.to_thread(get_trending)
         if result:
             await safe_reply(update, result, parse_mode=None)
         else:
@@ -669,7 +734,7 @@ async def cmd_news(update: Update, context: ContextTypes.DEFAULT_TYPE):
     await safe_reply(update, f"📰 <b>Scout searching news:</b> <i>{query}</i>")
     try:
         from xai_scout import search_news
-        result = search_news(query)
+        result = await asyncio.to_thread(search_news, query)
         if result:
             await safe_reply(update, result, parse_mode=None)
         else:
@@ -681,10 +746,10 @@ async def cmd_news(update: Update, context: ContextTypes.DEFAULT_TYPE):
 async def cmd_brief(update: Update, context: ContextTypes.DEFAULT_TYPE):
     """Generate a full morning brief."""
     await update.effective_chat.send_action(ChatAction.TYPING)
-    await safe_reply(update, "☀️ <b>Scout generating morning brief...</b>\n<i>This takes 15-30 seconds</i>")
     try:
-        from xai_scout import generate_morning_brief
-        result = generate_morning_brief()
+        from xai_scout import generate_morning_brief, BRIEF_BUDGET
+        await safe_reply(update, f"☀️ <b>Scout generating morning brief...</b>\n<i>Takes up to {BRIEF_BUDGET} seconds</i>")
+        result = await asyncio.to_thread(generate_morning_brief)
         if result:
             await safe_reply(update, result, parse_mode=None)
         else:
@@ -984,28 +1049,20 @@ async def cmd_browse(update: Update, context: ContextTypes.DEFAULT_TYPE):
         url = "https://" + url
     await update.effective_chat.send_action(ChatAction.UPLOAD_PHOTO)
     await safe_reply(update, f"📸 <i>Screenshotting {url}...</i>")
-    screenshot_path = f"/tmp/screenshot_{update.update_id}.png"
-    script = (
-        f"source {DDWL_DIR}/venv/bin/activate && python -c \""
-        f"from playwright.sync_api import sync_playwright; "
-        f"p = sync_playwright().start(); "
-        f"b = p.chromium.launch(headless=True); "
-        f"page = b.new_page(viewport={{'width': 1280, 'height': 720}}); "
-        f"page.goto('{url}', timeout=30000); "
-        f"page.wait_for_timeout(3000); "
-        f"page.screenshot(path='{screenshot_path}', full_page=False); "
-        f"b.close(); p.stop(); "
-        f"print('OK')\""
-    )
-    result = await run_shell(script, timeout=60)
-    if "OK" in result:
-        try:
-            with open(screenshot_path, "rb") as f:
-                await update.effective_chat.send_photo(photo=f, caption=f"📸 {url}")
-        except Exception as e:
-            await safe_reply(update, f"❌ Screenshot taken but failed to send: {str(e)[:200]}")
-    else:
-        await safe_reply(update, f"❌ Screenshot failed:\n<code>{result[:500]}</code>")
+    start = time.time()
+    try:
+        png = await BROWSER_POOL.screenshot(url)
+    except asyncio.TimeoutError:
+        await safe_reply(update, "⏰ Screenshot timed out (45s limit)")
+        return
+    except Exception as e:
+        await safe_reply(update, f"❌ Screenshot failed:\n<code>{str(e)[:500]}</code>")
+        return
+    logger.info(f"📸 {url} in {time.time() - start:.1f}s")
+    try:
+        await update.effective_chat.send_photo(photo=png, caption=f"📸 {url}")
+    except Exception as e:
+        await safe_reply(update, f"❌ Screenshot taken but failed to send: {str(e)[:200]}")
 
 
 async def cmd_ytdl(update: Update, context: ContextTypes.DEFAULT_TYPE):
@@ -1156,19 +1213,12 @@ async def cmd_scrape(update: Update, context: ContextTypes.DEFAULT_TYPE):
     if not url.startswith("http"):
         url = "https://" + url
     await update.effective_chat.send_action(ChatAction.TYPING)
-    script = (
-        f"source {DDWL_DIR}/venv/bin/activate && python -c \""
-        f"from playwright.sync_api import sync_playwright; "
-        f"p = sync_playwright().start(); "
-        f"b = p.chromium.launch(headless=True); "
-        f"page = b.new_page(); "
-        f"page.goto('{url}', timeout=30000); "
-        f"page.wait_for_timeout(3000); "
-        f"text = page.inner_text('body'); "
-        f"b.close(); p.stop(); "
-        f"print(text[:3500])\""
-    )
-    output = await run_shell(script, timeout=60)
+    try:
+        output = (await BROWSER_POOL.text(url)).strip() or "(no text)"
+    except asyncio.TimeoutError:
+        output = "⏰ Scrape timed out (45s limit)"
+    except Exception as e:
+        output = f"❌ Error: {str(e)[:200]}"
     await safe_reply(update, f"<b>🕷️ Scraped: {url}</b>\n\n<code>{output[:3500]}</code>")
 
 
@@ -1455,7 +1505,12 @@ Examples:
 The server is Ubuntu 24.04. DDWL repo is at /home/exposureai/ddwl. Python venv at /home/exposureai/ddwl/venv.
 Services: lilly-telegram, chat-widget-api. User: exposureai. Always use full paths."""
 
-        r = requests.post(
+        est = estimate_tokens(prompt, max_tokens=300)
+        if not await QUOTA.aacquire("groq", tokens=est, priority="interactive", timeout=5):
+            await safe_reply(update, "⏳ Groq free-tier quota is used up for the moment — try again in a minute.")
+            return
+
+        r = await async_http.post(
             "https://api.groq.com/openai/v1/chat/completions",
             headers={"Authorization": f"Bearer {GROQ_KEY}", "Content-Type": "application/json"},
             json={
@@ -1466,11 +1521,15 @@ Services: lilly-telegram, chat-widget-api. User: exposureai. Always use full pat
             },
             timeout=15,
         )
-        if not r.ok:
+        if r.status_code == 429:
+            await asyncio.to_thread(QUOTA.backoff, "groq", float(r.headers.get("Retry-After") or 30))
+        if not r.is_success:
             await safe_reply(update, f"❌ AI routing failed: {r.status_code}")
             return
 
-        reply = r.json()["choices"][0]["message"]["content"].strip()
+        data = r.json()
+        await asyncio.to_thread(QUOTA.settle, "groq", est, data.get("usage", {}).get("total_tokens"))
+        reply = data["choices"][0]["message"]["content"].strip()
         logger.info(f"🧠 Smart route: {reply[:100]}")
 
         if reply.startswith("SHELL:"):
@@ -1531,6 +1590,12 @@ async def post_init(application):
     logger.info(f"✅ Bot online: @{me.username}")
 
 
+async def post_shutdown(application):
+    """Close pooled HTTP connections and the warm browser."""
+    await async_http.close_all()
+    await BROWSER_POOL.close()
+
+
 def main():
     if not TELEGRAM_TOKEN:
         print("\n  ❌ TELEGRAM_BOT_TOKEN not set in .env")
@@ -1548,7 +1613,12 @@ def main():
     print("  🤖 Lilly Telegram Bot — Starting...")
     print("=" * 60)
 
-    app = Application.builder().token(TELEGRAM_TOKEN).post_init(post_init).job_queue(None).build()
+    # concurrent_updates: a slow handler no longer holds up everyone else's updates
+    app = (
+        Application.builder().token(TELEGRAM_TOKEN)
+        .post_init(post_init).post_shutdown(post_shutdown)
+        .concurrent_updates(True).job_queue(None).build()
+    )
 
     # Command handlers
     app.add_handler(CommandHandler("start", cmd_start))
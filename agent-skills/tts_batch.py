@@ -0,0 +1,189 @@
+"""
+TTS Batch — Concurrent, resumable synthesis of a whole prompt set
+===================================================================
+generate_ivr_audio used to synthesize its prompts one blocking request at a
+time, and a failure halfway meant rerunning (and re-paying for) everything.
+A batch here:
+
+    plans      each output folder keeps manifest.json: per prompt, the TTS
+               cache key of what was synthesized (text, voice, model,
+               settings, format) and the sha256 of the file written. A prompt
+               is regenerated only if it is new, its text or voice changed,
+               its file is missing, or the file no longer matches. A forced
+               plan re-synthesizes everything, bypassing the TTS cache and
+               replacing its entries with the new takes
+    estimates  the plan, priced: characters the TTS cache can already serve
+               are free, the rest are billed at PRICING["elevenlabs"]
+    runs       stale prompts on a bounded pool of MAX_CONCURRENCY workers
+               (ElevenLabs rejects requests over the plan's concurrency limit
+               with a 429), retrying 429 / 5xx / network errors with
+               exponential backoff — or the server's Retry-After
+    resumes    the manifest is saved after every finished prompt, so an
+               interrupted or partly failed run picks up where it stopped
+
+Usage:
+    from tts_batch import TTSBatch, synthesize_with_retry
+    speech = synthesize_with_retry(text, voice_id, model_id, settings)   # one clip, same retry policy
+    batch = TTSBatch(out_dir, voice_id, "eleven_monolingual_v1", {"stability": 0.75, ...})
+    plan = batch.plan(scripts)             # {name: "new" | "text changed" | "missing file" | "file changed"}
+    plan = batch.plan(scripts, force=True) # {name: "forced"} — fresh takes, not cache hits
+    batch.estimate(scripts, plan)          # {"prompts", "chars", "cached_chars", "billed_chars", "usd"}
+    result = batch.run(scripts, plan)      # {"generated", "cached", "failed": {name: error}, ...}
+
+Set ELEVENLABS_CONCURRENCY to your plan's limit (default 2, the free tier's).
+"""
+
+import os
+import json
+import time
+import random
+import hashlib
+import threading
+from pathlib import Path
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+from tts_cache import TTS_CACHE, TTSError, DEFAULT_FORMAT, cache_key
+from usage_tracker import PRICING
+
+MAX_CONCURRENCY = int(os.environ.get("ELEVENLABS_CONCURRENCY", "2"))
+MAX_ATTEMPTS = 4
+BACKOFF_S = 2.0          # first retry delay; doubles each attempt
+MAX_BACKOFF_S = 60.0
+MANIFEST_NAME = "manifest.json"
+
+
+def log(tag, msg):
+    ts = time.strftime("%H:%M:%S")
+    print(f"  [{ts}] [{tag}] {msg}")
+
+
+def file_sha(path):
+    return hashlib.sha256(Path(path).read_bytes()).hexdigest()
+
+
+def synthesize_with_retry(text, voice_id, model_id, voice_settings=None, output_format=DEFAULT_FORMAT,
+                          api_key=None, refresh=False, cache=TTS_CACHE):
+    """cache.synthesize(), retrying 429 / 5xx / network errors with backoff (or the server's Retry-After)."""
+    for attempt in range(1, MAX_ATTEMPTS + 1):
+        try:
+            return cache.synthesize(text, voice_id, model_id, voice_settings, output_format,
+                                    api_key=api_key, refresh=refresh)
+        except TTSError as e:
+            if not e.retryable or attempt == MAX_ATTEMPTS:
+                raise
+            delay = e.retry_after or min(MAX_BACKOFF_S, BACKOFF_S * 2 ** (attempt - 1))
+            delay *= random.uniform(1.0, 1.25)  # keep concurrent callers from retrying in lockstep
+            log("TTS", f"  {e.status_code or 'network'} — retry {attempt}/{MAX_ATTEMPTS - 1} in {delay:.1f}s")
+            time.sleep(delay)
+
+
+class TTSBatch:
+    def __init__(self, out_dir, voice_id, model_id, voice_settings=None, output_format=DEFAULT_FORMAT,
+                 api_key=None, workers=MAX_CONCURRENCY, cache=TTS_CACHE):
+        self.out_dir = Path(out_dir)
+        self.voice_id = voice_id
+        self.model_id = model_id
+        self.voice_settings = voice_settings
+        self.output_format = output_format
+        self.api_key = api_key
+        self.workers = max(1, workers)
+        self.cache = cache
+        self.ext = output_format.split("_")[0]
+        self.manifest_path = self.out_dir / MANIFEST_NAME
+        self._lock = threading.Lock()
+
+    # ── manifest ──
+    def load_manifest(self):
+        try:
+            return json.loads(self.manifest_path.read_text(encoding="utf-8"))
+        except (OSError, ValueError):
+            return {}
+
+    def _record(self, manifest, name, key, text, path):
+        """Remember one finished prompt and write the manifest straight away."""
+        with self._lock:
+            manifest[name] = {"key": key, "file": path.name, "sha256": file_sha(path),
+                              "chars": len(text), "generated": time.strftime("%Y-%m-%dT%H:%M:%S")}
+            self.out_dir.mkdir(parents=True, exist_ok=True)
+            tmp = self.manifest_path.with_suffix(".tmp")
+            tmp.write_text(json.dumps(manifest, indent=2, sort_keys=True), encoding="utf-8")
+            tmp.replace(self.manifest_path)
+
+    def key(self, text):
+        return cache_key(text, self.voice_id, self.model_id, self.voice_settings, self.output_format)
+
+    # ── plan ──
+    def plan(self, scripts, force=False):
+        """{name: reason} for every prompt in `scripts` ({name: text}) that needs (re)writing."""
+        manifest = self.load_manifest()
+        stale = {}
+        for name, text in scripts.items():
+            entry = manifest.get(name)
+            path = self.out_dir / f"{name}.{self.ext}"
+            if force:
+                stale[name] = "forced"
+            elif not entry:
+                stale[name] = "new"
+            elif entry.get("key") != self.key(text):
+                stale[name] = "text changed"
+            elif not path.exists():
+                stale[name] = "missing file"
+            elif file_sha(path) != entry.get("sha256"):
+                stale[name] = "file changed"
+        return stale
+
+    def estimate(self, scripts, plan):
+        """What running `plan` would cost: characters the TTS cache already holds are free (unless forced)."""
+        chars = cached = 0
+        for name, reason in plan.items():
+            text = scripts[name]
+            chars += len(text)
+            if reason != "forced" and self.cache.has(self.key(text)):
+                cached += len(text)
+        billed = chars - cached
+        return {"prompts": len(plan), "chars": chars, "cached_chars": cached, "billed_chars": billed,
+                "usd": round(billed * PRICING["elevenlabs"]["per_char"], 4)}
+
+    # ── run ──
+    def _one(self, manifest, name, text, refresh=False):
+        speech = synthesize_with_retry(text, self.voice_id, self.model_id, self.voice_settings, self.output_format,
+                                       api_key=self.api_key, refresh=refresh, cache=self.cache)
+        path = self.out_dir / f"{name}.{self.ext}"
+        tmp = path.with_suffix(".tmp")
+        tmp.write_bytes(speech.path.read_bytes())
+        tmp.replace(path)
+        self._record(manifest, name, speech.key, text, path)
+        return speech
+
+    def run(self, scripts, plan=None, on_done=None):
+        """Write every prompt in `plan` (default: self.plan(scripts)) on the worker pool.
+
+        on_done(name, speech, error) is called as each prompt finishes. Prompts
+        planned as "forced" are re-synthesized even if the TTS cache has them.
+        """
+        plan = self.plan(scripts) if plan is None else plan
+        manifest = self.load_manifest()
+        self.out_dir.mkdir(parents=True, exist_ok=True)
+        result = {"generated": 0, "cached": 0, "billed_chars": 0, "failed": {}}
+        started = time.time()
+        with ThreadPoolExecutor(max_workers=min(self.workers, max(1, len(plan)))) as executor:
+            futures = {executor.submit(self._one, manifest, name, scripts[name], reason == "forced"): name
+                       for name, reason in plan.items()}
+            for future in as_completed(futures):
+                name = futures[future]
+                try:
+                    speech = future.result()
+                except Exception as e:
+                    result["failed"][name] = str(e)[:200]
+                    speech, error = None, e
+                else:
+                    result["generated"] += 1
+                    if speech.cached:
+                        result["cached"] += 1
+                    else:
+                        result["billed_chars"] += speech.chars
+                    error = None
+                if on_done:
+                    on_done(name, speech, error)
+        result["seconds"] = round(time.time() - started, 1)
+        return result
@@ -0,0 +1,245 @@
+"""
+TTS Cache — One content-addressed store for every ElevenLabs voice generator
+==============================================================================
+voice_review.speak (and through it /say and voice replies), the IVR prompt
+generators and the logo-reveal narration all synthesize with ElevenLabs,
+which bills per character. Most of what they say has been said before, so
+every clip is stored under
+
+    sha256(text, voice_id, model_id, voice_settings, output_format)
+
+A repeat phrase is a file read: no request, no characters billed. The store
+(tts-cache/) is capped at MAX_CACHE_BYTES and evicts least recently used
+clips first. Hits, misses and characters saved are counted in the index.
+
+join() stitches cached clips into one (MP3 frames concatenate cleanly), so a
+fixed preamble is synthesized once and only the variable part is billed.
+
+Usage:
+    from tts_cache import TTS_CACHE, TTSError
+    speech = TTS_CACHE.synthesize(text, voice_id, "eleven_turbo_v2_5", {"stability": 0.5, ...})
+    speech.path, speech.cached, speech.key
+    TTS_CACHE.synthesize(text, ..., refresh=True)   # new take, replacing the stored one
+    combined = TTS_CACHE.join([intro.path, detail.path])
+
+CLI:
+    python tts_cache.py stats
+    python tts_cache.py clear
+"""
+
+import os
+import sys
+import json
+import time
+import shutil
+import sqlite3
+import hashlib
+import threading
+from pathlib import Path
+from collections import namedtuple
+
+import requests
+
+from usage_tracker import PRICING
+from state_store import atomic_write
+
+AGENT_DIR = Path(__file__).parent
+CACHE_DIR = AGENT_DIR / "tts-cache"
+MAX_CACHE_BYTES = 500 * 1024 * 1024
+DEFAULT_FORMAT = "mp3_44100_128"
+TTS_URL = "https://api.elevenlabs.io/v1/text-to-speech/{voice_id}"
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS clips (
+    key TEXT PRIMARY KEY,
+    file TEXT NOT NULL,
+    chars INTEGER NOT NULL,
+    size INTEGER NOT NULL,
+    voice_id TEXT,
+    model_id TEXT,
+    preview TEXT,
+    created REAL NOT NULL,
+    last_used REAL NOT NULL,
+    hits INTEGER NOT NULL DEFAULT 0
+);
+CREATE INDEX IF NOT EXISTS clips_used ON clips (last_used);
+CREATE TABLE IF NOT EXISTS counters (name TEXT PRIMARY KEY, value REAL NOT NULL DEFAULT 0);
+"""
+
+COUNTERS = ["hits", "misses", "chars_saved", "chars_billed", "bytes_served"]
+
+Speech = namedtuple("Speech", "path key cached chars")
+
+
+class TTSError(Exception):
+    """ElevenLabs refused or failed; status_code is None for network errors.
+    retry_after is the server's Retry-After in seconds, when it sent one."""
+
+    def __init__(self, message, status_code=None, retry_after=None):
+        super().__init__(message)
+        self.status_code = status_code
+        self.retry_after = retry_after
+
+    @property
+    def retryable(self):
+        return self.status_code is None or self.status_code == 429 or self.status_code >= 500
+
+
+def cache_key(text, voice_id, model_id, voice_settings=None, output_format=DEFAULT_FORMAT):
+    payload = json.dumps({"text": text, "voice_id": voice_id, "model_id": model_id,
+                          "voice_settings": voice_settings or {}, "output_format": output_format},
+                         sort_keys=True, ensure_ascii=False)
+    return hashlib.sha256(payload.encode()).hexdigest()
+
+
+class TTSCache:
+    def __init__(self, root=CACHE_DIR, max_bytes=MAX_CACHE_BYTES):
+        self.root = Path(root)
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._db = None
+
+    @property
+    def db(self):
+        if self._db is None:
+            self.root.mkdir(parents=True, exist_ok=True)
+            self._db = sqlite3.connect(str(self.root / "index.db"), timeout=10, check_same_thread=False)
+            self._db.execute("PRAGMA journal_mode=WAL")  # the bot and batch scripts share it
+            self._db.executescript(SCHEMA)
+        return self._db
+
+    def _bump(self, **amounts):
+        with self._lock, self.db:
+            for name, amount in amounts.items():
+                self.db.execute(
+                    "INSERT INTO counters (name, value) VALUES (?, ?) "
+                    "ON CONFLICT(name) DO UPDATE SET value = value + excluded.value", (name, amount))
+
+    def has(self, key):
+        """True if `key` is stored — without counting a hit or touching its LRU position."""
+        with self._lock:
+            row = self.db.execute("SELECT file FROM clips WHERE key = ?", (key,)).fetchone()
+        return bool(row) and (self.root / row[0]).exists()
+
+    def get(self, key, count=True):
+        """Path of a stored clip (marking it used), or None."""
+        with self._lock:
+            row = self.db.execute("SELECT file, chars, size FROM clips WHERE key = ?", (key,)).fetchone()
+        if not row:
+            return None
+        path = self.root / row[0]
+        if not path.exists():
+            with self._lock, self.db:
+                self.db.execute("DELETE FROM clips WHERE key = ?", (key,))
+            return None
+        with self._lock, self.db:
+            self.db.execute("UPDATE clips SET last_used = ?, hits = hits + 1 WHERE key = ?", (time.time(), key))
+        if count:
+            self._bump(hits=1, chars_saved=row[1], bytes_served=row[2])
+        return path
+
+    def put(self, key, audio, text="", voice_id="", model_id="", ext="mp3"):
+        name = f"{key[:2]}/{key}.{ext}"
+        path = self.root / name
+        path.parent.mkdir(parents=True, exist_ok=True)
+        atomic_write(path, audio, durable=False)  # unique temp name: two replies may store one clip at once
+        now = time.time()
+        with self._lock, self.db:
+            self.db.execute("INSERT OR REPLACE INTO clips VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, 0)",
+                            (key, name, len(text), len(audio), voice_id, model_id, text[:80], now, now))
+        self._prune(keep=key)
+        return path
+
+    def _prune(self, keep=None):
+        with self._lock:
+            total = self.db.execute("SELECT COALESCE(SUM(size), 0) FROM clips").fetchone()[0]
+            if total <= self.max_bytes:
+                return
+            rows = self.db.execute("SELECT key, file, size FROM clips ORDER BY last_used").fetchall()
+            with self.db:
+                for key, name, size in rows:
+                    if total <= self.max_bytes * 0.9:
+                        break
+                    if key == keep:
+                        continue
+                    self.db.execute("DELETE FROM clips WHERE key = ?", (key,))
+                    (self.root / name).unlink(missing_ok=True)
+                    total -= size
+
+    def synthesize(self, text, voice_id, model_id, voice_settings=None, output_format=DEFAULT_FORMAT,
+                   api_key=None, timeout=30, refresh=False):
+        """Speech for `text`, from the store if this exact request was made before.
+
+        refresh=True skips the store and overwrites the entry with a new take.
+        Returns Speech(path, key, cached, chars). Raises TTSError if ElevenLabs fails.
+        """
+        key = cache_key(text, voice_id, model_id, voice_settings, output_format)
+        path = None if refresh else self.get(key)
+        if path:
+            return Speech(path, key, True, len(text))
+
+        api_key = api_key or os.environ.get("ELEVENLABS_API_KEY", "")
+        if not api_key:
+            raise TTSError("No ELEVENLABS_API_KEY set", 401)
+        body = {"text": text, "model_id": model_id}
+        if voice_settings:
+            body["voice_settings"] = voice_settings
+        try:
+            r = requests.post(TTS_URL.format(voice_id=voice_id), params={"output_format": output_format},
+                              headers={"xi-api-key": api_key, "Content-Type": "application/json"},
+                              json=body, timeout=timeout)
+        except requests.RequestException as e:
+            raise TTSError(str(e)[:200]) from e
+        if r.status_code != 200:
+            try:
+                retry_after = float(r.headers.get("Retry-After"))
+            except (TypeError, ValueError):
+                retry_after = None
+            raise TTSError(f"ElevenLabs error {r.status_code}: {r.text[:200]}", r.status_code, retry_after)
+        self._bump(misses=1, chars_billed=len(text))
+        path = self.put(key, r.content, text, voice_id, model_id, output_format.split("_")[0])
+        return Speech(path, key, False, len(text))
+
+    def join(self, paths):
+        """One clip made of several stored clips, itself stored (so a repeat join is a hit too)."""
+        paths = [Path(p) for p in paths]
+        key = hashlib.sha256("|".join(p.stem for p in paths).encode()).hexdigest()
+        path = self.get(key, count=False)  # its parts were already counted
+        if path:
+            return path
+        return self.put(key, b"".join(p.read_bytes() for p in paths), ext=paths[0].suffix.lstrip(".") or "mp3")
+
+    def stats(self):
+        with self._lock:
+            values = dict(self.db.execute("SELECT name, value FROM counters").fetchall())
+            clips, size = self.db.execute("SELECT COUNT(*), COALESCE(SUM(size), 0) FROM clips").fetchone()
+        out = {name: int(values.get(name, 0)) for name in COUNTERS}
+        lookups = out["hits"] + out["misses"]
+        out["hit_rate_pct"] = round(100 * out["hits"] / lookups, 1) if lookups else 0.0
+        out["usd_saved"] = round(out["chars_saved"] * PRICING["elevenlabs"]["per_char"], 4)
+        out.update(clips=clips, stored_bytes=size)
+        return out
+
+    def clear(self):
+        with self._lock:
+            if self._db is not None:
+                self._db.close()
+                self._db = None
+            shutil.rmtree(self.root, ignore_errors=True)
+
+
+TTS_CACHE = TTSCache()
+
+
+if __name__ == "__main__":
+    cmd = sys.argv[1] if len(sys.argv) > 1 else "stats"
+    if cmd == "clear":
+        TTS_CACHE.clear()
+        print("  TTS cache cleared.")
+    elif cmd == "stats":
+        s = TTS_CACHE.stats()
+        print(f"\n  Lookups: {s['hits']} hits, {s['misses']} synthesized ({s['hit_rate_pct']}% hit rate)")
+        print(f"  Characters: {s['chars_billed']:,} billed, {s['chars_saved']:,} saved (~${s['usd_saved']:.2f})")
+        print(f"  Store: {s['clips']} clips, {s['stored_bytes'] / 1024 / 1024:.1f} MB\n")
+    else:
+        print("Usage: python tts_cache.py [stats|clear]")
@@ -3,14 +3,25 @@ Usage Tracker — Track API costs across all providers.
 Logs every API call with tokens, cost, task type, and provider.
 Generates daily/weekly/monthly reports.
 Recommends cheaper alternatives when spending is high.
+
+Storage: SQLite (usage-log.db) — append-only entries table indexed by
+timestamp, plus daily rollups per provider / task / project kept up to date
+on every log(). log() is a single insert + three upserts, and report(days)
+reads rollups for whole days, so both stay fast at millions of entries.
+The old usage-log.json is migrated automatically the first time the DB is
+created, or explicitly with: python usage_tracker.py migrate [json_path]
 """
 
 import json
 import os
+import sqlite3
+import threading
+import time
 from datetime import datetime, timedelta
 from pathlib import Path
 
-TRACKER_FILE = Path(__file__).parent / "usage-log.json"
+TRACKER_FILE = Path(__file__).parent / "usage-log.json"  # legacy JSON log (migrated once)
+TRACKER_DB = Path(__file__).parent / "usage-log.db"
 
 # Cost per 1K tokens (input/output) — updated Feb 2026
 PRICING = {
@@ -33,20 +44,84 @@ PRICING = {
 }
 
 
-class UsageTracker:
-    def __init__(self, path=TRACKER_FILE):
-        self.path = path
-        self.data = self._load()
+ENTRY_FIELDS = [
+    "timestamp", "provider", "provider_name", "tier", "task_type", "project",
+    "input_tokens", "output_tokens", "total_tokens", "chars", "minutes",
+    "messages", "executions", "cost_usd", "notes",
+]
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS entries (
+    id INTEGER PRIMARY KEY,
+    timestamp TEXT NOT NULL,
+    provider TEXT, provider_name TEXT, tier TEXT, task_type TEXT, project TEXT,
+    input_tokens INTEGER, output_tokens INTEGER, total_tokens INTEGER,
+    chars INTEGER, minutes REAL, messages INTEGER, executions INTEGER,
+    cost_usd REAL, notes TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_entries_timestamp ON entries(timestamp);
+CREATE TABLE IF NOT EXISTS daily_rollups (
+    day TEXT NOT NULL,
+    dimension TEXT NOT NULL,   -- provider | task | project
+    key TEXT NOT NULL,
+    tier TEXT,
+    cost REAL NOT NULL DEFAULT 0,
+    tokens INTEGER NOT NULL DEFAULT 0,
+    calls INTEGER NOT NULL DEFAULT 0,
+    PRIMARY KEY (day, dimension, key)
+);
+CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT);
+"""
 
-    def _load(self):
-        if self.path.exists():
-            with open(self.path, "r") as f:
-                return json.load(f)
-        return {"entries": [], "summary": {}}
+# dimension → entry field used as the rollup key
+DIMENSIONS = {"provider": "provider_name", "task": "task_type", "project": "project"}
 
-    def _save(self):
-        with open(self.path, "w") as f:
-            json.dump(self.data, f, indent=2)
+
+class UsageTracker:
+    def __init__(self, path=TRACKER_DB, json_path=TRACKER_FILE):
+        self.path = Path(path)
+        is_new = not self.path.exists()
+        self._lock = threading.Lock()
+        self.db = sqlite3.connect(str(self.path), timeout=10, check_same_thread=False)
+        self.db.execute("PRAGMA journal_mode=WAL")  # several agents log at once
+        self.db.executescript(SCHEMA)
+        if is_new and json_path and Path(json_path).exists():
+            self.migrate_json(json_path)
+
+    def _insert(self, entry):
+        """Append one entry and bump its daily rollups (caller commits)."""
+        self.db.execute(
+            f"INSERT INTO entries ({', '.join(ENTRY_FIELDS)}) VALUES ({', '.join('?' * len(ENTRY_FIELDS))})",
+            [entry.get(f, "" if f == "notes" else 0) for f in ENTRY_FIELDS],
+        )
+        day = entry["timestamp"][:10]
+        for dimension, field in DIMENSIONS.items():
+            self.db.execute(
+                """INSERT INTO daily_rollups (day, dimension, key, tier, cost, tokens, calls)
+                   VALUES (?, ?, ?, ?, ?, ?, 1)
+                   ON CONFLICT(day, dimension, key) DO UPDATE SET
+                     cost = cost + excluded.cost, tokens = tokens + excluded.tokens,
+                     calls = calls + 1, tier = excluded.tier""",
+                (day, dimension, entry.get(field, ""), entry.get("tier", "unknown"),
+                 entry.get("cost_usd", 0.0), entry.get("total_tokens", 0)),
+            )
+
+    def migrate_json(self, json_path=TRACKER_FILE):
+        """One-shot import of the legacy usage-log.json. Returns entries imported (0 if already done)."""
+        json_path = Path(json_path)
+        with self._lock:
+            done = self.db.execute("SELECT value FROM meta WHERE key = 'migrated_from'").fetchone()
+            if done:
+                return 0
+            with open(json_path, "r") as f:
+                entries = json.load(f).get("entries", [])
+            with self.db:
+                for entry in entries:
+                    entry.setdefault("total_tokens", entry.get("input_tokens", 0) + entry.get("output_tokens", 0))
+                    self._insert(entry)
+                self.db.execute("INSERT INTO meta (key, value) VALUES ('migrated_from', ?)",
+                                (f"{json_path} ({len(entries)} entries)",))
+        return len(entries)
 
     def log(self, provider, task_type, input_tokens=0, output_tokens=0,
             chars=0, minutes=0, messages=0, executions=0, project="general", notes=""):
@@ -84,52 +159,52 @@ class UsageTracker:
             "cost_usd": round(cost, 6),
             "notes": notes,
         }
-        self.data["entries"].append(entry)
-        self._save()
+        with self._lock, self.db:
+            self._insert(entry)
         return entry
 
+    def _aggregate(self, cutoff):
+        """Totals per dimension since cutoff: rollups for whole days, indexed entries for the first partial day."""
+        cutoff_iso = cutoff.isoformat()
+        next_day = (cutoff + timedelta(days=1)).strftime("%Y-%m-%d")
+        totals = {d: {} for d in DIMENSIONS}
+
+        def add(dimension, key, tier, cost, tokens, calls):
+            bucket = totals[dimension].setdefault(key, {"cost": 0, "tokens": 0, "calls": 0, "tier": tier})
+            bucket["cost"] += cost or 0
+            bucket["tokens"] += tokens or 0
+            bucket["calls"] += calls
+            bucket["tier"] = tier or bucket["tier"]
+
+        with self._lock:
+            rows = self.db.execute(
+                "SELECT dimension, key, tier, SUM(cost), SUM(tokens), SUM(calls) FROM daily_rollups "
+                "WHERE day >= ? GROUP BY dimension, key", (next_day,)).fetchall()
+            for row in rows:
+                add(*row)
+            for dimension, field in DIMENSIONS.items():
+                rows = self.db.execute(
+                    f"SELECT {field}, MAX(tier), SUM(cost_usd), SUM(total_tokens), COUNT(*) FROM entries "
+                    "WHERE timestamp >= ? AND timestamp < ? GROUP BY " + field, (cutoff_iso, next_day)).fetchall()
+                for row in rows:
+                    add(dimension, *row)
+        return totals
+
     def report(self, days=7):
         """Generate a usage report for the last N days."""
-        cutoff = (datetime.now() - timedelta(days=days)).isoformat()
-        recent = [e for e in self.data["entries"] if e["timestamp"] >= cutoff]
+        totals = self._aggregate(datetime.now() - timedelta(days=days))
+        by_provider = totals["provider"]
+        by_task = totals["task"]
+        by_project = totals["project"]
+        entries = sum(v["calls"] for v in by_provider.values())
 
-        if not recent:
+        if not entries:
             return {"period": f"Last {days} days", "total_cost": 0, "entries": 0,
                     "by_provider": {}, "by_task": {}, "by_project": {},
                     "savings_tip": "No usage recorded yet."}
 
-        total_cost = sum(e["cost_usd"] for e in recent)
-        total_tokens = sum(e["total_tokens"] for e in recent)
-
-        # By provider
-        by_provider = {}
-        for e in recent:
-            p = e["provider_name"]
-            if p not in by_provider:
-                by_provider[p] = {"cost": 0, "tokens": 0, "calls": 0, "tier": e["tier"]}
-            by_provider[p]["cost"] += e["cost_usd"]
-            by_provider[p]["tokens"] += e["total_tokens"]
-            by_provider[p]["calls"] += 1
-
-        # By task type
-        by_task = {}
-        for e in recent:
-            t = e["task_type"]
-            if t not in by_task:
-                by_task[t] = {"cost": 0, "tokens": 0, "calls": 0}
-            by_task[t]["cost"] += e["cost_usd"]
-            by_task[t]["tokens"] += e["total_tokens"]
-            by_task[t]["calls"] += 1
-
-        # By project
-        by_project = {}
-        for e in recent:
-            p = e["project"]
-            if p not in by_project:
-                by_project[p] = {"cost": 0, "tokens": 0, "calls": 0}
-            by_project[p]["cost"] += e["cost_usd"]
-            by_project[p]["tokens"] += e["total_tokens"]
-            by_project[p]["calls"] += 1
+        total_cost = sum(v["cost"] for v in by_provider.values())
+        total_tokens = sum(v["tokens"] for v in by_provider.values())
 
         # Savings tips
         paid_cost = sum(v["cost"] for v in by_provider.values() if v["tier"] == "paid")
@@ -152,7 +227,7 @@ class UsageTracker:
             "period": f"Last {days} days",
             "total_cost": round(total_cost, 4),
             "total_tokens": total_tokens,
-            "entries": len(recent),
+            "entries": entries,
             "paid_vs_free": f"{paid_calls} paid / {free_calls} free calls",
             "by_provider": {k: {"cost": f"${v['cost']:.4f}", "tokens": v["tokens"],
                                 "calls": v["calls"], "tier": v["tier"]}
@@ -215,22 +290,197 @@ ROUTING_TABLE = {
 }
 
 
+# ============================================================
+# LIVE ROUTER — latency/health-aware, with circuit breakers
+# ============================================================
+# Every real call is recorded (latency + outcome) in the same SQLite file, so
+# the bot, scout and research agents share one view of provider health.
+#
+#   closed    → normal; FAILURE_THRESHOLD consecutive failures (or any 429) opens it
+#   open      → skipped for the cooldown (30s, doubling per trip, max 10 min;
+#               a 429's Retry-After wins if longer)
+#   half_open → one process gets a single trial call; success closes, failure reopens
+ROUTER_SCHEMA = """
+CREATE TABLE IF NOT EXISTS provider_calls (
+    ts REAL NOT NULL,
+    provider TEXT NOT NULL,
+    latency_ms REAL NOT NULL,
+    outcome TEXT NOT NULL      -- ok | error | rate_limited | timeout | client_error
+);
+CREATE INDEX IF NOT EXISTS idx_provider_calls ON provider_calls(provider, ts);
+CREATE TABLE IF NOT EXISTS circuits (
+    provider TEXT PRIMARY KEY,
+    state TEXT NOT NULL DEFAULT 'closed',
+    failures INTEGER NOT NULL DEFAULT 0,
+    trips INTEGER NOT NULL DEFAULT 0,
+    opened_at REAL NOT NULL DEFAULT 0,
+    cooldown REAL NOT NULL DEFAULT 0
+);
+"""
+
+HEALTH_WINDOW = 15 * 60       # seconds of history used for percentiles and error rate
+FAILURE_THRESHOLD = 3         # consecutive failures that open the breaker
+BASE_COOLDOWN = 30
+MAX_COOLDOWN = 600
+UNKNOWN_LATENCY_MS = 2000     # assumed p50 for providers with no recent successes
+HEALTH_FAILURES = ("error", "rate_limited", "timeout")
+
+
+def _outcome(status):
+    """Map an HTTP status (or 'timeout' / 'error' / exception) to a health outcome."""
+    if isinstance(status, int):
+        if 200 <= status < 300:
+            return "ok"
+        if status == 429:
+            return "rate_limited"
+        if status in (400, 404, 413, 422):
+            return "client_error"  # our request was bad, the provider is fine
+        return "error"
+    return "timeout" if status == "timeout" else "error"
+
+
+def _percentile(values, pct):
+    if not values:
+        return None
+    values = sorted(values)
+    return values[min(len(values) - 1, int(round(pct / 100 * (len(values) - 1))))]
+
+
+class LiveRouter:
+    def __init__(self, path=TRACKER_DB):
+        self.path = Path(path)
+        self._db = None
+        self._lock = threading.Lock()
+        self._records = 0
+
+    @property
+    def db(self):
+        if self._db is None:
+            self._db = sqlite3.connect(str(self.path), timeout=10, check_same_thread=False)
+            self._db.execute("PRAGMA journal_mode=WAL")
+            self._db.executescript(ROUTER_SCHEMA)
+        return self._db
+
+    def _circuit(self, provider):
+        row = self.db.execute("SELECT state, failures, trips, opened_at, cooldown FROM circuits WHERE provider = ?",
+                              (provider,)).fetchone()
+        return row or ("closed", 0, 0, 0.0, 0.0)
+
+    # ── recording ──
+    def record(self, provider, latency, status, retry_after=None):
+        """Record one real call. latency in seconds, status = HTTP code, 'timeout' or 'error'."""
+        outcome = _outcome(status)
+        now = time.time()
+        with self._lock, self.db:
+            self.db.execute("INSERT INTO provider_calls (ts, provider, latency_ms, outcome) VALUES (?, ?, ?, ?)",
+                            (now, provider, latency * 1000, outcome))
+            state, failures, trips, opened_at, cooldown = self._circuit(provider)
+            if outcome in HEALTH_FAILURES:
+                failures += 1
+                already_open = state == "open" and now - opened_at < cooldown  # late reply from before it opened
+                if not already_open and (state == "half_open" or outcome == "rate_limited"
+                                         or failures >= FAILURE_THRESHOLD):
+                    cooldown = min(MAX_COOLDOWN, BASE_COOLDOWN * 2 ** trips)
+                    try:
+                        cooldown = max(cooldown, float(retry_after or 0))
+                    except ValueError:
+                        pass
+                    state, opened_at, trips = "open", now, trips + 1
+            elif outcome == "ok":
+                state, failures, trips = "closed", 0, 0
+            self.db.execute(
+                """INSERT INTO circuits (provider, state, failures, trips, opened_at, cooldown)
+                   VALUES (?, ?, ?, ?, ?, ?)
+                   ON CONFLICT(provider) DO UPDATE SET state = excluded.state, failures = excluded.failures,
+                     trips = excluded.trips, opened_at = excluded.opened_at, cooldown = excluded.cooldown""",
+                (provider, state, failures, trips, opened_at, cooldown))
+            self._records += 1
+            if self._records % 200 == 0:
+                self.db.execute("DELETE FROM provider_calls WHERE ts < ?", (now - 86400,))
+        return outcome
+
+    # ── breaker ──
+    def allow(self, provider):
+        """True if a call to this provider should go out now (claims the half-open trial if due)."""
+        now = time.time()
+        with self._lock:
+            state, _, _, opened_at, cooldown = self._circuit(provider)
+            if state == "closed":
+                return True
+            if now - opened_at < cooldown:
+                return False
+            # Cooldown over (or a half-open trial went unanswered): exactly one caller gets the trial
+            with self.db:
+                claimed = self.db.execute(
+                    "UPDATE circuits SET state = 'half_open', opened_at = ? "
+                    "WHERE provider = ? AND state = ? AND opened_at = ?",
+                    (now, provider, state, opened_at)).rowcount
+            return claimed == 1
+
+    def state(self, provider):
+        with self._lock:
+            state, _, _, opened_at, cooldown = self._circuit(provider)
+        if state == "open" and time.time() - opened_at >= cooldown:
+            return "half_open"  # next allow() will let a trial through
+        return state
+
+    # ── health ──
+    def health(self, provider, window=HEALTH_WINDOW):
+        """Rolling stats: calls, p50/p95 latency of successes (ms), error rate, 429s, breaker state."""
+        with self._lock:
+            rows = self.db.execute(
+                "SELECT latency_ms, outcome FROM provider_calls WHERE provider = ? AND ts >= ?",
+                (provider, time.time() - window)).fetchall()
+        ok = [lat for lat, outcome in rows if outcome == "ok"]
+        failures = sum(1 for _, outcome in rows if outcome in HEALTH_FAILURES)
+        return {
+            "calls": len(rows),
+            "p50_ms": _percentile(ok, 50),
+            "p95_ms": _percentile(ok, 95),
+            "error_rate": round(failures / len(rows), 3) if rows else 0.0,
+            "rate_limited": sum(1 for _, outcome in rows if outcome == "rate_limited"),
+            "circuit": self.state(provider),
+        }
+
+    def ranked(self, task_type, allow_paid=False):
+        """Healthy providers for a task in the cheapest tier available, fastest first."""
+        providers = ROUTING_TABLE.get(task_type, ["groq"])
+        free = [p for p in providers if PRICING.get(p, {}).get("tier") == "free"]
+        tier = free if free and not allow_paid else providers
+        scored = []
+        for order, p in enumerate(tier):
+            h = self.health(p)
+            if h["circuit"] == "open":
+                continue
+            latency = h["p50_ms"] if h["p50_ms"] is not None else UNKNOWN_LATENCY_MS
+            # Slow + flaky loses to fast + reliable; table order breaks ties
+            scored.append((latency * (1 + 4 * h["error_rate"]), order, p))
+        return [p for _, _, p in sorted(scored)]
+
+    def choose(self, task_type, allow_paid=False):
+        """Fastest healthy provider for the task, or None if every candidate's breaker is open."""
+        ranked = self.ranked(task_type, allow_paid)
+        return ranked[0] if ranked else None
+
+
+ROUTER = LiveRouter()
+
+
 def get_best_provider(task_type):
-    """Return the cheapest provider for a given task type."""
+    """Return the fastest healthy provider in the cheapest tier for a given task type."""
     providers = ROUTING_TABLE.get(task_type, ["groq"])
-    for p in providers:
-        pricing = PRICING.get(p, {})
-        if pricing.get("tier") == "free":
-            return p, pricing.get("name", p), "FREE"
-    # If no free option, return first (cheapest paid)
-    p = providers[0]
-    return p, PRICING.get(p, {}).get("name", p), "PAID"
+    p = ROUTER.choose(task_type)
+    if p is None:
+        # Every breaker open — fall back to the static cheapest choice
+        p = next((p for p in providers if PRICING.get(p, {}).get("tier") == "free"), providers[0])
+    pricing = PRICING.get(p, {})
+    return p, pricing.get("name", p), "FREE" if pricing.get("tier") == "free" else "PAID"
 
 
 def print_routing_table():
-    """Show the full routing table with costs."""
+    """Show the full routing table with costs and live provider health."""
     print(f"\n{'='*70}")
-    print(f"  SMART ROUTING TABLE — Cheapest Provider Per Task")
+    print(f"  SMART ROUTING TABLE — Fastest Healthy Provider Per Task")
     print(f"{'='*70}")
     print(f"  {'Task':<25} {'Provider':<25} {'Cost':<10}")
     print(f"  {'-'*60}")
@@ -240,15 +490,35 @@ def print_routing_table():
     print(f"{'='*70}\n")
 
 
+def print_health():
+    """Live latency / error / breaker view of every routed provider."""
+    print(f"\n{'='*78}")
+    print(f"  PROVIDER HEALTH — last {HEALTH_WINDOW // 60} min")
+    print(f"{'='*78}")
+    print(f"  {'Provider':<16} {'Calls':>6} {'p50':>8} {'p95':>8} {'Errors':>8} {'429s':>5}  Circuit")
+    print(f"  {'-'*72}")
+    seen = []
+    for providers in ROUTING_TABLE.values():
+        seen += [p for p in providers if p not in seen]
+    for p in seen:
+        h = ROUTER.health(p)
+        fmt = lambda ms: f"{ms:.0f}ms" if ms is not None else "—"
+        print(f"  {p:<16} {h['calls']:>6} {fmt(h['p50_ms']):>8} {fmt(h['p95_ms']):>8} "
+              f"{h['error_rate']:>7.0%} {h['rate_limited']:>5}  {h['circuit']}")
+    print(f"{'='*78}\n")
+
+
 if __name__ == "__main__":
     import sys
     tracker = UsageTracker()
 
     if len(sys.argv) < 2:
-        print("Usage: python usage_tracker.py [report|route|log]")
+        print("Usage: python usage_tracker.py [report|route|health|log|migrate]")
         print("  report [days]    — Show usage report")
         print("  route            — Show smart routing table")
+        print("  health           — Live provider latency, errors and circuit breakers")
         print("  log <provider> <task> <in_tokens> <out_tokens> [project]")
+        print("  migrate [json]   — Import the legacy usage-log.json into the DB")
         sys.exit(0)
 
     cmd = sys.argv[1]
@@ -257,6 +527,8 @@ if __name__ == "__main__":
         tracker.print_report(days)
     elif cmd == "route":
         print_routing_table()
+    elif cmd == "health":
+        print_health()
     elif cmd == "log":
         if len(sys.argv) < 5:
             print("  Usage: log <provider> <task> <in_tokens> <out_tokens> [project]")
@@ -268,3 +540,7 @@ if __name__ == "__main__":
             project = sys.argv[6] if len(sys.argv) > 6 else "general"
             entry = tracker.log(provider, task, input_tokens=in_tok, output_tokens=out_tok, project=project)
             print(f"  Logged: {entry['provider_name']} | {task} | {in_tok}+{out_tok} tokens | ${entry['cost_usd']:.4f}")
+    elif cmd == "migrate":
+        src = Path(sys.argv[2]) if len(sys.argv) > 2 else TRACKER_FILE
+        n = tracker.migrate_json(src)
+        print(f"  Migrated {n} entries from {src}" if n else "  Already migrated — nothing to do.")
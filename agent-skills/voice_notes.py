@@ -0,0 +1,186 @@
+"""
+Voice Notes — Lee's voice as Telegram voice notes, first sentence first
+=========================================================================
+/say and voice replies used to wait for speak() to synthesize the whole
+reply as one MP3, write it to disk, then reopen and upload it. Here:
+
+    sentences  the reply is split into sentences (not after "Dr." or "A.I.");
+               every sentence is synthesized at once through tts_cache, so
+               repeated sentences are free — bounded by ELEVENLABS_CONCURRENCY
+               across all replies, and retried like tts_batch does
+    notes      sentences are grouped into voice notes — the first one short
+               (FIRST_NOTE_CHARS) so it can be sent while the rest is still
+               being synthesized; Telegram plays consecutive notes in a row
+    encoding   each sentence's MP3 is piped into ffmpeg as soon as it (and the
+               ones before it) arrive, and comes out as OGG/Opus — the format
+               Telegram voice notes use — in memory, with no temp files
+    caching    finished notes are stored in tts_cache too, so a repeated
+               /say is sent without synthesizing or encoding anything
+
+Without ffmpeg on the PATH notes fall back to MP3, which Telegram also
+accepts for voice notes.
+
+Usage:
+    from voice_notes import voice_notes
+    async for note in voice_notes("Long reply. With several sentences."):
+        await message.reply_voice(voice=note.audio)
+"""
+
+import re
+import time
+import shutil
+import asyncio
+import hashlib
+from collections import namedtuple
+
+from tts_cache import TTS_CACHE, TTSError, cache_key
+from tts_batch import MAX_CONCURRENCY, synthesize_with_retry
+from voice_review import ELEVENLABS_KEY, LEE_VOICE_ID, MODEL_ID, VOICE_SETTINGS
+
+FFMPEG = shutil.which("ffmpeg")
+OPUS_ARGS = ["-c:a", "libopus", "-b:a", "48k", "-ar", "48000", "-ac", "1", "-application", "voip"]
+FIRST_NOTE_CHARS = 160   # first note: a sentence or two, out as fast as possible
+NOTE_CHARS = 1200        # later notes
+MIN_SENTENCE_CHARS = 25  # shorter fragments ride along with the next sentence
+MAX_SENTENCE_CHARS = 300
+
+VoiceNote = namedtuple("VoiceNote", "audio format text cached")
+
+_SENTENCE_END = re.compile(r"(?<=[.!?…])[\"')\]]*\s+")
+# A period after an initial ("A.I.", "U.S.") or a title doesn't end the sentence
+_ABBREVIATION = re.compile(r"(?:\b[A-Za-z]|\b(?:Mr|Mrs|Ms|Dr|Prof|St|Jr|Sr|vs|Inc|Ltd|Co|Corp|approx|e\.g|i\.e))\.$")
+
+# Shared by every reply in flight: ElevenLabs counts concurrent requests per account
+SLOTS = asyncio.Semaphore(MAX_CONCURRENCY)
+
+
+def log(tag, msg):
+    ts = time.strftime("%H:%M:%S")
+    print(f"  [{ts}] [{tag}] {msg}")
+
+
+def _raw_sentences(text):
+    held = ""
+    for part in _SENTENCE_END.split(text.strip()):
+        part = f"{held} {part}" if held else part
+        if _ABBREVIATION.search(part):
+            held = part
+            continue
+        held = ""
+        yield part
+    if held:
+        yield held
+
+
+def split_sentences(text):
+    """Sentences of `text`, short fragments merged forward, over-long ones cut at a comma or space."""
+    sentences, pending = [], ""
+    for part in _raw_sentences(text):
+        part = f"{pending} {part}".strip() if pending else part.strip()
+        if not part:
+            continue
+        if len(part) < MIN_SENTENCE_CHARS:
+            pending = part
+            continue
+        pending = ""
+        while len(part) > MAX_SENTENCE_CHARS:
+            cut = max(part.rfind(", ", 0, MAX_SENTENCE_CHARS), part.rfind(" ", 0, MAX_SENTENCE_CHARS))
+            cut = cut + 1 if cut > 0 else MAX_SENTENCE_CHARS
+            sentences.append(part[:cut].strip())
+            part = part[cut:].strip()
+        sentences.append(part)
+    if pending:
+        if sentences and len(sentences[-1]) + len(pending) < MAX_SENTENCE_CHARS:
+            sentences[-1] = f"{sentences[-1]} {pending}"
+        else:
+            sentences.append(pending)
+    return sentences
+
+
+def group_notes(sentences):
+    """Sentences → lists of sentences, one list per voice note."""
+    notes, current, limit = [], [], FIRST_NOTE_CHARS
+    for sentence in sentences:
+        if current and sum(len(s) for s in current) + len(sentence) > limit:
+            notes.append(current)
+            current, limit = [], NOTE_CHARS
+        current.append(sentence)
+    if current:
+        notes.append(current)
+    return notes
+
+
+async def encode_ogg(clips):
+    """OGG/Opus bytes from awaitables of MP3 clips, fed to ffmpeg in order as each arrives."""
+    proc = await asyncio.create_subprocess_exec(
+        FFMPEG, "-hide_banner", "-loglevel", "error", "-f", "mp3", "-i", "pipe:0", *OPUS_ARGS, "-f", "ogg", "pipe:1",
+        stdin=asyncio.subprocess.PIPE, stdout=asyncio.subprocess.PIPE, stderr=asyncio.subprocess.PIPE)
+
+    async def feed():
+        try:
+            for clip in clips:
+                speech = await clip
+                proc.stdin.write(speech.path.read_bytes())
+                await proc.stdin.drain()
+        finally:
+            proc.stdin.close()
+
+    try:
+        _, ogg, err = await asyncio.gather(feed(), proc.stdout.read(), proc.stderr.read())
+    except BaseException:
+        if proc.returncode is None:
+            proc.kill()
+        await proc.wait()
+        raise
+    if await proc.wait() != 0 or not ogg:
+        raise RuntimeError(f"ffmpeg failed: {err.decode(errors='replace')[:200]}")
+    return ogg
+
+
+async def voice_notes(text, prefix=None, voice_id=None):
+    """Yield VoiceNote(audio bytes, "ogg" | "mp3", text, cached) for `text`, in order.
+
+    `prefix` is an opening line synthesized (and cached) on its own. Raises
+    TTSError if ElevenLabs fails, RuntimeError if encoding does.
+    """
+    if not ELEVENLABS_KEY:
+        raise TTSError("No ELEVENLABS_API_KEY set", 401)
+    voice = voice_id or LEE_VOICE_ID
+    fmt = "ogg" if FFMPEG else "mp3"
+    started = time.monotonic()
+    sentences = ([prefix] if prefix else []) + split_sentences(text)
+
+    async def synthesize(sentence):
+        async with SLOTS:
+            return await asyncio.to_thread(synthesize_with_retry, sentence, voice, MODEL_ID, VOICE_SETTINGS,
+                                           api_key=ELEVENLABS_KEY)
+
+    # Work out every note's cache key up front, and start synthesizing only what isn't stored
+    notes = []
+    for group in group_notes(sentences):
+        keys = [cache_key(s, voice, MODEL_ID, VOICE_SETTINGS) for s in group]
+        note_key = hashlib.sha256(f"{fmt}|{'|'.join(keys)}".encode()).hexdigest()
+        stored = TTS_CACHE.get(note_key)
+        clips = None if stored else [asyncio.ensure_future(synthesize(s)) for s in group]
+        notes.append((group, note_key, stored, clips))
+
+    try:
+        for i, (group, note_key, stored, clips) in enumerate(notes):
+            if stored:
+                audio = stored.read_bytes()
+            elif FFMPEG:
+                audio = await encode_ogg(clips)
+            else:
+                audio = b"".join([(await clip).path.read_bytes() for clip in clips])
+            if not stored:
+                TTS_CACHE.put(note_key, audio, " ".join(group), voice, MODEL_ID, ext=fmt)
+            if i == 0:
+                log("VOICE", f"First note ready in {time.monotonic() - started:.1f}s "
+                             f"({len(notes)} notes, {len(sentences)} sentences)")
+            yield VoiceNote(audio, fmt, " ".join(group), bool(stored))
+    finally:
+        for _, _, _, clips in notes:
+            for clip in clips or []:
+                if clip.done() and not clip.cancelled():
+                    clip.exception()  # a sentence we never got to failed — already moot
+                clip.cancel()
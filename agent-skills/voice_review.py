@@ -29,10 +29,13 @@ import os
 import sys
 import json
 import time
+import shutil
 import requests
 from pathlib import Path
 from datetime import datetime
 
+from tts_cache import TTS_CACHE, TTSError
+
 BASE_DIR = Path(__file__).parent.parent
 AGENT_DIR = Path(__file__).parent
 AUDIO_DIR = AGENT_DIR / "voice-output"
@@ -51,6 +54,14 @@ ELEVENLABS_KEY = os.environ.get("ELEVENLABS_API_KEY", "")
 LEE_VOICE_ID = os.environ.get("LEE_VOICE_ID", "6HrHqiq7ijVOY0eVOKhz")
 GROQ_KEY = os.environ.get("GROQ_API_KEY", "")
 
+MODEL_ID = "eleven_turbo_v2_5"
+VOICE_SETTINGS = {
+    "stability": 0.5,
+    "similarity_boost": 0.8,
+    "style": 0.3,
+    "use_speaker_boost": True,
+}
+
 
 def log(tag, msg):
     ts = time.strftime("%H:%M:%S")
@@ -60,56 +71,40 @@ def log(tag, msg):
 # ============================================================
 # 1. TEXT-TO-SPEECH — Lee's cloned voice
 # ============================================================
-def speak(text, voice_id=None, save_path=None, play=True):
-    """Convert text to speech using Lee's cloned voice via ElevenLabs."""
+def speak(text, voice_id=None, save_path=None, play=True, prefix=None):
+    """Convert text to speech using Lee's cloned voice via ElevenLabs.
+
+    Clips come from tts_cache, so a phrase said before costs nothing. `prefix`
+    is a fixed opening line cached on its own and joined in front of `text`,
+    so only the changing part is billed. Returns the audio path (in tts-cache/
+    unless save_path is given), or None.
+    """
     if not ELEVENLABS_KEY:
         log("VOICE", "No ELEVENLABS_API_KEY set")
-        print(f"\n  [Would say]: {text}")
+        print(f"\n  [Would say]: {f'{prefix} {text}' if prefix else text}")
         return None
 
     voice = voice_id or LEE_VOICE_ID
-    log("VOICE", f"Generating speech ({len(text)} chars)...")
+    lines = [prefix, text] if prefix else [text]
 
     try:
-        r = requests.post(
-            f"https://api.elevenlabs.io/v1/text-to-speech/{voice}",
-            headers={
-                "xi-api-key": ELEVENLABS_KEY,
-                "Content-Type": "application/json",
-            },
-            json={
-                "text": text,
-                "model_id": "eleven_turbo_v2_5",
-                "voice_settings": {
-                    "stability": 0.5,
-                    "similarity_boost": 0.8,
-                    "style": 0.3,
-                    "use_speaker_boost": True,
-                },
-            },
-            timeout=30,
-        )
-
-        if r.status_code == 200:
-            # Save audio
-            if not save_path:
-                save_path = str(AUDIO_DIR / f"review-{int(time.time())}.mp3")
-            Path(save_path).write_bytes(r.content)
-            log("VOICE", f"Audio saved: {Path(save_path).name} ({len(r.content)} bytes)")
+        clips = [TTS_CACHE.synthesize(line, voice, MODEL_ID, VOICE_SETTINGS, api_key=ELEVENLABS_KEY)
+                 for line in lines]
+    except TTSError as e:
+        log("VOICE", str(e))
+        print(f"\n  [Would say]: {' '.join(lines)}")
+        return None
 
-            # Play audio
-            if play:
-                play_audio(save_path)
+    path = clips[0].path if len(clips) == 1 else TTS_CACHE.join([c.path for c in clips])
+    billed = sum(c.chars for c in clips if not c.cached)
+    log("VOICE", f"{f'Generated {billed} chars' if billed else 'From cache'}: {path.name}")
+    if save_path:
+        shutil.copyfile(path, save_path)
+        path = Path(save_path)
 
-            return save_path
-        else:
-            log("VOICE", f"ElevenLabs error {r.status_code}: {r.text[:200]}")
-            print(f"\n  [Would say]: {text}")
-            return None
-    except Exception as e:
-        log("VOICE", f"Error: {str(e)[:100]}")
-        print(f"\n  [Would say]: {text}")
-        return None
+    if play:
+        play_audio(str(path))
+    return str(path)
 
 
 def play_audio(path):
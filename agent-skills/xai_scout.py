@@ -12,7 +12,7 @@ USAGE:
     python xai_scout.py news "wholesaling"         # Google News search
     python xai_scout.py reddit "real estate"       # Reddit search
     python xai_scout.py ask "What's hot in AI?"    # Ask Groq directly
-    python xai_scout.py brief                      # Full morning brief
+    python xai_scout.py brief [seconds]            # Full morning brief (time budget, default 12s)
     python xai_scout.py test                       # Test API connection
     python xai_scout.py                            # Interactive mode
 
@@ -24,12 +24,20 @@ import sys
 import json
 import time
 import re
-import xml.etree.ElementTree as ET
 import requests
 from pathlib import Path
 from datetime import datetime
 from dotenv import load_dotenv
 from urllib.parse import quote_plus
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+
+from usage_tracker import ROUTER
+from http_cache import HTTP_CACHE
+from reddit_client import REDDIT
+from feed_state import parse_rss
+from response_cache import minhash, similarity, normalize
+from kb_index import STOPWORDS
+from llm_quota import QUOTA, estimate_tokens
 
 # Load environment
 BASE_DIR = Path(__file__).parent.parent
@@ -62,6 +70,10 @@ DDWL_TOPICS = {
 BRAIN_DIR = Path(__file__).parent / "ghl-knowledge"
 BRAIN_DIR.mkdir(parents=True, exist_ok=True)
 
+# Headlines are allowed to be this old before we poll again (conditional GET after that)
+NEWS_TTL = 300
+REDDIT_TTL = 120
+
 HEADERS = {
     "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36"
 }
@@ -76,66 +88,110 @@ def log(tag, msg):
 # DATA SOURCES (Free)
 # ============================================================
 
-def fetch_google_news(query, max_results=8):
+def fetch_google_news(query, max_results=8, timeout=15):
     """Fetch headlines from Google News RSS feed."""
     url = f"https://news.google.com/rss/search?q={quote_plus(query)}&hl=en-US&gl=US&ceid=US:en"
     try:
-        r = requests.get(url, headers=HEADERS, timeout=15)
+        r = HTTP_CACHE.get(url, headers=HEADERS, timeout=timeout, min_ttl=NEWS_TTL)
         if r.status_code != 200:
             log("NEWS", f"Google News returned {r.status_code}")
             return []
 
-        root = ET.fromstring(r.content)
-        items = []
-        for item in root.findall(".//item")[:max_results]:
-            title = item.find("title")
-            link = item.find("link")
-            pub_date = item.find("pubDate")
-            source = item.find("source")
-            items.append({
-                "title": title.text if title is not None else "",
-                "link": link.text if link is not None else "",
-                "date": pub_date.text if pub_date is not None else "",
-                "source": source.text if source is not None else "",
-            })
-        return items
+        return [{k: item[k] for k in ("title", "link", "date", "source")}
+                for item in parse_rss(r.content, limit=max_results)]
     except Exception as e:
         log("NEWS", f"Error: {e}")
         return []
 
 
-def fetch_reddit(query, subreddit="all", max_results=8):
-    """Fetch posts from Reddit search JSON API."""
-    url = f"https://www.reddit.com/r/{subreddit}/search.json?q={quote_plus(query)}&sort=new&limit={max_results}&t=week"
-    try:
-        r = requests.get(url, headers=HEADERS, timeout=15)
-        if r.status_code != 200:
-            log("REDDIT", f"Reddit returned {r.status_code}")
-            return []
+def fetch_reddit(query, subreddit="all", max_results=8, timeout=15):
+    """Newest Reddit posts for a query this week (shared pooled client)."""
+    return REDDIT.search(query, subreddit, limit=max_results, sort="new", t="week",
+                         timeout=timeout, min_ttl=REDDIT_TTL)
 
-        data = r.json()
-        posts = []
-        for child in data.get("data", {}).get("children", [])[:max_results]:
-            d = child.get("data", {})
-            posts.append({
-                "title": d.get("title", ""),
-                "subreddit": d.get("subreddit", ""),
-                "score": d.get("score", 0),
-                "comments": d.get("num_comments", 0),
-                "url": f"https://reddit.com{d.get('permalink', '')}",
-                "created": datetime.fromtimestamp(d.get("created_utc", 0)).strftime("%Y-%m-%d"),
-            })
-        return posts
-    except Exception as e:
-        log("REDDIT", f"Error: {e}")
-        return []
+
+# ============================================================
+# HEADLINE CLUSTERING — one line per story, not per outlet
+# ============================================================
+CLUSTER_THRESHOLD = 0.55  # MinHash similarity of normalized titles
+
+# (title, title, same story?) — checked by `python xai_scout.py test`
+CLUSTER_CHECKS = [
+    ("Tampa home prices fall 5% in September - Tampa Bay Times",
+     "Tampa home prices fall 5% in September - WFLA", True),
+    ("Tampa home prices fall 5% in September - Tampa Bay Times",
+     "Home prices in Tampa fall 5% in September, report says - Fox 13", True),
+    ("Tampa home prices rise 5% in September", "Tampa home prices fall 5% in September", False),
+    ("Tampa home prices fall 5% in September", "Orlando home prices fall 5% in September", False),
+    ("Mortgage rates drop to 6.1% this week", "Mortgage rates drop to 6.4% this week", False),
+]
+
+
+def strip_publisher(title):
+    """'Tampa prices fall 5% - Tampa Bay Times' → 'Tampa prices fall 5%'."""
+    return re.sub(r"\s+[-–—|]\s+[^-–—|]+$", "", title or "")
+
+
+def content_words(title):
+    return set(normalize(strip_publisher(title)).split()) - STOPWORDS
+
+
+def same_story(words_a, words_b):
+    """Syndicated copies add words (", report says") but don't swap them: one title's
+    content words must all appear in the other. Catches rise/fall, Tampa/Orlando, 5%/7%
+    — short titles that MinHash alone rates as near-identical."""
+    return words_a <= words_b or words_b <= words_a
+
+
+def cluster_headlines(articles, threshold=CLUSTER_THRESHOLD):
+    """Collapse syndicated copies of the same story.
+
+    Returns one dict per story — the first article seen (Google News' top pick)
+    plus `sources` (distinct outlets), `count` and `queries` — ranked by how
+    many outlets carry it.
+    """
+    clusters = []
+    for order, a in enumerate(articles):
+        sig = minhash(normalize(strip_publisher(a["title"])))
+        words = content_words(a["title"])
+        for c in clusters:
+            if (a.get("link") and a["link"] == c.get("link")) or (
+                    similarity(sig, c["_sig"]) >= threshold and same_story(words, c["_words"])):
+                break
+        else:
+            c = dict(a, sources=[], count=0, queries=[], _sig=sig, _words=words, _order=order)
+            clusters.append(c)
+        c["count"] += 1
+        if a.get("source") and a["source"] not in c["sources"]:
+            c["sources"].append(a["source"])
+        if a.get("query") and a["query"] not in c["queries"]:
+            c["queries"].append(a["query"])
+
+    clusters.sort(key=lambda c: (-len(c["sources"]), c["_order"]))
+    for c in clusters:
+        del c["_sig"], c["_words"], c["_order"]
+    return clusters
+
+
+def story_line(story):
+    line = f"{strip_publisher(story['title'])} — {story['source']}"
+    if len(story["sources"]) > 1:
+        line += f" (covered by {len(story['sources'])} outlets: {', '.join(story['sources'][:4])})"
+    return line
+
+
+def _stories(articles, tag):
+    stories = cluster_headlines(articles)
+    if len(stories) < len(articles):
+        log(tag, f"{len(articles)} headlines → {len(stories)} stories")
+    return stories
 
 
 # ============================================================
 # GROQ AI BRAIN (Free)
 # ============================================================
 
-def call_groq(messages, temperature=0.3, max_tokens=2000):
+def call_groq(messages, temperature=0.3, max_tokens=2000, timeout=30):
     """Call Groq API — FREE, fast, reliable."""
     if not GROQ_API_KEY:
         log("ERROR", "GROQ_API_KEY not set in .env")
@@ -153,15 +209,37 @@ def call_groq(messages, temperature=0.3, max_tokens=2000):
         "max_tokens": max_tokens,
     }
 
+    if not ROUTER.allow("groq"):
+        log("ERROR", "Groq skipped — circuit open after recent failures")
+        return None
+    est = estimate_tokens(messages, max_tokens)
+    if not QUOTA.acquire("groq", tokens=est, priority="normal", timeout=min(30, timeout)):
+        log("ERROR", "Groq skipped — shared free-tier quota exhausted")
+        return None
+
+    start = time.time()
     try:
-        r = requests.post(GROQ_API_URL, headers=headers, json=payload, timeout=30)
-        if r.status_code != 200:
-            log("ERROR", f"Groq API {r.status_code}: {r.text[:200]}")
-            return None
-        return r.json()
-    except Exception as e:
+        r = requests.post(GROQ_API_URL, headers=headers, json=payload, timeout=timeout)
+    except requests.RequestException as e:
+        ROUTER.record("groq", time.time() - start, "timeout" if isinstance(e, requests.Timeout) else "error")
         log("ERROR", f"Groq request failed: {e}")
         return None
+    latency = time.time() - start
+    if r.status_code != 200:
+        ROUTER.record("groq", latency, r.status_code, r.headers.get("Retry-After"))
+        if r.status_code == 429:
+            QUOTA.backoff("groq", float(r.headers.get("Retry-After") or 30))
+        log("ERROR", f"Groq API {r.status_code}: {r.text[:200]}")
+        return None
+    try:
+        result = r.json()
+    except ValueError as e:
+        ROUTER.record("groq", latency, "error")
+        log("ERROR", f"Groq returned an unreadable body: {e}")
+        return None
+    ROUTER.record("groq", latency, r.status_code)
+    QUOTA.settle("groq", est, result.get("usage", {}).get("total_tokens"))
+    return result
 
 
 def groq_response(messages, **kwargs):
@@ -176,19 +254,9 @@ def groq_response(messages, **kwargs):
 # SCOUT COMMANDS
 # ============================================================
 
-def search_news(query, context=""):
-    """Search Google News and analyze with Groq."""
-    log("NEWS", f"Searching news for: {query}")
-    articles = fetch_google_news(query)
-
-    if not articles:
-        return "No news articles found."
-
-    # Format articles for Groq analysis
-    article_text = "\n".join(
-        f"- [{a['source']}] {a['title']} ({a['date'][:16]})"
-        for a in articles
-    )
+def analyze_news(query, articles, context="", timeout=30):
+    """Groq analysis of Google News headlines (duplicates collapsed first)."""
+    article_text = "\n".join(f"- {story_line(s)} ({s['date'][:16]})" for s in _stories(articles, "NEWS"))
 
     system = """You are Scout, a research agent for Do Deals With Lee (DDWL), a Tampa Bay real estate investment company run by Lee Kearney.
 Analyze these news headlines and provide:
@@ -200,29 +268,37 @@ Be concise and actionable."""
     if context:
         system += f"\n\nAdditional context: {context}"
 
-    response = groq_response([
+    return groq_response([
         {"role": "system", "content": system},
         {"role": "user", "content": f"Analyze these recent news headlines about '{query}':\n\n{article_text}"},
-    ])
+    ], timeout=timeout)
+
 
-    # Combine raw headlines + analysis
+def render_news(query, articles, analysis):
+    """Raw headlines + analysis."""
     output = f"### Google News: {query}\n\n"
-    for a in articles:
-        output += f"- **{a['title']}** — {a['source']} ({a['date'][:16]})\n"
-    output += f"\n### Scout Analysis\n\n{response or 'Analysis unavailable.'}"
+    for s in cluster_headlines(articles):
+        more = f", +{len(s['sources']) - 1} more" if len(s["sources"]) > 1 else ""
+        output += f"- **{strip_publisher(s['title'])}** — {s['source']}{more} ({s['date'][:16]})\n"
+    output += f"\n### Scout Analysis\n\n{analysis or 'Analysis unavailable.'}"
     return output
 
 
-def search_reddit_topics(query, context=""):
-    """Search Reddit and analyze with Groq."""
-    log("REDDIT", f"Searching Reddit for: {query}")
-    posts = fetch_reddit(query)
+def search_news(query, context=""):
+    """Search Google News and analyze with Groq."""
+    log("NEWS", f"Searching news for: {query}")
+    articles = fetch_google_news(query)
+
+    if not articles:
+        return "No news articles found."
+
+    return render_news(query, articles, analyze_news(query, articles, context))
 
-    if not posts:
-        return "No Reddit posts found."
 
+def analyze_reddit(query, posts, context="", timeout=30):
+    """Groq analysis of Reddit posts."""
     post_text = "\n".join(
-        f"- [r/{p['subreddit']}] {p['title']} (score: {p['score']}, comments: {p['comments']}, {p['created']})"
+        f"- [r/{p['subreddit']}] {p['title']} (score: {p['score']}, comments: {p['num_comments']}, {p['created']})"
         for p in posts
     )
 
@@ -236,18 +312,31 @@ Be concise."""
     if context:
         system += f"\n\nAdditional context: {context}"
 
-    response = groq_response([
+    return groq_response([
         {"role": "system", "content": system},
         {"role": "user", "content": f"Analyze these Reddit posts about '{query}':\n\n{post_text}"},
-    ])
+    ], timeout=timeout)
+
 
+def render_reddit(query, posts, analysis):
     output = f"### Reddit: {query}\n\n"
     for p in posts:
-        output += f"- **{p['title']}** — r/{p['subreddit']} ({p['score']}↑, {p['comments']} comments)\n"
-    output += f"\n### Scout Analysis\n\n{response or 'Analysis unavailable.'}"
+        output += f"- **{p['title']}** — r/{p['subreddit']} ({p['score']}↑, {p['num_comments']} comments)\n"
+    output += f"\n### Scout Analysis\n\n{analysis or 'Analysis unavailable.'}"
     return output
 
 
+def search_reddit_topics(query, context=""):
+    """Search Reddit and analyze with Groq."""
+    log("REDDIT", f"Searching Reddit for: {query}")
+    posts = fetch_reddit(query)
+
+    if not posts:
+        return "No Reddit posts found."
+
+    return render_reddit(query, posts, analyze_reddit(query, posts, context))
+
+
 def ask_scout(question):
     """Ask Scout anything — uses Groq directly."""
     log("ASK", f"Question: {question}")
@@ -262,35 +351,35 @@ Answer questions with actionable insights. Be concise. Use bullet points."""},
     return response or "No response from Groq."
 
 
-def get_trending():
-    """Get trending news across all DDWL topics."""
-    log("TRENDS", "Fetching trends across all topics...")
-    all_headlines = []
+TREND_QUERIES = [
+    "real estate wholesaling",
+    "Tampa Bay real estate",
+    "AI agents business automation",
+    "GoHighLevel updates",
+]
 
-    # Fetch news for key topics
-    key_queries = [
-        "real estate wholesaling",
-        "Tampa Bay real estate",
-        "AI agents business automation",
-        "GoHighLevel updates",
-    ]
-
-    for query in key_queries:
-        log("TRENDS", f"  → {query}")
-        articles = fetch_google_news(query, max_results=5)
-        for a in articles:
-            all_headlines.append(f"[{query}] {a['title']} — {a['source']}")
-        time.sleep(0.5)  # Be polite to Google
 
-    if not all_headlines:
-        return "No trending news found."
+def trend_headlines(query, articles):
+    return [dict(a, query=query) for a in articles]
 
-    headlines_text = "\n".join(f"- {h}" for h in all_headlines)
 
-    response = groq_response([
+def fetch_trend_headlines(queries=TREND_QUERIES):
+    """Fetch every trend query at once instead of one after another."""
+    with ThreadPoolExecutor(max_workers=len(queries)) as executor:
+        results = list(executor.map(lambda q: fetch_google_news(q, max_results=5), queries))
+    return [h for q, articles in zip(queries, results) for h in trend_headlines(q, articles)]
+
+
+def analyze_trends(headlines, timeout=30):
+    """Headlines from overlapping queries are clustered, so each story is sent once, busiest first."""
+    headlines_text = "\n".join(
+        f"- [{', '.join(s['queries'])}] {story_line(s)}" for s in _stories(headlines, "TRENDS"))
+
+    return groq_response([
         {"role": "system", "content": """You are Scout, a research agent for Do Deals With Lee (DDWL).
 Lee Kearney runs a Tampa Bay real estate investment company. He does wholesaling, coaching, and uses AI/automation.
 
+Stories are listed most-covered first; "covered by N outlets" means it is getting wide attention.
 Analyze these headlines and create a TRENDS REPORT with:
 1. **Hot Right Now** — Top 3 stories Lee needs to know
 2. **Market Pulse** — Real estate market direction
@@ -299,46 +388,169 @@ Analyze these headlines and create a TRENDS REPORT with:
 
 Be concise. Bullet points. Flag urgent items with ⚡."""},
         {"role": "user", "content": f"Here are today's headlines across Lee's key topics:\n\n{headlines_text}"},
-    ], max_tokens=2500)
+    ], max_tokens=2500, timeout=timeout)
+
+
+def render_trends(analysis):
+    return f"# Trends Report — {datetime.now().strftime('%B %d, %Y')}\n\n{analysis or 'No analysis available.'}"
+
+
+def get_trending():
+    """Get trending news across all DDWL topics."""
+    log("TRENDS", "Fetching trends across all topics...")
+    all_headlines = fetch_trend_headlines()
+
+    if not all_headlines:
+        return "No trending news found."
 
-    return f"# Trends Report — {datetime.now().strftime('%B %d, %Y')}\n\n{response or 'No analysis available.'}"
+    return render_trends(analyze_trends(all_headlines))
 
 
-def generate_morning_brief():
-    """Generate a full morning briefing for Lee."""
-    log("BRIEF", "Generating morning brief...")
+# ============================================================
+# MORNING BRIEF — concurrent stage graph with a time budget
+# ============================================================
+BRIEF_BUDGET = 12          # seconds for the whole brief
+BRIEF_REDDIT_QUERY = "real estate wholesaling"
+BRIEF_AI_QUERY = "AI agents business automation 2026"
+BRIEF_LOCAL_QUERY = "Tampa Bay real estate market"
+BRIEF_TIMINGS = BRAIN_DIR / "brief-timings.jsonl"
+DEGRADED = "_Analysis skipped — time budget reached. Headlines only._"
+
+
+def _run_stage(fn, deadline, inputs):
+    started = time.time()
+    try:
+        return fn(deadline, *inputs), started, "ok"
+    except Exception as e:
+        log("BRIEF", f"Stage error: {e}")
+        return None, started, "error"
+
+
+def run_stages(stages, budget, max_workers=8):
+    """Run {name: (fn, [deps])} as a dependency graph within `budget` seconds.
+
+    Each stage starts as soon as its dependencies finish and is called as
+    fn(deadline, *dep_results). Returns (results, timings); stages still running
+    at the deadline are missing from results and marked "timeout" in timings.
+    """
+    start = time.time()
+    deadline = start + budget
+    results, timings = {}, {}
+    waiting = dict(stages)
+    running = {}
+    executor = ThreadPoolExecutor(max_workers=max_workers)
+
+    def launch_ready():
+        for name, (fn, deps) in list(waiting.items()):
+            if all(d in results for d in deps):
+                del waiting[name]
+                running[executor.submit(_run_stage, fn, deadline, [results[d] for d in deps])] = name
+
+    try:
+        launch_ready()
+        while running:
+            remaining = deadline - time.time()
+            if remaining <= 0:
+                break
+            done, _ = wait(running, timeout=remaining, return_when=FIRST_COMPLETED)
+            for future in done:
+                name = running.pop(future)
+                value, started, status = future.result()
+                results[name] = value
+                timings[name] = {"start": round(started - start, 2),
+                                 "seconds": round(time.time() - started, 2), "status": status}
+            launch_ready()
+    finally:
+        executor.shutdown(wait=False, cancel_futures=True)
+
+    for name in running.values():
+        timings[name] = {"start": None, "seconds": round(time.time() - start, 2), "status": "timeout"}
+    for name in waiting:
+        timings[name] = {"start": None, "seconds": 0, "status": "skipped"}
+    return results, timings
+
+
+def _time_left(deadline):
+    return max(1.0, deadline - time.time())
+
+
+def brief_stages():
+    """fetch:* stages hit Google News / Reddit; analyze:* stages wait for their fetches, then ask Groq."""
+    stages = {}
+    for q in TREND_QUERIES:
+        stages[f"fetch:trends:{q}"] = (
+            lambda dl, q=q: trend_headlines(q, fetch_google_news(q, max_results=5, timeout=_time_left(dl))), [])
+    stages["fetch:reddit"] = (lambda dl: fetch_reddit(BRIEF_REDDIT_QUERY, timeout=_time_left(dl)), [])
+    stages["fetch:ai"] = (lambda dl: fetch_google_news(BRIEF_AI_QUERY, timeout=_time_left(dl)), [])
+    stages["fetch:local"] = (lambda dl: fetch_google_news(BRIEF_LOCAL_QUERY, timeout=_time_left(dl)), [])
+
+    stages["analyze:trends"] = (
+        lambda dl, *parts: analyze_trends(sum(parts, []), timeout=_time_left(dl)) if any(parts) else None,
+        [f"fetch:trends:{q}" for q in TREND_QUERIES])
+    stages["analyze:reddit"] = (
+        lambda dl, posts: analyze_reddit(BRIEF_REDDIT_QUERY, posts, timeout=_time_left(dl)) if posts else None,
+        ["fetch:reddit"])
+    stages["analyze:ai"] = (
+        lambda dl, arts: analyze_news(BRIEF_AI_QUERY, arts, timeout=_time_left(dl)) if arts else None,
+        ["fetch:ai"])
+    stages["analyze:local"] = (
+        lambda dl, arts: analyze_news(BRIEF_LOCAL_QUERY, arts, timeout=_time_left(dl)) if arts else None,
+        ["fetch:local"])
+    return stages
+
+
+def generate_morning_brief(budget=BRIEF_BUDGET):
+    """Generate a full morning briefing for Lee.
+
+    All fetches run at once and each analysis starts as soon as its headlines
+    arrive. Anything not done within `budget` seconds degrades to headlines only.
+    """
+    log("BRIEF", f"Generating morning brief (budget {budget}s)...")
+    started = time.time()
     now = datetime.now().strftime("%A, %B %d, %Y")
+    results, timings = run_stages(brief_stages(), budget)
     sections = []
+    degraded = []
+
+    def analysis(name):
+        if name in results:
+            return results[name]
+        degraded.append(name.split(":", 1)[1])
+        return DEGRADED
 
     # 1. Trends
-    log("BRIEF", "Section 1/4: Trends")
-    trends = get_trending()
-    if trends:
-        sections.append(trends)
+    headlines = sum((results.get(f"fetch:trends:{q}") or [] for q in TREND_QUERIES), [])
+    if headlines:
+        trends = analysis("analyze:trends")
+        if trends == DEGRADED:
+            trends = "\n".join(f"- {story_line(s)}" for s in cluster_headlines(headlines)) + f"\n\n{DEGRADED}"
+        sections.append(render_trends(trends))
 
     # 2. Reddit Pulse
-    log("BRIEF", "Section 2/4: Reddit")
-    reddit = search_reddit_topics("real estate wholesaling")
-    if reddit:
-        sections.append(reddit)
+    if results.get("fetch:reddit"):
+        sections.append(render_reddit(BRIEF_REDDIT_QUERY, results["fetch:reddit"], analysis("analyze:reddit")))
 
     # 3. AI News
-    log("BRIEF", "Section 3/4: AI News")
-    ai_news = search_news("AI agents business automation 2026")
-    if ai_news:
-        sections.append(ai_news)
+    if results.get("fetch:ai"):
+        sections.append(render_news(BRIEF_AI_QUERY, results["fetch:ai"], analysis("analyze:ai")))
 
     # 4. Tampa Bay Local
-    log("BRIEF", "Section 4/4: Tampa Bay")
-    local = search_news("Tampa Bay real estate market")
-    if local:
-        sections.append(local)
+    if results.get("fetch:local"):
+        sections.append(render_news(BRIEF_LOCAL_QUERY, results["fetch:local"], analysis("analyze:local")))
+
+    elapsed = time.time() - started
+    for name, t in sorted(timings.items(), key=lambda x: (x[1]["start"] is None, x[1]["start"] or 0)):
+        log("BRIEF", f"  {name:<45} {t['seconds']:>6.2f}s  {t['status']}")
+    log("BRIEF", f"Built in {elapsed:.1f}s" + (f" — degraded: {', '.join(degraded)}" if degraded else ""))
+    with open(BRIEF_TIMINGS, "a", encoding="utf-8") as f:
+        f.write(json.dumps({"at": datetime.now().isoformat(timespec="seconds"), "budget": budget,
+                            "seconds": round(elapsed, 2), "degraded": degraded, "stages": timings}) + "\n")
 
     # Compile brief
     divider = "\n\n---\n\n"
     brief = f"""# DDWL Morning Brief — {now}
 
-Generated by Scout (Groq llama-3.3-70b) at {time.strftime("%I:%M %p")}
+Generated by Scout (Groq llama-3.3-70b) at {time.strftime("%I:%M %p")} in {elapsed:.1f}s
 Cost: $0.00
 
 ---
@@ -414,8 +626,14 @@ def main():
     elif cmd == "ask" and len(sys.argv) > 2:
         result = ask_scout(" ".join(sys.argv[2:]))
     elif cmd == "brief":
-        result = generate_morning_brief()
+        result = generate_morning_brief(float(sys.argv[2]) if len(sys.argv) > 2 else BRIEF_BUDGET)
     elif cmd == "test":
+        log("TEST", "Testing headline clustering...")
+        for a, b, expected in CLUSTER_CHECKS:
+            merged = len(cluster_headlines([{"title": a, "source": "A"}, {"title": b, "source": "B"}])) == 1
+            log("TEST", f"{'✓' if merged == expected else '✗'} {'merged' if merged else 'kept apart'}: "
+                        f"{strip_publisher(a)[:40]} / {strip_publisher(b)[:40]}")
+
         log("TEST", "Testing Groq API connection...")
         result = call_groq([{"role": "user", "content": "Say 'Scout online' in one sentence."}])
         if result:
@@ -52,7 +52,7 @@ pip install --upgrade pip
 if [ -f "lenovo-setup/requirements.txt" ]; then
     pip install -r lenovo-setup/requirements.txt
 else
-    pip install python-telegram-bot==21.5 requests python-dotenv pytz apscheduler
+    pip install python-telegram-bot==21.5 requests "httpx[http2]" python-dotenv pytz apscheduler numpy
     pip install google-auth google-auth-oauthlib google-auth-httplib2 google-api-python-client
     pip install playwright beautifulsoup4
 fi
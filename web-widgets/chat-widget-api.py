@@ -7,6 +7,21 @@ Runs on the Lenovo or any server.
 USAGE:
     python chat-widget-api.py                  # Start on port 8090
     python chat-widget-api.py --port 8091      # Custom port
+    python chat-widget-api.py --workers 64     # Bigger worker pool
+    python chat-widget-api.py --bench 300      # Load test against a stub LLM (p50/p99)
+    python chat-widget-api.py --bench 300 --stream   # Same, measuring time to first token
+    python chat-widget-api.py --check-cache    # Widget-shaped requests vs a stub LLM: repeats hit the cache
+
+ENDPOINTS:
+    POST /api/chat           → {"reply": ..., "bot_name": ...} once the answer is complete
+    POST /api/chat/stream    → Server-Sent Events: data: {"token": ...} as Groq generates,
+                               then event: done with the full reply (or event: error
+                               if Groq stopped mid-answer)
+
+Requests are served by a bounded worker pool so one slow Groq call doesn't
+queue every other visitor, and upstream calls reuse pooled connections.
+Standalone questions are answered from a per-client semantic cache when a
+near-identical one was asked recently (see agent-skills/response_cache.py).
 
 DEPLOY:
     systemd service on Lenovo (see LENOVO-SETUP-GUIDE.md)
@@ -20,13 +35,21 @@ import sys
 import json
 import time
 import logging
+import threading
+import urllib.request
 from pathlib import Path
-from http.server import HTTPServer, BaseHTTPRequestHandler
+from concurrent.futures import ThreadPoolExecutor
+from http.server import HTTPServer, ThreadingHTTPServer, BaseHTTPRequestHandler
 from urllib.parse import urlparse
 import requests
+from requests.adapters import HTTPAdapter
 
 # Load env
 BASE_DIR = Path(__file__).parent.parent
+sys.path.insert(0, str(BASE_DIR / "agent-skills"))
+from response_cache import ResponseCache  # noqa: E402
+from llm_quota import QUOTA, QuotaManager, estimate_tokens  # noqa: E402
+
 env_file = BASE_DIR / ".env"
 if env_file.exists():
     for line in env_file.read_text().splitlines():
@@ -36,9 +59,27 @@ if env_file.exists():
             os.environ.setdefault(k.strip(), v.strip())
 
 GROQ_API_KEY = os.environ.get("GROQ_API_KEY", "")
+GROQ_URL = "https://api.groq.com/openai/v1/chat/completions"
 PORT = 8090
 MODEL = "llama-3.3-70b-versatile"
 
+WORKERS = int(os.environ.get("CHAT_WORKERS", 32))  # concurrent visitor requests
+MAX_QUEUED = 256        # waiting beyond the busy workers before we shed load with 503
+REQUEST_BUDGET = 20     # seconds per visitor request, upstream call included
+UPSTREAM_TIMEOUT = 15   # cap on a single Groq call
+
+# FAQ answer cache — similarity 0..1 (1 = exact wording only), TTL in seconds
+RESPONSE_CACHE = ResponseCache(
+    threshold=float(os.environ.get("CHAT_CACHE_THRESHOLD", 0.8)),
+    ttl=int(os.environ.get("CHAT_CACHE_TTL", 24 * 3600)),
+    max_entries=int(os.environ.get("CHAT_CACHE_SIZE", 2000)),
+)
+
+OFFLINE_REPLY = "Chat is currently offline. Please call us directly."
+TROUBLE_REPLY = "I'm having trouble right now. Please try again in a moment."
+CONNECTION_REPLY = "Connection error. Please try again."
+FALLBACK_REPLIES = {OFFLINE_REPLY, TROUBLE_REPLY, CONNECTION_REPLY}
+
 # Client configs — add new clients here
 CLIENTS = {
     "ddwl": {
@@ -65,14 +106,31 @@ logging.basicConfig(format="  [%(asctime)s] %(message)s", datefmt="%H:%M:%S", le
 logger = logging.getLogger(__name__)
 
 
-def call_groq(messages):
+def pooled_session(size):
+    """Keep-alive session shared by all workers — no TLS handshake per visitor message."""
+    s = requests.Session()
+    s.mount("https://", HTTPAdapter(pool_connections=4, pool_maxsize=size))
+    s.mount("http://", HTTPAdapter(pool_connections=4, pool_maxsize=size))
+    return s
+
+
+session = pooled_session(WORKERS)
+
+
+def call_groq(messages, timeout=UPSTREAM_TIMEOUT):
     """Call Groq API and return the response text."""
     if not GROQ_API_KEY:
-        return "Chat is currently offline. Please call us directly."
+        return OFFLINE_REPLY
+    if timeout <= 0:
+        return TROUBLE_REPLY
+    est = estimate_tokens(messages, max_tokens=300)
+    if not QUOTA.acquire("groq", tokens=est, priority="interactive", timeout=min(2, timeout)):
+        logger.warning("Groq free-tier quota exhausted")
+        return TROUBLE_REPLY
 
     try:
-        r = requests.post(
-            "https://api.groq.com/openai/v1/chat/completions",
+        r = session.post(
+            GROQ_URL,
             headers={
                 "Authorization": f"Bearer {GROQ_API_KEY}",
                 "Content-Type": "application/json",
@@ -83,19 +141,146 @@ def call_groq(messages):
                 "temperature": 0.4,
                 "max_tokens": 300,
             },
-            timeout=15,
+            timeout=(min(3, timeout), timeout),
         )
         if r.status_code == 200:
-            return r.json()["choices"][0]["message"]["content"]
+            data = r.json()
+            QUOTA.settle("groq", est, data.get("usage", {}).get("total_tokens"))
+            return data["choices"][0]["message"]["content"]
         else:
+            if r.status_code == 429:
+                QUOTA.backoff("groq", float(r.headers.get("Retry-After") or 30))
             logger.error(f"Groq {r.status_code}: {r.text[:200]}")
-            return "I'm having trouble right now. Please try again in a moment."
+            return TROUBLE_REPLY
     except Exception as e:
         logger.error(f"Groq error: {e}")
-        return "Connection error. Please try again."
+        return CONNECTION_REPLY
+
+
+def stream_groq(messages, timeout=UPSTREAM_TIMEOUT, status=None):
+    """Yield reply tokens as Groq's OpenAI-compatible stream produces them.
+
+    status["complete"] is set once Groq ends the stream with [DONE] — a reply
+    without it was cut off (or is one of the FALLBACK_REPLIES). The quota is
+    settled when the stream ends, with Groq's reported usage or, if it never
+    arrived, the prompt plus what was streamed.
+    """
+    status = {} if status is None else status
+    status["complete"] = False
+    if not GROQ_API_KEY:
+        yield OFFLINE_REPLY
+        return
+    if timeout <= 0:
+        yield TROUBLE_REPLY
+        return
+    est = estimate_tokens(messages, max_tokens=300)
+    if not QUOTA.acquire("groq", tokens=est, priority="interactive", timeout=min(2, timeout)):
+        logger.warning("Groq free-tier quota exhausted")
+        yield TROUBLE_REPLY
+        return
+
+    sent = False
+    streamed, usage = [], {}
+    try:
+        with session.post(
+            GROQ_URL,
+            headers={
+                "Authorization": f"Bearer {GROQ_API_KEY}",
+                "Content-Type": "application/json",
+            },
+            json={
+                "model": MODEL,
+                "messages": messages,
+                "temperature": 0.4,
+                "max_tokens": 300,
+                "stream": True,
+                "stream_options": {"include_usage": True},
+            },
+            timeout=(min(3, timeout), timeout),
+            stream=True,
+        ) as r:
+            if r.status_code != 200:
+                if r.status_code == 429:
+                    QUOTA.backoff("groq", float(r.headers.get("Retry-After") or 30))
+                logger.error(f"Groq stream {r.status_code}: {r.text[:200]}")
+                yield TROUBLE_REPLY
+                return
+            r.encoding = "utf-8"
+            try:
+                # chunk_size=None hands over each chunk as it arrives instead of waiting for 512 bytes
+                for line in r.iter_lines(chunk_size=None, decode_unicode=True):
+                    if not line or not line.startswith("data:"):
+                        continue
+                    data = line[5:].strip()
+                    if data == "[DONE]":
+                        status["complete"] = True
+                        break
+                    try:
+                        chunk = json.loads(data)
+                    except ValueError:
+                        continue
+                    # The last chunk carries usage (OpenAI style, or under x_groq) and no choices
+                    usage = chunk.get("usage") or (chunk.get("x_groq") or {}).get("usage") or usage
+                    try:
+                        token = chunk["choices"][0].get("delta", {}).get("content")
+                    except (KeyError, IndexError, TypeError):
+                        continue
+                    if token:
+                        sent = True
+                        streamed.append(token)
+                        yield token
+            finally:
+                # Also runs when the visitor leaves mid-answer and the generator is closed
+                QUOTA.settle("groq", est, usage.get("total_tokens")
+                             or estimate_tokens(messages) + estimate_tokens("".join(streamed)))
+    except Exception as e:
+        logger.error(f"Groq stream error: {e}")
+    else:
+        if not status["complete"]:
+            logger.error("Groq stream closed before [DONE]")
+    if not sent:
+        yield CONNECTION_REPLY
+
+
+class PooledHTTPServer(HTTPServer):
+    """HTTPServer that hands each connection to a bounded worker pool.
+    When every worker is busy and the queue is full, new connections get a 503 straight away."""
+
+    request_queue_size = 512
+
+    def __init__(self, server_address, handler_class, workers=WORKERS, max_queued=MAX_QUEUED):
+        super().__init__(server_address, handler_class)
+        self.workers = workers
+        self.pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="chat")
+        self.slots = threading.BoundedSemaphore(workers + max_queued)
+
+    def process_request(self, request, client_address):
+        if not self.slots.acquire(blocking=False):
+            try:
+                request.sendall(b"HTTP/1.1 503 Service Unavailable\r\nContent-Length: 0\r\nConnection: close\r\n\r\n")
+            except OSError:
+                pass
+            self.shutdown_request(request)
+            return
+        self.pool.submit(self._work, request, client_address)
+
+    def _work(self, request, client_address):
+        try:
+            self.finish_request(request, client_address)
+        except Exception:
+            self.handle_error(request, client_address)
+        finally:
+            self.shutdown_request(request)
+            self.slots.release()
+
+    def server_close(self):
+        super().server_close()
+        self.pool.shutdown(wait=False)
 
 
 class ChatHandler(BaseHTTPRequestHandler):
+    timeout = 10  # slow or idle visitors can't pin a worker
+
     def do_OPTIONS(self):
         """Handle CORS preflight."""
         self.send_response(200)
@@ -103,10 +288,11 @@ class ChatHandler(BaseHTTPRequestHandler):
         self.end_headers()
 
     def do_POST(self):
-        """Handle chat message."""
+        """Handle chat message — one JSON reply, or a token stream on /api/chat/stream."""
+        started = time.time()
         path = urlparse(self.path).path
 
-        if path != "/api/chat":
+        if path not in ("/api/chat", "/api/chat/stream"):
             self.send_error(404)
             return
 
@@ -135,10 +321,32 @@ class ChatHandler(BaseHTTPRequestHandler):
                 "content": msg.get("content", ""),
             })
 
-        logger.info(f"[{client_id}] {user_messages[-1].get('content', '')[:60]}")
+        question = user_messages[-1].get("content", "")
+        logger.info(f"[{client_id}] {question[:60]}")
+        budget = min(UPSTREAM_TIMEOUT, REQUEST_BUDGET - (time.time() - started))
+
+        # Only an opening question is context-free enough to answer from cache. The widget
+        # sends its greeting (and on /api/chat its system prompt) ahead of it, so count
+        # the visitor's turns rather than the messages
+        cache_key, cached = None, None
+        opening = sum(m.get("role") == "user" for m in user_messages) == 1
+        if opening and user_messages[-1].get("role") == "user":
+            cache_key = (client_id, client["system_prompt"], question)
+            cached = RESPONSE_CACHE.get(*cache_key)
+            if cached is not None:
+                logger.info(f"[{client_id}] cache hit")
+
+        if path == "/api/chat/stream":
+            self._stream_reply(messages, client, budget, cache_key, cached)
+            return
 
-        # Get AI response
-        reply = call_groq(messages)
+        # Get AI response within what's left of the request budget
+        if cached is not None:
+            reply = cached
+        else:
+            reply = call_groq(messages, timeout=budget)
+            if cache_key and reply not in FALLBACK_REPLIES:
+                RESPONSE_CACHE.put(*cache_key, reply)
 
         # Send response
         self.send_response(200)
@@ -150,6 +358,42 @@ class ChatHandler(BaseHTTPRequestHandler):
             "bot_name": client["bot_name"],
         }).encode())
 
+    def _stream_reply(self, messages, client, budget, cache_key=None, cached=None):
+        """Forward tokens to the visitor as Server-Sent Events while Groq generates them."""
+        self.send_response(200)
+        self._cors_headers()
+        self.send_header("Content-Type", "text/event-stream")
+        self.send_header("Cache-Control", "no-cache")
+        self.send_header("X-Accel-Buffering", "no")  # stop nginx from buffering the stream
+        self.end_headers()
+
+        status = {"complete": cached is not None}
+        tokens = iter([cached]) if cached is not None else stream_groq(messages, timeout=budget, status=status)
+        reply = []
+        try:
+            for token in tokens:
+                reply.append(token)
+                self._send_event({"token": token})
+            full = "".join(reply)
+            if not status["complete"] and full not in FALLBACK_REPLIES:
+                # Groq stopped mid-answer: never cache it, and tell the widget it's incomplete
+                self._send_event({"error": CONNECTION_REPLY, "reply": full}, event="error")
+                return
+            if cache_key and cached is None and full not in FALLBACK_REPLIES:
+                RESPONSE_CACHE.put(*cache_key, full)
+            self._send_event({"reply": full, "bot_name": client["bot_name"]}, event="done")
+        except (BrokenPipeError, ConnectionResetError):
+            logger.info("Visitor closed the stream early")
+        finally:
+            if hasattr(tokens, "close"):
+                tokens.close()  # drops the upstream connection if the visitor left mid-answer
+
+    def _send_event(self, data, event=None):
+        chunk = f"event: {event}\n" if event else ""
+        chunk += f"data: {json.dumps(data)}\n\n"
+        self.wfile.write(chunk.encode())
+        self.wfile.flush()
+
     def do_GET(self):
         """Health check."""
         if self.path == "/health":
@@ -161,6 +405,8 @@ class ChatHandler(BaseHTTPRequestHandler):
                 "status": "ok",
                 "clients": list(CLIENTS.keys()),
                 "model": MODEL,
+                "workers": getattr(self.server, "workers", 1),
+                "cache": RESPONSE_CACHE.stats(),
             }).encode())
         else:
             self.send_error(404)
@@ -174,15 +420,201 @@ class ChatHandler(BaseHTTPRequestHandler):
         pass  # Suppress default logging
 
 
-def main():
-    global PORT
-    if "--port" in sys.argv:
-        idx = sys.argv.index("--port")
+# ============================================================
+# BENCHMARK — hundreds of concurrent /api/chat calls vs a stub LLM
+# ============================================================
+class _StubLLM(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"  # chunked streaming, like the real providers
+    delay = 0.5
+    calls = 0
+
+    def do_POST(self):
+        _StubLLM.calls += 1
+        req = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))) or b"{}")
+        if req.get("stream"):
+            # First token after a fifth of the delay, the rest spread over the remainder
+            self.send_response(200)
+            self.send_header("Content-Type", "text/event-stream")
+            self.send_header("Transfer-Encoding", "chunked")
+            self.end_headers()
+            words = "Stub reply from the benchmark LLM, streamed one word at a time.".split()
+            time.sleep(self.delay / 5)
+            for i, word in enumerate(words):
+                if i:
+                    time.sleep(self.delay * 0.8 / (len(words) - 1))
+                delta = {"choices": [{"delta": {"content": word + " "}}]}
+                self._chunk(f"data: {json.dumps(delta)}\n\n".encode())
+            self._chunk(b"data: [DONE]\n\n")
+            self._chunk(b"")
+            return
+        time.sleep(self.delay)
+        body = json.dumps({"choices": [{"message": {"content": "Stub reply from the benchmark LLM."}}]}).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _chunk(self, data):
+        self.wfile.write(f"{len(data):X}\r\n".encode() + data + b"\r\n")
+        self.wfile.flush()
+
+    def log_message(self, format, *args):
+        pass
+
+
+class _StubServer(ThreadingHTTPServer):
+    daemon_threads = True
+    request_queue_size = 512
+
+
+def _percentile(sorted_values, pct):
+    if not sorted_values:
+        return 0.0
+    idx = min(len(sorted_values) - 1, int(round(pct / 100 * (len(sorted_values) - 1))))
+    return sorted_values[idx]
+
+
+def widget_payload(question, stream=False, client="ddwl"):
+    """A first message exactly as chat-widget.html sends it: greeting first, system prompt only on /api/chat."""
+    history = [{"role": "system", "content": CLIENTS[client]["system_prompt"]},
+               {"role": "assistant",
+                "content": "Hey! I'm Lilly, the AI assistant for Do Deals With Lee. How can I help you today?"},
+               {"role": "user", "content": question}]
+    if stream:
+        history = [m for m in history if m["role"] != "system"]
+    return json.dumps({"client": client, "messages": history}).encode()
+
+
+def _start_stub(llm_delay, workers, cache):
+    """Point Groq at a local stub LLM and start a pooled server in front of it → (server, llm)."""
+    global GROQ_URL, GROQ_API_KEY, RESPONSE_CACHE, QUOTA
+    RESPONSE_CACHE = cache
+    QUOTA = QuotaManager(limits={})  # the stub isn't Groq — don't spend the shared free-tier budget
+    _StubLLM.delay = llm_delay
+    _StubLLM.calls = 0
+    llm = _StubServer(("127.0.0.1", 0), _StubLLM)
+    threading.Thread(target=llm.serve_forever, daemon=True).start()
+    GROQ_URL = f"http://127.0.0.1:{llm.server_port}/v1/chat/completions"
+    GROQ_API_KEY = GROQ_API_KEY or "bench"
+    logging.getLogger().setLevel(logging.WARNING)
+
+    server = PooledHTTPServer(("127.0.0.1", 0), ChatHandler, workers=workers)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, llm
+
+
+def _stop_stub(server, llm):
+    server.shutdown()
+    server.server_close()
+    llm.shutdown()
+
+
+def check_cache():
+    """Send what the real widget sends and confirm repeats skip the LLM — and lead details never do."""
+    server, llm = _start_stub(0.05, 4, ResponseCache())
+    base = f"http://127.0.0.1:{server.server_port}/api/chat"
+
+    def ask(question, stream):
+        req = urllib.request.Request(base + ("/stream" if stream else ""), data=widget_payload(question, stream),
+                                     headers={"Content-Type": "application/json"})
+        with urllib.request.urlopen(req, timeout=30) as r:
+            r.read()
+        return _StubLLM.calls
+
+    cases = [
+        ("opening question, streamed", "What is wholesaling?", True, 1),
+        ("same question, streamed", "What is wholesaling?", True, 1),
+        ("same question, one-shot", "Hey, what's wholesaling?", False, 1),
+        ("lead details", "I want to sell my house at 1234 Oak Street Tampa", True, 2),
+        ("other address", "I want to sell my house at 1284 Oak Street Tampa", True, 3),
+        ("same lead again", "I want to sell my house at 1234 Oak Street Tampa", False, 4),
+    ]
+    failed = 0
+    try:
+        for label, question, stream, expected in cases:
+            calls = ask(question, stream)
+            ok = calls == expected
+            failed += not ok
+            print(f"  {'ok  ' if ok else 'FAIL'} {label:<28} LLM calls so far {calls} (expected {expected})")
+    finally:
+        _stop_stub(server, llm)
+    print(f"  Cache: {RESPONSE_CACHE.stats()}")
+    return failed == 0
+
+
+def bench(requests_total=200, llm_delay=0.5, workers=WORKERS, stream=False):
+    """Drive concurrent /api/chat (or /api/chat/stream) requests through the pooled server against a stubbed LLM."""
+    server, llm = _start_stub(llm_delay, workers, ResponseCache(max_entries=0))  # every request reaches the stub
+    url = f"http://127.0.0.1:{server.server_port}/api/chat" + ("/stream" if stream else "")
+    payload = widget_payload("What is wholesaling?", stream)
+
+    def one(_):
+        start = time.time()
+        first = None
+        try:
+            req = urllib.request.Request(url, data=payload, headers={"Content-Type": "application/json"})
+            with urllib.request.urlopen(req, timeout=60) as r:
+                if stream:
+                    ok = False
+                    for line in r:
+                        if first is None and line.startswith(b"data:"):
+                            first = time.time() - start
+                        ok = ok or line.startswith(b"event: done")
+                else:
+                    ok = r.status == 200 and "reply" in json.loads(r.read())
+        except Exception:
+            ok = False
+        return time.time() - start, ok, first if first is not None else time.time() - start
+
+    start = time.time()
+    with ThreadPoolExecutor(max_workers=requests_total) as ex:
+        results = list(ex.map(one, range(requests_total)))
+    wall = time.time() - start
+    _stop_stub(server, llm)
+
+    latencies = sorted(r[0] for r in results)
+    first_token = sorted(r[2] for r in results)
+    errors = sum(1 for r in results if not r[1])
+    mode = "stream" if stream else "json"
+    print(f"\n{'='*60}")
+    print(f"  CHAT WIDGET BENCHMARK ({mode}) — {requests_total} concurrent, {workers} workers, {llm_delay:.2f}s LLM")
+    print(f"{'='*60}")
+    print(f"  Wall time:  {wall:.2f}s   ({requests_total / wall:.1f} req/s)")
+    print(f"  p50:        {_percentile(latencies, 50):.3f}s")
+    print(f"  p99:        {_percentile(latencies, 99):.3f}s")
+    print(f"  max:        {latencies[-1]:.3f}s")
+    if stream:
+        print(f"  First token p50 / p99: {_percentile(first_token, 50):.3f}s / {_percentile(first_token, 99):.3f}s")
+    print(f"  Errors:     {errors}  (incl. 503s shed beyond {workers + MAX_QUEUED} in flight)")
+    print(f"  Single-threaded would take ~{requests_total * llm_delay:.1f}s")
+    print(f"{'='*60}\n")
+    return {"p50": _percentile(latencies, 50), "p99": _percentile(latencies, 99), "wall": wall, "errors": errors}
+
+
+def _arg(flag, default, cast=int):
+    if flag in sys.argv:
+        idx = sys.argv.index(flag)
         if idx + 1 < len(sys.argv):
-            PORT = int(sys.argv[idx + 1])
+            return cast(sys.argv[idx + 1])
+    return default
+
+
+def main():
+    global PORT, session
+    PORT = _arg("--port", PORT)
+    workers = _arg("--workers", WORKERS)
+    session = pooled_session(workers)
+
+    if "--check-cache" in sys.argv:
+        sys.exit(0 if check_cache() else 1)
+
+    if "--bench" in sys.argv:
+        bench(_arg("--bench", 200), _arg("--llm-delay", 0.5, float), workers, stream="--stream" in sys.argv)
+        return
 
-    server = HTTPServer(("0.0.0.0", PORT), ChatHandler)
-    logger.info(f"Chat Widget API running on http://0.0.0.0:{PORT}")
+    server = PooledHTTPServer(("0.0.0.0", PORT), ChatHandler, workers=workers)
+    logger.info(f"Chat Widget API running on http://0.0.0.0:{PORT} ({workers} workers)")
     logger.info(f"Health: http://localhost:{PORT}/health")
     logger.info(f"Chat:   POST http://localhost:{PORT}/api/chat")
     logger.info(f"Clients: {', '.join(CLIENTS.keys())}")